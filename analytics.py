@@ -0,0 +1,182 @@
+# analytics.py
+"""
+Analítica de ventas con NumPy: percentiles del ticket, media móvil diaria,
+mapa de calor día de la semana x hora, reparto por caja y forma de pago, y
+una previsión sencilla de la demanda de los próximos días.
+
+Las ventas completadas del periodo se cargan de una vez en arrays (una
+columna por campo) y todo se calcula con operaciones vectorizadas
+(bincount, percentile, searchsorted...), sin bucles por venta en Python.
+El resultado son tipos simples de Python (dict/list/float) para que la
+caché del modelo y la vista lo usen tal cual; ver AppModel.get_sales_analytics.
+
+NumPy es opcional: sin él, AVAILABLE es False y la app no muestra el análisis.
+Cada función que lo usa lo importa dentro: importar NumPy tarda más que
+arrancar el resto del modelo, y cli.py o export.py no lo necesitan (después
+de la primera vez, el import solo lo busca en sys.modules).
+"""
+import importlib.util
+from collections import namedtuple
+from datetime import date, datetime, time, timedelta
+
+
+# Sin NumPy la app funciona igual, solo sin la pestaña de análisis
+AVAILABLE = importlib.util.find_spec("numpy") is not None
+
+ANALYTICS_DAYS = 28              # Periodo analizado: los últimos N días (incluido hoy)
+TICKET_PERCENTILES = (25, 50, 75, 90, 99)
+MOVING_AVERAGE_DAYS = 7          # Ventana de la media móvil diaria
+FORECAST_DAYS = 7                # Días que se prevén a partir de hoy
+MIN_FORECAST_DAYS = 7            # Días completos con datos necesarios para prever
+TOP_CASHIERS = 5
+
+# Columnas de las ventas del periodo. cashier/payment van codificadas:
+# el array tiene el índice de cada venta en la lista de etiquetas.
+SalesColumns = namedtuple("SalesColumns", "amount items sold_at cashier cashiers payment payments")
+
+
+def day_starts(first_day, days):
+    """Epoch de la medianoche local de cada día desde first_day, más la del día siguiente al último."""
+    return [int(datetime.combine(first_day + timedelta(days=i), time()).timestamp()) for i in range(days + 1)]
+
+
+def load_sales(conn, start, end):
+    """
+    Ventas completadas con sold_at en [start, end) como arrays de NumPy.
+    Una sola consulta (recorre el rango de idx_sales_sold_at) y una sola
+    conversión por columna.
+    """
+    import numpy as np
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    try:
+        rows = cursor.execute("""
+            SELECT amount, items, sold_at, COALESCE(cashier, ''), COALESCE(payment, 'Sin datos')
+            FROM sales WHERE sold_at >= ? AND sold_at < ? AND status = 'completed'
+        """, (start, end)).fetchall()
+    finally:
+        cursor.close()
+
+    if not rows:
+        empty = np.empty(0)
+        return SalesColumns(empty, empty, np.empty(0, dtype=np.int64), np.empty(0, dtype=np.intp), [], np.empty(0, dtype=np.intp), [])
+    amount, items, sold_at, cashier, payment = zip(*rows)
+    cashiers, cashier_codes = _encode(cashier)
+    payments, payment_codes = _encode(payment)
+    return SalesColumns(
+        np.array(amount, dtype=np.float64),
+        np.array(items, dtype=np.float64),  # None -> nan
+        np.array(sold_at, dtype=np.int64),
+        cashier_codes, cashiers,
+        payment_codes, payments,
+    )
+
+
+def _encode(values):
+    """(etiquetas ordenadas, array con el índice de cada valor). Mucho más rápido que np.unique con cadenas."""
+    import numpy as np
+    labels = sorted(set(values))
+    index = {label: i for i, label in enumerate(labels)}
+    return labels, np.fromiter(map(index.__getitem__, values), dtype=np.intp, count=len(values))
+
+
+def moving_average(values, window):
+    """Media móvil hacia atrás; los primeros días promedian los que haya."""
+    import numpy as np
+    sums = np.cumsum(values)
+    sums[window:] = sums[window:] - sums[:-window]
+    return sums / np.minimum(np.arange(1, len(values) + 1), window)
+
+
+def forecast(daily, weekdays, days_ahead):
+    """
+    Previsión = tendencia lineal x estacionalidad semanal.
+    El factor de cada día de la semana es su media frente a la media global;
+    la recta se ajusta sobre la serie desestacionalizada. Devuelve un array
+    de days_ahead valores (>= 0) o None si no hay bastantes días con ventas.
+    """
+    import numpy as np
+    if np.count_nonzero(daily) < MIN_FORECAST_DAYS or daily.mean() == 0:
+        return None
+    per_weekday = np.bincount(weekdays, weights=daily, minlength=7)
+    seen = np.bincount(weekdays, minlength=7)
+    factors = np.divide(per_weekday, seen, out=np.ones(7), where=seen > 0) / daily.mean()
+    factors[factors == 0] = 1  # días de la semana sin ventas en el periodo: sin ajuste
+
+    t = np.arange(len(daily))
+    slope, intercept = np.polyfit(t, daily / factors[weekdays], 1)
+    future = np.arange(len(daily), len(daily) + days_ahead)
+    future_weekdays = (weekdays[-1] + 1 + np.arange(days_ahead)) % 7
+    return np.maximum(intercept + slope * future, 0) * factors[future_weekdays]
+
+
+def compute(columns, first_day, days):
+    """
+    Métricas de las ventas cargadas con load_sales para los 'days' días que
+    empiezan en first_day (el último es hoy, todavía incompleto).
+    """
+    import numpy as np
+    starts = np.array(day_starts(first_day, days), dtype=np.int64)
+    amount = columns.amount
+    count = len(amount)
+
+    # Día del periodo, día de la semana y hora local de cada venta
+    day = np.searchsorted(starts, columns.sold_at, side="right") - 1
+    day_weekdays = (first_day.weekday() + np.arange(days)) % 7
+    weekday = day_weekdays[day]
+    hour = np.clip((columns.sold_at - starts[day]) // 3600, 0, 23)
+
+    daily_amount = np.bincount(day, weights=amount, minlength=days)
+    daily_count = np.bincount(day, minlength=days).astype(np.float64)
+    average = moving_average(daily_amount, MOVING_AVERAGE_DAYS)
+
+    heat = np.bincount(weekday * 24 + hour, weights=amount, minlength=7 * 24).reshape(7, 24)
+    active_hours = np.flatnonzero(heat.sum(axis=0))
+    hours = list(range(active_hours[0], active_hours[-1] + 1)) if len(active_hours) else []
+
+    # La previsión se ajusta solo con los días completos (hoy queda fuera)
+    completed = slice(0, days - 1)
+    forecast_amount = forecast(daily_amount[completed], day_weekdays[completed], FORECAST_DAYS)
+    forecast_count = forecast(daily_count[completed], day_weekdays[completed], FORECAST_DAYS)
+
+    by_cashier = np.bincount(columns.cashier, weights=amount, minlength=len(columns.cashiers))
+    by_payment = np.bincount(columns.payment, minlength=len(columns.payments))
+    top = np.argsort(by_cashier)[::-1][:TOP_CASHIERS]
+    total = float(amount.sum())
+
+    return {
+        "days": days,
+        "transactions": count,
+        "total": round(total, 2),
+        "avg_ticket": round(total / count, 2) if count else 0,
+        "avg_items": round(float(np.nanmean(columns.items)), 1) if count and not np.isnan(columns.items).all() else 0,
+        "ticket_percentiles": {p: round(float(v), 2) for p, v in zip(TICKET_PERCENTILES, np.percentile(amount, TICKET_PERCENTILES))} if count else {},
+        "daily": [
+            {"day": (first_day + timedelta(days=i)).isoformat(), "amount": round(float(a), 2), "transactions": int(c), "moving_avg": round(float(m), 2)}
+            for i, (a, c, m) in enumerate(zip(daily_amount, daily_count, average))
+        ],
+        "heatmap": {
+            "hours": hours,
+            "amounts": [[round(float(heat[w, h]), 2) for h in hours] for w in range(7)],
+            "max": round(float(heat.max()), 2) if count else 0,
+        },
+        "forecast": [
+            {"day": (first_day + timedelta(days=days - 1 + i)).isoformat(), "amount": round(float(a)), "transactions": round(float(c))}
+            for i, (a, c) in enumerate(zip(forecast_amount, forecast_count))
+        ] if forecast_amount is not None and forecast_count is not None else [],
+        "cashiers": [
+            {"cashier": columns.cashiers[i], "amount": round(float(by_cashier[i]), 2), "share": round(float(by_cashier[i]) / total, 3)}
+            for i in top if by_cashier[i] > 0
+        ],
+        "payments": [
+            {"payment": columns.payments[i], "share": round(int(n) / count, 3)}
+            for i, n in sorted(enumerate(by_payment), key=lambda item: -item[1])
+        ],
+    }
+
+
+def sales_analytics(conn, today, days=ANALYTICS_DAYS):
+    """Carga y analiza las ventas de los 'days' días que terminan hoy ('today' en ISO)."""
+    first_day = date.fromisoformat(today) - timedelta(days=days - 1)
+    starts = day_starts(first_day, days)
+    return compute(load_sales(conn, starts[0], starts[-1]), first_day, days)
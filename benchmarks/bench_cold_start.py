@@ -0,0 +1,62 @@
+# benchmarks/bench_cold_start.py
+"""
+Arranque en frío de los puntos de entrada: cada comando se lanza como un
+proceso nuevo de Python y se mide hasta que termina (mediana de N veces). Los .pyc se generan antes, para
+no medir la compilación de los módulos.
+
+Compara el intérprete vacío, cli.py (solo el modelo), importar main.py
+(el controlador, que ya no carga Flet) y importar view.py (Flet + la vista,
+lo que paga la interfaz y lo que antes pagaba cualquiera que importara main).
+
+    python benchmarks/bench_cold_start.py --runs 10
+"""
+import argparse
+import compileall
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.run_benchmarks import DEFAULT_DB_DIR, ensure_database
+
+
+def cold_start(command, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tiempo de arranque en frío de cli.py frente a la interfaz.")
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--db-dir", default=DEFAULT_DB_DIR)
+    args = parser.parse_args(argv)
+
+    db_file = ensure_database(args.scale, args.db_dir, args.seed)
+    compileall.compile_dir(ROOT, maxlevels=0, quiet=1)  # como en una instalación: los .pyc ya están
+    commands = [
+        ("python (vacío)", [sys.executable, "-c", "pass"]),
+        ("cli.py --help", [sys.executable, "cli.py", "--help"]),
+        ("cli.py stats dashboard", [sys.executable, "cli.py", "stats", "dashboard", "--db", db_file]),
+        ("import main", [sys.executable, "-c", "import main"]),
+        ("import view (Flet)", [sys.executable, "-c", "import view"]),
+    ]
+    print(f"Arranque en frío, mediana de {args.runs} procesos")
+    baseline = None
+    for label, command in commands:
+        ms = cold_start(command, args.runs)
+        baseline = ms if baseline is None else baseline
+        print(f"  {label:<24} {ms:>8.1f} ms  (+{ms - baseline:.1f} ms sobre Python)")
+
+
+if __name__ == "__main__":
+    main()
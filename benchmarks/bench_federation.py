@@ -0,0 +1,95 @@
+# benchmarks/bench_federation.py
+"""
+Estadísticas de varias tiendas: una detrás de otra frente a federation.py
+(en paralelo en un pool de hilos), y qué pasa cuando una tienda va lenta.
+
+Cada tienda es una copia de la BD de benchmarks. La caché de lecturas se
+desactiva para que cada ronda consulte de verdad las BD. Para la tienda
+lenta se retrasa una de ellas (sleep antes de sus consultas) por encima del
+timeout: el resultado debe llegar a tiempo, parcial, con las demás.
+
+    python benchmarks/bench_federation.py --stores 4 --scale 1 --rounds 20
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.run_benchmarks import DEFAULT_DB_DIR, ensure_database
+from federation import STATS_METHODS, StoreFederation
+
+
+def sequential(federation):
+    for model in federation.models.values():
+        for method in STATS_METHODS.values():
+            getattr(model, method)()
+
+
+def measure(work, rounds):
+    work()  # conexiones y migraciones fuera de la medida
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        work()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def slow_down(model, seconds):
+    """Retrasa las estadísticas de ventas de una tienda (como una BD en un disco de red saturado)."""
+    get_sales_stats = model.get_sales_stats
+
+    def slow():
+        time.sleep(seconds)
+        return get_sales_stats()
+    model.get_sales_stats = slow
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Consultas a varias tiendas en serie y en paralelo.")
+    parser.add_argument("--stores", type=int, default=4)
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--timeout", type=float, default=0.5, help="Timeout de la federación en el caso de la tienda lenta.")
+    parser.add_argument("--db-dir", default=DEFAULT_DB_DIR)
+    args = parser.parse_args(argv)
+
+    source = ensure_database(args.scale, args.db_dir, args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        stores = {}
+        for i in range(args.stores):
+            stores[f"Tienda {i + 1}"] = os.path.join(tmp, f"store_{i + 1}.db")
+            shutil.copy(source, stores[f"Tienda {i + 1}"])
+
+        federation = StoreFederation(stores, timeout=args.timeout)
+        for model in federation.models.values():
+            model.cache = None
+        try:
+            print(f"{args.stores} tiendas de escala {args.scale}, {len(STATS_METHODS)} estadísticas por tienda (mediana de {args.rounds} rondas, {os.cpu_count()} CPU)")
+            serial_ms = measure(lambda: sequential(federation), args.rounds)
+            parallel_ms = measure(federation.get_stats, args.rounds)
+            print(f"  en serie      {serial_ms:>8.1f} ms")
+            print(f"  federación    {parallel_ms:>8.1f} ms  ({serial_ms / parallel_ms:.1f}x)")
+
+            slow_name = next(iter(federation.models))
+            slow_down(federation.models[slow_name], args.timeout * 4)
+            start = time.perf_counter()
+            result = federation.get_stats()
+            elapsed = (time.perf_counter() - start) * 1000
+            answered = sum(info["status"] == "ok" for info in result["stores"].values())
+            print(f"  con {slow_name} lenta ({args.timeout * 4:g} s): respuesta en {elapsed:.0f} ms, "
+                  f"{answered}/{args.stores} tiendas, parcial={result['partial']}, "
+                  f"ventas de la cadena={result['totals']['sales'].get('total_all', 0):,}")
+        finally:
+            federation.close()
+
+
+if __name__ == "__main__":
+    main()
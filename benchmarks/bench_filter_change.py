@@ -0,0 +1,81 @@
+# benchmarks/bench_filter_change.py
+"""
+Coste de un clic en un botón de filtro: el render() completo de la sección
+(estadísticas, tarjetas, botones, búsqueda y lista) frente al camino corto
+de AppController.handle_filter_change (solo la lista y el botón activo).
+
+Se mide sobre la página falsa de stub_page: latencia del manejador y lo que
+Flet enviaría al cliente (comandos y bytes) en cada cambio de filtro. La
+caché de lecturas se desactiva, como en run_benchmarks.
+
+    python benchmarks/bench_filter_change.py --scale 1 --rounds 20
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.run_benchmarks import DEFAULT_DB_DIR, ensure_database
+from benchmarks.stub_page import make_stub_page
+from main import AppController
+from model import AppModel
+
+SECTION_FILTERS = {
+    "sales": ("completed", "pending", "refunded", "all"),
+    "inventory": ("low", "high", "all"),
+    "cashiers": ("open", "closed", "maintenance", "all"),
+}
+
+
+def full_render(app, section, filter_type):
+    """Lo que hacía handle_filter_change antes: cambiar el filtro y renderizar todo."""
+    app.cancel_pending_search()
+    app.active_filter = filter_type
+    app.render()
+
+
+def measure(app, section, change, rounds):
+    conn = app.page.stub_connection
+    for filter_type in SECTION_FILTERS[section]:  # tarjetas y diff de Flet ya calientes
+        change(app, section, filter_type)
+    conn.reset_counters()
+    times = []
+    for _ in range(rounds):
+        for filter_type in SECTION_FILTERS[section]:
+            start = time.perf_counter()
+            change(app, section, filter_type)
+            times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times), conn.bytes_sent / len(times), conn.commands_sent / len(times)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cambio de filtro: render completo frente a actualización parcial.")
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--db-dir", default=DEFAULT_DB_DIR)
+    args = parser.parse_args(argv)
+
+    page = make_stub_page()
+    app = AppController(page, AppModel(ensure_database(args.scale, args.db_dir, args.seed)))
+    app.model.cache = None  # como en run_benchmarks: cada consulta va a la BD
+    app.start()
+    app.handle_login("admin_root", "SuperPass@25")
+    try:
+        print(f"Escala {args.scale}: mediana de {args.rounds} rondas por filtro")
+        for section in SECTION_FILTERS:
+            app.handle_select_section(section)
+            for label, change in (("render completo", full_render), ("handle_filter_change", AppController.handle_filter_change)):
+                ms, size, commands = measure(app, section, change, args.rounds)
+                print(f"  {section:<10} {label:<21} {ms:>7.2f} ms  {size:>9,.0f} B  {commands:>6.1f} comandos")
+            app.handle_back(None)
+    finally:
+        app.model.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# benchmarks/bench_import.py
+"""
+Throughput de importer.py frente a un executemany "ingenuo" que deja que los
+triggers por fila (FTS, acumulados, versiones) hagan el mantenimiento.
+
+Genera un CSV sintético de ventas (y otro de catálogo) y lo carga sobre una
+copia de la BD de benchmarks, así que la original no se toca.
+
+    python benchmarks/bench_import.py --rows 300000 --scale 1
+"""
+import argparse
+import csv
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import importer
+from benchmarks.run_benchmarks import DEFAULT_DB_DIR, ensure_database
+from model import AppModel
+
+
+def write_sales_csv(path, rows, cashiers, seed):
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["cashier", "amount", "items", "payment", "customer", "status", "sold_at"])
+        for i in range(rows):
+            writer.writerow([
+                rng.choice(cashiers), f"{rng.uniform(1, 300):.2f}", rng.randint(1, 20),
+                rng.choice(("Efectivo", "Tarjeta")), f"Cliente {i % 5000}",
+                rng.choice(("completed",) * 8 + ("pending", "refunded")),
+                f"2025-10-{rng.randint(1, 28):02d} {rng.randint(8, 21):02d}:{rng.randint(0, 59):02d}",
+            ])
+
+
+def write_inventory_csv(path, rows, existing_skus, seed):
+    """Una décima parte actualiza productos existentes; el resto son nuevos."""
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["sku", "name", "stock", "min_stock", "price", "category"])
+        for i in range(rows):
+            sku = rng.choice(existing_skus) if i % 10 == 0 else f"IMP-{i:07d}"
+            writer.writerow([sku, f"Producto {i}", rng.randint(0, 500), rng.randint(5, 50), f"{rng.uniform(0.5, 80):.2f}", "Importado"])
+
+
+def naive_sales_import(db_file, csv_file):
+    """Lo mismo que importer.import_csv('sales') pero con los triggers activos."""
+    model = AppModel(db_file)
+    conn = model.pool.get()
+    conn.set_trace_callback(None)
+    errors = []
+    start = time.perf_counter()
+    with open(csv_file, encoding="utf-8", newline="") as f:
+        columns, rows = importer.read_rows(f, importer.SALES_COLUMNS, errors)
+        columns, complete = importer._prepare_sales(columns)
+        if complete is not None:
+            rows = map(complete, rows)
+        insert = f"INSERT INTO sales ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+        count = 0
+        for chunk in importer._chunks(rows, importer.IMPORT_CHUNK_SIZE):
+            with conn:
+                conn.executemany(insert, chunk)
+            count += len(chunk)
+    seconds = time.perf_counter() - start
+    model.close()
+    return count / seconds
+
+
+def run(table, db_file, csv_file):
+    model = AppModel(db_file)
+    result = importer.import_csv(model, table, csv_file)
+    model.close()
+    return result["rows_per_sec"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de la importación masiva de CSV.")
+    parser.add_argument("--rows", type=int, default=300_000)
+    parser.add_argument("--scale", type=int, default=1, help="Escala de la BD de partida.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db-dir", default=DEFAULT_DB_DIR)
+    args = parser.parse_args(argv)
+
+    source = ensure_database(args.scale, args.db_dir, args.seed)
+    model = AppModel(source)
+    cashiers = [c.name for c in model.get_cashiers()]
+    skus = [p.sku for p in model.get_inventory()]
+    model.close()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sales_csv = os.path.join(tmp, "sales.csv")
+        inventory_csv = os.path.join(tmp, "inventory.csv")
+        write_sales_csv(sales_csv, args.rows, cashiers, args.seed)
+        write_inventory_csv(inventory_csv, args.rows, skus, args.seed)
+
+        def fresh_copy():
+            db_file = os.path.join(tmp, "import.db")
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(db_file + suffix):
+                    os.remove(db_file + suffix)
+            shutil.copy(source, db_file)
+            return db_file
+
+        print(f"{args.rows:,} filas sobre la BD de escala {args.scale}")
+        print(f"  sales, triggers por fila      {naive_sales_import(fresh_copy(), sales_csv):>10,.0f} filas/s")
+        print(f"  sales, importer.py            {run('sales', fresh_copy(), sales_csv):>10,.0f} filas/s")
+        print(f"  inventory (upsert), importer  {run('inventory', fresh_copy(), inventory_csv):>10,.0f} filas/s")
+
+
+if __name__ == "__main__":
+    main()
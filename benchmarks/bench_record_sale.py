@@ -0,0 +1,160 @@
+# benchmarks/bench_record_sale.py
+"""
+Ventas por segundo que aguanta un solo archivo SQLite con varias cajas a la vez.
+
+Compara tres formas de escribir, cada una sobre su propia copia de la BD de
+benchmarks (la original no se toca):
+
+  - una transacción por venta: cada caja con su conexión, BEGIN IMMEDIATE ...
+    COMMIT por venta, compitiendo por el bloqueo de escritura (busy_timeout);
+  - AppModel.record_sale: cada caja espera a que se confirme su venta; las
+    que llegan mientras se escribe un grupo van juntas en el siguiente COMMIT;
+  - AppModel.submit_sale: las cajas encolan sin esperar (la cola acotada las
+    frena si el escritor no da abasto) y se espera a todas al final.
+
+Cada venta lleva entre 1 y 5 líneas de productos al azar.
+
+    python benchmarks/bench_record_sale.py --scale 1 --terminals 8 --sales 2000
+"""
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.run_benchmarks import DEFAULT_DB_DIR, ensure_database, percentile
+from model import AppModel, CONNECTION_PRAGMAS
+
+
+def make_sales(count, cashiers, skus, seed):
+    rng = random.Random(seed)
+    return [
+        (rng.choice(cashiers), [(rng.choice(skus), rng.randint(1, 3)) for _ in range(rng.randint(1, 5))],
+         rng.choice(("Efectivo", "Tarjeta")), f"Cliente {rng.randint(1, 5000)}")
+        for _ in range(count)
+    ]
+
+
+def run_terminals(sales_per_terminal, work):
+    """Lanza una caja (hilo) por lista de ventas; devuelve (segundos, latencias en ms)."""
+    latencies = []
+    lock = threading.Lock()
+
+    def terminal(sales):
+        mine = []
+        for sale in sales:
+            t = time.perf_counter()
+            work(sale)
+            mine.append((time.perf_counter() - t) * 1000)
+        with lock:
+            latencies.extend(mine)
+
+    threads = [threading.Thread(target=terminal, args=(sales,)) for sales in sales_per_terminal]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start, sorted(latencies)
+
+
+def insert_sale(conn, cashier, lines, payment, customer):
+    """La venta escrita línea a línea, como lo haría cada caja por su cuenta."""
+    total = 0.0
+    for sku, quantity in lines:
+        product_id, price = conn.execute("SELECT id, price FROM inventory WHERE sku = ?", (sku,)).fetchone()
+        conn.execute("UPDATE inventory SET stock = stock - ? WHERE id = ?", (quantity, product_id))
+        total += price * quantity
+    conn.execute("UPDATE cashiers SET sales = sales + 1 WHERE name = ?", (cashier,))
+    conn.execute(
+        "INSERT INTO sales (cashier, amount, items, time, payment, customer, status, sold_at) "
+        "VALUES (?, ?, ?, strftime('%H:%M', 'now', 'localtime'), ?, ?, 'completed', unixepoch())",
+        (cashier, round(total, 2), sum(q for _, q in lines), payment, customer),
+    )
+
+
+def transaction_per_sale(db_file, sales_per_terminal):
+    local = threading.local()
+
+    def work(sale):
+        conn = getattr(local, "conn", None)
+        if conn is None:
+            conn = local.conn = sqlite3.connect(db_file)
+            for pragma in CONNECTION_PRAGMAS:
+                conn.execute(pragma)
+        conn.isolation_level = None
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            insert_sale(conn, *sale)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    return run_terminals(sales_per_terminal, work)
+
+
+def record_sale(db_file, sales_per_terminal):
+    model = AppModel(db_file)
+    model.get_dashboard_stats()  # conexión y migraciones fuera de la medida
+    try:
+        return run_terminals(sales_per_terminal, lambda sale: model.record_sale(*sale)) + (model.sales_writer.stats(),)
+    finally:
+        model.close()
+
+
+def submit_sale(db_file, sales_per_terminal):
+    model = AppModel(db_file)
+    model.get_dashboard_stats()
+    futures = []
+    try:
+        elapsed, latencies = run_terminals(sales_per_terminal, lambda sale: futures.append(model.submit_sale(*sale)))
+        start = time.perf_counter()
+        for future in futures:
+            future.result()
+        return elapsed + time.perf_counter() - start, latencies, model.sales_writer.stats()
+    finally:
+        model.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Throughput de record_sale (group commit) frente a una transacción por venta.")
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--terminals", type=int, default=8, help="Cajas (hilos) escribiendo a la vez.")
+    parser.add_argument("--sales", type=int, default=2000, help="Ventas por caja.")
+    parser.add_argument("--db-dir", default=DEFAULT_DB_DIR)
+    args = parser.parse_args(argv)
+
+    source = ensure_database(args.scale, args.db_dir, args.seed)
+    model = AppModel(source)
+    cashiers = [c.name for c in model.get_cashiers()]
+    skus = [p.sku for p in model.get_inventory()]
+    model.close()
+    sales_per_terminal = [make_sales(args.sales, cashiers, skus, args.seed + i) for i in range(args.terminals)]
+    total = args.terminals * args.sales
+
+    print(f"Escala {args.scale}: {args.terminals} cajas x {args.sales} ventas")
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, run in (("una transacción por venta", transaction_per_sale),
+                           ("record_sale (group commit)", record_sale),
+                           ("submit_sale (sin esperar)", submit_sale)):
+            db_file = os.path.join(tmp, f"{run.__name__}.db")
+            shutil.copy(source, db_file)
+            elapsed, latencies, *stats = run(db_file, sales_per_terminal)
+            extra = ""
+            if stats:
+                extra = f"  (grupos de {stats[0]['avg_group']} ventas de media, máx. {stats[0]['largest_group']})"
+            print(f"  {label:<27} {total / elapsed:>8,.0f} ventas/s  p50 {percentile(latencies, 50):>7.2f} ms  "
+                  f"p99 {percentile(latencies, 99):>7.2f} ms{extra}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# benchmarks/bench_records.py
+"""
+Memoria y velocidad de los registros de model.record_maker frente a sqlite3.Row.
+
+Crea una tabla de ventas con N filas (1M por defecto) en una BD temporal y,
+para cada forma de leerla, mide el tiempo de fetchall, la memoria que ocupan
+las filas (tracemalloc) y el tiempo de leer campos por nombre como hace la
+vista (status, amount, cashier, customer, id).
+
+    python benchmarks/bench_records.py --rows 1000000
+"""
+import argparse
+import gc
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from model import AppModel
+
+QUERY = "SELECT * FROM sales"
+
+
+def create_sales(db_file, rows):
+    conn = sqlite3.connect(db_file)
+    conn.executescript(f"""
+        CREATE TABLE sales (
+            id INTEGER PRIMARY KEY, cashier TEXT NOT NULL, amount REAL NOT NULL, items INTEGER,
+            time TEXT, payment TEXT, customer TEXT, status TEXT, sold_at INTEGER
+        );
+        WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {rows})
+        INSERT INTO sales
+        SELECT i, 'Caja ' || (i % 20), (i % 30000) / 100.0, i % 15, '10:30', 'Tarjeta',
+               'Cliente ' || (i % 5000), CASE i % 10 WHEN 0 THEN 'pending' WHEN 1 THEN 'refunded' ELSE 'completed' END,
+               1760000000 + i
+        FROM n;
+    """)
+    conn.close()
+
+
+def fetch_rows(conn):
+    conn.row_factory = sqlite3.Row
+    return conn.execute(QUERY).fetchall()
+
+
+def fetch_records(conn):
+    return AppModel._fetch_records(conn, "sales", QUERY)
+
+
+def read_rows(rows):
+    total = 0.0
+    for s in rows:
+        if s["status"] == "completed":
+            total += s["amount"]
+        _ = (s["cashier"], s["customer"], s["id"])
+    return total
+
+
+def read_records(rows):
+    total = 0.0
+    for s in rows:
+        if s.status == "completed":
+            total += s.amount
+        _ = (s.cashier, s.customer, s.id)
+    return total
+
+
+def measure(name, conn, fetch, read):
+    gc.collect()
+    start = time.perf_counter()
+    rows = fetch(conn)
+    fetch_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    read(rows)
+    read_s = time.perf_counter() - start
+    del rows
+    gc.collect()
+
+    # Memoria retenida por la lista de filas (aparte, porque tracemalloc ralentiza)
+    tracemalloc.start()
+    rows = fetch(conn)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    count = len(rows)
+    del rows
+
+    print(f"  {name:<14} fetchall {fetch_s:>6.2f} s   lectura {read_s:>6.2f} s   "
+          f"{retained / 1e6:>8.1f} MB  ({retained / count:>5.0f} B/fila)")
+    return retained
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Registros compactos frente a sqlite3.Row.")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = os.path.join(tmp, "records.db")
+        create_sales(db_file, args.rows)
+        conn = sqlite3.connect(db_file)
+        print(f"{args.rows:,} ventas")
+        row_bytes = measure("sqlite3.Row", conn, fetch_rows, read_rows)
+        record_bytes = measure("registros", conn, fetch_records, read_records)
+        print(f"  memoria: {100 * (1 - record_bytes / row_bytes):.0f}% menos")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
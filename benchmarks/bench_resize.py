@@ -0,0 +1,78 @@
+# benchmarks/bench_resize.py
+"""
+Una ráfaga de eventos de resize (arrastrar la ventana): un render() por
+evento, como se hacía antes, frente a AppController.handle_resize, que los
+agrupa y solo recoloca la vista al final (o cada RESIZE_MAX_WAIT_SECONDS).
+
+Se mide sobre la página falsa de stub_page, en la sección de ventas:
+tiempo ocupado en el manejador, llamadas al modelo y bytes enviados.
+
+    python benchmarks/bench_resize.py --scale 1 --events 60 --interval 0.016
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.run_benchmarks import DEFAULT_DB_DIR, ensure_database
+from benchmarks.stub_page import make_stub_page
+from main import RESIZE_DEBOUNCE_SECONDS, AppController
+from model import AppModel
+
+
+def model_calls(model):
+    return sum(method["calls"] for method in model.get_query_metrics()["methods"].values())
+
+
+def drag(app, handler, events, interval):
+    """Lanza 'events' eventos de resize separados 'interval' segundos; devuelve los ms ocupados en el manejador."""
+    busy = 0.0
+    for _ in range(events):
+        start = time.perf_counter()
+        handler(None)
+        elapsed = time.perf_counter() - start
+        busy += elapsed
+        time.sleep(max(0.0, interval - elapsed))
+    return busy * 1000
+
+
+def run(app, label, handler, events, interval):
+    conn = app.page.stub_connection
+    conn.reset_counters()
+    calls = model_calls(app.model)
+    relayouts = app.relayouts
+    busy_ms = drag(app, handler, events, interval)
+    time.sleep(RESIZE_DEBOUNCE_SECONDS * 2)  # que llegue el relayout final
+    print(f"  {label:<22} {busy_ms:>8.1f} ms en el manejador  {model_calls(app.model) - calls:>4} llamadas al modelo  "
+          f"{app.relayouts - relayouts:>3} relayouts  {conn.bytes_sent:>10,} B")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ráfaga de resize: render por evento frente a relayout agrupado.")
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--events", type=int, default=60)
+    parser.add_argument("--interval", type=float, default=0.016, help="Segundos entre eventos (60 Hz por defecto).")
+    parser.add_argument("--db-dir", default=DEFAULT_DB_DIR)
+    args = parser.parse_args(argv)
+
+    page = make_stub_page()
+    app = AppController(page, AppModel(ensure_database(args.scale, args.db_dir, args.seed)))
+    app.model.cache = None  # como en run_benchmarks: cada consulta va a la BD
+    app.start()
+    app.handle_login("admin_root", "SuperPass@25")
+    app.handle_select_section("sales")
+    try:
+        print(f"Escala {args.scale}: {args.events} eventos de resize cada {args.interval * 1000:g} ms (sección de ventas)")
+        run(app, "render() por evento", lambda e: app.render(), args.events, args.interval)
+        run(app, "handle_resize", app.handle_resize, args.events, args.interval)
+        print(f"  resize_stats: {app.resize_stats()}")
+    finally:
+        app.model.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+# benchmarks/bench_sessions.py
+"""
+Muchas sesiones web a la vez (cada una con su página de stub_page y su
+AppController): un AppModel por sesión, como antes, frente al modelo
+compartido del proceso (model.shared_model).
+
+  - Memoria por sesión: cada sesión inicia sesión como admin y abre el
+    dashboard y la sección de ventas. Se mide con tracemalloc (objetos de
+    Python) y con la memoria residente del proceso, que además incluye la
+    caché de páginas de cada conexión SQLite.
+  - Consultas: todas las sesiones abren el dashboard a la vez justo después
+    de una venta (la caché ya no vale). Con el modelo compartido la consulta
+    se hace una vez y las demás sesiones esperan su resultado.
+
+Cada modo se ejecuta en un proceso aparte para que no se mezcle su memoria.
+
+    python benchmarks/bench_sessions.py --sessions 50 --scale 1
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.run_benchmarks import DEFAULT_DB_DIR, ensure_database
+
+MODES = ("por sesión", "compartido")
+
+
+def rss_kb():
+    """Memoria residente del proceso (Linux); 0 si no se puede leer."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError):
+        return 0
+
+
+def db_queries(models):
+    """Sentencias ejecutadas, sin contar las comprobaciones de versión de la caché."""
+    total = 0
+    for model in models:
+        for sql, timing in model.get_query_metrics()["statements"].items():
+            if not sql.startswith("PRAGMA") and "FROM table_versions" not in sql:
+                total += timing["calls"]
+    return total
+
+
+def run_mode(mode, db_file, sessions):
+    from benchmarks.stub_page import make_stub_page
+    from main import AppController
+    from model import AppModel, shared_model
+
+    def new_session():
+        model = shared_model(db_file) if mode == "compartido" else AppModel(db_file)
+        app = AppController(make_stub_page(), model)
+        app.start()
+        app.handle_login("admin_root", "SuperPass@25")
+        app.handle_select_section("sales")
+        app.handle_back(None)
+        return app
+
+    new_session().close()  # imports, migraciones y primera carga fuera de la medida
+    tracemalloc.start()
+    python_before, rss_before = tracemalloc.get_traced_memory()[0], rss_kb()
+    apps = [new_session() for _ in range(sessions)]
+    python_kb = (tracemalloc.get_traced_memory()[0] - python_before) / 1024 / sessions
+    rss_per_session = (rss_kb() - rss_before) / sessions
+    tracemalloc.stop()
+
+    models = list({id(app.model): app.model for app in apps}.values())
+    cashier = apps[0].model.get_cashiers()[0].name
+    sku = apps[0].model.get_inventory()[0].sku
+    apps[0].model.record_sale(cashier, [(sku, 1)])  # invalida la caché del dashboard
+    queries_before = db_queries(models)
+    barrier = threading.Barrier(sessions)
+
+    def open_dashboard(app):
+        barrier.wait()
+        app.render()
+
+    threads = [threading.Thread(target=open_dashboard, args=(app,)) for app in apps]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    print(f"  {mode:<11} {python_kb:>8,.0f} KB/sesión (Python)  {rss_per_session:>8,.0f} KB/sesión (RSS)  "
+          f"dashboard a la vez: {db_queries(models) - queries_before:>3} consultas, {elapsed_ms:>6.0f} ms")
+    for app in apps:
+        app.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Memoria y consultas por sesión: modelo por sesión frente a compartido.")
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db-dir", default=DEFAULT_DB_DIR)
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)  # proceso hijo
+    parser.add_argument("--db", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.mode:
+        run_mode(args.mode, args.db, args.sessions)
+        return
+
+    source = ensure_database(args.scale, args.db_dir, args.seed)
+    print(f"{args.sessions} sesiones, escala {args.scale}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in MODES:
+            db_file = os.path.join(tmp, "sessions.db")
+            shutil.copy(source, db_file)  # la venta de prueba no toca la BD de benchmarks
+            subprocess.run([sys.executable, os.path.abspath(__file__), "--mode", mode, "--db", db_file,
+                            "--sessions", str(args.sessions)], cwd=tmp, check=True)
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(db_file + suffix):
+                    os.remove(db_file + suffix)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# benchmarks/bench_snapshot.py
+"""
+Lecturas del dashboard con y sin la copia en memoria (AppModel(read_snapshot=True))
+mientras otra conexión escribe ventas sin parar, como harían las cajas.
+
+Para cada modo mide la latencia de get_dashboard_stats y get_sales_stats
+(con la caché de lecturas activa, como en la app) y cuántas escrituras
+hizo el "cajero" en ese tiempo. Trabaja sobre una copia de la BD de benchmarks.
+
+    python benchmarks/bench_snapshot.py --scale 10 --seconds 10 --write-every-ms 5
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.run_benchmarks import DEFAULT_DB_DIR, ensure_database, percentile
+from model import AppModel
+
+
+def cashier(db_file, stop, pause, counter):
+    """Inserta una venta por transacción, con una pausa entre ventas."""
+    conn = sqlite3.connect(db_file, isolation_level=None)
+    conn.execute("PRAGMA busy_timeout = 5000")
+    while not stop.is_set():
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("INSERT INTO sales (cashier, amount, items, time, payment, customer, status, sold_at) "
+                     "VALUES ('Caja 01', 12.5, 3, strftime('%H:%M', 'now', 'localtime'), 'Tarjeta', 'Cliente', 'completed', unixepoch())")
+        conn.execute("COMMIT")
+        counter[0] += 1
+        time.sleep(pause)
+    conn.close()
+
+
+def run(db_file, read_snapshot, seconds, pause):
+    model = AppModel(db_file, read_snapshot=read_snapshot)
+    model.get_dashboard_stats()  # conexión, migraciones y (si toca) primera copia fuera de la medida
+
+    stop, writes = threading.Event(), [0]
+    writer = threading.Thread(target=cashier, args=(db_file, stop, pause, writes))
+    writer.start()
+    latencies = []
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        t = time.perf_counter()
+        model.get_dashboard_stats()
+        model.get_sales_stats()
+        latencies.append((time.perf_counter() - t) * 1000)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    writer.join()
+
+    latencies.sort()
+    snapshot = model.snapshot.stats() if model.snapshot else None
+    model.close()
+    return {
+        "p50_ms": percentile(latencies, 50),
+        "p99_ms": percentile(latencies, 99),
+        "reads": len(latencies),
+        "writes_per_s": writes[0] / elapsed,
+        "snapshot": snapshot,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lecturas desde la copia en memoria frente al disco, con escrituras concurrentes.")
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--seconds", type=float, default=10.0, help="Duración de cada modo.")
+    parser.add_argument("--write-every-ms", type=float, default=5.0)
+    parser.add_argument("--db-dir", default=DEFAULT_DB_DIR)
+    args = parser.parse_args(argv)
+
+    source = ensure_database(args.scale, args.db_dir, args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"Escala {args.scale}, una venta cada {args.write_every_ms} ms, {args.seconds:g} s de lecturas (dashboard + ventas)")
+        for label, read_snapshot in (("disco", False), ("copia en memoria", True)):
+            db_file = os.path.join(tmp, f"snapshot_{read_snapshot}.db")
+            shutil.copy(source, db_file)
+            r = run(db_file, read_snapshot, args.seconds, args.write_every_ms / 1000)
+            extra = ""
+            if r["snapshot"]:
+                extra = f"  ({r['snapshot']['refreshes']} refrescos, último {r['snapshot']['last_refresh_ms']:.1f} ms)"
+            print(f"  {label:<18} p50 {r['p50_ms']:>8.3f} ms  p99 {r['p99_ms']:>8.3f} ms  {r['reads']:>7} lecturas  {r['writes_per_s']:>5.0f} escrituras/s{extra}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# benchmarks/bench_stats_scans.py
+"""
+Compara cuántas sentencias y recorridos de tabla hace cada método get_*_stats
+antes (una consulta por cifra) y después (una sentencia agregada por método).
+
+Uso:
+    python benchmarks/bench_stats_scans.py [ruta/a/supermarket.db] [repeticiones]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model import AppModel
+
+# --- Consultas originales (una por cifra) para comparar ---
+LEGACY_QUERIES = {
+    "get_dashboard_stats": [
+        "SELECT COUNT(*) FROM maintenance_tasks",
+        "SELECT COUNT(*) FROM cashiers",
+        "SELECT COUNT(*) FROM sales",
+        "SELECT COUNT(*) FROM inventory WHERE stock <= min_stock",
+        "SELECT growth FROM month_stats",
+    ],
+    "get_cashier_stats": [
+        "SELECT status, COUNT(*) as count FROM cashiers GROUP BY status",
+        "SELECT SUM(sales) FROM cashiers",
+    ],
+    "get_maintenance_stats": [
+        "SELECT COUNT(*) FROM maintenance_tasks",
+        "SELECT COUNT(*) FROM maintenance_tasks WHERE priority = 'high'",
+        "SELECT AVG(estimated_days) FROM maintenance_tasks",
+    ],
+    "get_inventory_stats": [
+        "SELECT COUNT(*) FROM inventory",
+        "SELECT COUNT(*) FROM inventory WHERE stock <= min_stock",
+        "SELECT COUNT(*) FROM inventory WHERE stock > min_stock * 2",
+        "SELECT SUM(stock * price) FROM inventory",
+        "SELECT SUM(stock) FROM inventory",
+    ],
+}
+
+
+def count_scans(conn, statements):
+    """Cuenta los 'SCAN <tabla>' del plan de consulta de cada sentencia."""
+    scans = 0
+    for sql in statements:
+        for row in conn.execute("EXPLAIN QUERY PLAN " + sql):
+            if row["detail"].startswith("SCAN") and row["detail"] != "SCAN CONSTANT ROW":
+                scans += 1
+    return scans
+
+
+def capture_statements(model, method_name):
+    """Ejecuta un método del modelo y devuelve las sentencias que lanzó."""
+    conn = model._connect_db()
+    executed = []
+    conn.set_trace_callback(lambda sql: executed.append(sql) if not sql.startswith("EXPLAIN") else None)
+    try:
+        getattr(model, method_name)()
+    finally:
+        conn.set_trace_callback(None)
+    return executed
+
+
+def time_it(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    db_file = sys.argv[1] if len(sys.argv) > 1 else "supermarket.db"
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    model = AppModel(db_file)
+    conn = model._connect_db()
+
+    print(f"BD: {db_file} ({repeat} repeticiones)\n")
+    print(f"{'método':<24}{'sent. antes':>12}{'scans antes':>12}{'ms antes':>10}"
+          f"{'sent. ahora':>12}{'scans ahora':>12}{'ms ahora':>10}")
+    for method_name, legacy in LEGACY_QUERIES.items():
+        current = capture_statements(model, method_name)
+
+        legacy_ms = time_it(lambda: [conn.execute(sql).fetchall() for sql in legacy], repeat)
+        current_ms = time_it(getattr(model, method_name), repeat)
+
+        print(f"{method_name:<24}{len(legacy):>12}{count_scans(conn, legacy):>12}{legacy_ms:>10.3f}"
+              f"{len(current):>12}{count_scans(conn, current):>12}{current_ms:>10.3f}")
+
+    model.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+# benchmarks/run_benchmarks.py
+"""
+Suite de benchmarks de AppModel y AppController.
+
+Genera (o reutiliza) BDs sintéticas de varios tamaños con database_setup.py,
+mide cada operación caliente y guarda p50/p95/p99, throughput y pico de
+memoria en un JSON que se puede comparar entre commits.
+
+Uso:
+    python benchmarks/run_benchmarks.py --scales 1,10,50 --output bench.json
+    python benchmarks/run_benchmarks.py --compare antes.json despues.json
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import database_setup
+from model import AppModel
+
+DEFAULT_SCALES = "1,10"
+DEFAULT_DB_DIR = os.path.join(ROOT, "benchmarks", "data")
+
+
+# ============================================================================
+# MEDICIÓN
+# ============================================================================
+
+def percentile(sorted_values, pct):
+    """Percentil con interpolación lineal sobre una lista ya ordenada."""
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100
+    low = int(k)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (k - low)
+
+
+def measure(name, fn, repeat, warmup=2):
+    """
+    Ejecuta fn 'repeat' veces y devuelve latencias (ms), throughput (op/s)
+    y el pico de memoria (KB) de una ejecución adicional bajo tracemalloc.
+    """
+    for _ in range(warmup):
+        fn()
+
+    latencies = []
+    total_start = time.perf_counter()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    total = time.perf_counter() - total_start
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "operation": name,
+        "runs": repeat,
+        "p50_ms": round(percentile(latencies, 50), 4),
+        "p95_ms": round(percentile(latencies, 95), 4),
+        "p99_ms": round(percentile(latencies, 99), 4),
+        "mean_ms": round(statistics.fmean(latencies), 4),
+        "throughput_ops": round(repeat / total, 1) if total else 0.0,
+        "peak_memory_kb": round(peak / 1024, 1),
+    }
+
+
+# ============================================================================
+# OPERACIONES
+# ============================================================================
+
+def model_operations(model):
+    """Operaciones del modelo a medir: (nombre, función sin argumentos)."""
+    first_page, next_key = model.get_sales_page()
+    return [
+        ("authenticate", lambda: model.authenticate("admin_root", "SuperPass@25")),
+        ("get_dashboard_stats", model.get_dashboard_stats),
+        ("get_cashier_stats", model.get_cashier_stats),
+        ("get_maintenance_stats", model.get_maintenance_stats),
+        ("get_inventory_stats", model.get_inventory_stats),
+        ("get_sales_stats", model.get_sales_stats),
+        ("get_earnings_data", model.get_earnings_data),
+        ("get_sales_analytics", model.get_sales_analytics),
+        ("get_cashiers", model.get_cashiers),
+        ("get_maintenance_tasks", model.get_maintenance_tasks),
+        ("get_inventory", model.get_inventory),
+        ("get_inventory[search]", lambda: model.get_inventory("all", "leche")),
+        ("get_inventory_page", model.get_inventory_page),
+        ("get_sales", model.get_sales),
+        ("get_sales[search]", lambda: model.get_sales("all", "vip")),
+        ("get_sales_page", model.get_sales_page),
+        ("get_sales_page[next]", lambda: model.get_sales_page(after_key=next_key)),
+        ("get_sales_page[search]", lambda: model.get_sales_page("all", "caja 0")),
+    ]
+
+
+def controller_operations(db_file, use_snapshot=False):
+    """
+    Renders completos de AppController sobre una página falsa (sin cliente).
+    Devuelve [] si Flet no está instalado.
+    """
+    try:
+        from benchmarks.stub_page import make_stub_page
+        from main import AppController
+    except ImportError as e:
+        print(f"  (se omiten los benchmarks del controlador: {e})")
+        return []
+
+    page = make_stub_page()
+    app = AppController(page, AppModel(db_file, read_snapshot=use_snapshot))
+    app.model.cache = None
+    app.start()
+    app.handle_login("admin_root", "SuperPass@25")
+
+    def render_section(section):
+        def run():
+            app.current_section = section
+            app.active_filter = "all"
+            app.search_query = ""
+            app.render()
+        return run
+
+    operations = [(f"render[{section or 'dashboard'}]", render_section(section))
+                  for section in (None, "cashiers", "sales", "inventory", "maintenance", "earnings")]
+
+    def navigate_cashiers():
+        app.current_section = None
+        app.handle_select_section("cashiers")
+        app.handle_back(None)
+    operations.append(("navigate[dashboard<->cashiers]", navigate_cashiers))
+
+    def change_filter(section, filters):
+        cycle = itertools.cycle(filters)
+
+        def run():
+            if app.current_section != section:
+                app.handle_select_section(section)
+            app.handle_filter_change(section, next(cycle))
+        return run
+    operations.append(("filter[sales]", change_filter("sales", ("completed", "all"))))
+    operations.append(("filter[inventory]", change_filter("inventory", ("low", "all"))))
+
+    def search_sales():
+        app.current_section = "sales"
+        app.search_query = "vip"
+        app.update_dynamic_list("sales")
+    operations.append(("update_dynamic_list[sales search]", search_sales))
+    return operations
+
+
+# ============================================================================
+# EJECUCIÓN
+# ============================================================================
+
+def ensure_database(scale, db_dir, seed):
+    """Genera la BD de esa escala si no existe (se reutiliza entre ejecuciones)."""
+    os.makedirs(db_dir, exist_ok=True)
+    db_file = os.path.join(db_dir, f"bench_scale{scale}_seed{seed}.db")
+    if not os.path.exists(db_file):
+        print(f"Generando BD de escala {scale}...")
+        database_setup.setup_database(db_file, scale, seed)
+    return db_file
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(scales, repeat, db_dir, seed, use_cache, use_snapshot=False):
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "cache": use_cache,
+            "snapshot": use_snapshot,
+        },
+        "runs": [],
+    }
+    for scale in scales:
+        db_file = ensure_database(scale, db_dir, seed)
+        print(f"\n== Escala {scale} ({os.path.getsize(db_file) / 1e6:,.1f} MB) ==")
+        model = AppModel(db_file, read_snapshot=use_snapshot)
+        if not use_cache:
+            model.cache = None
+
+        operations = model_operations(model) + controller_operations(db_file, use_snapshot)
+        for name, fn in operations:
+            result = measure(name, fn, repeat)
+            result["scale"] = scale
+            results["runs"].append(result)
+            print(f"  {name:<36} p50 {result['p50_ms']:>9.3f} ms  p95 {result['p95_ms']:>9.3f} ms  "
+                  f"p99 {result['p99_ms']:>9.3f} ms  {result['throughput_ops']:>9.1f} op/s  {result['peak_memory_kb']:>9.1f} KB")
+        model.close()
+    return results
+
+
+def compare(old_file, new_file):
+    """Muestra la variación de p50/p95 por operación y escala entre dos ejecuciones."""
+    with open(old_file, encoding="utf-8") as f:
+        old = {(r["scale"], r["operation"]): r for r in json.load(f)["runs"]}
+    with open(new_file, encoding="utf-8") as f:
+        new = json.load(f)["runs"]
+
+    print(f"{'escala':>6}  {'operación':<36}{'p50 antes':>11}{'p50 ahora':>11}{'Δ%':>8}{'p95 antes':>11}{'p95 ahora':>11}{'Δ%':>8}")
+    for r in new:
+        before = old.get((r["scale"], r["operation"]))
+        if before is None:
+            continue
+        d50 = (r["p50_ms"] / before["p50_ms"] - 1) * 100 if before["p50_ms"] else 0
+        d95 = (r["p95_ms"] / before["p95_ms"] - 1) * 100 if before["p95_ms"] else 0
+        print(f"{r['scale']:>6}  {r['operation']:<36}{before['p50_ms']:>11.3f}{r['p50_ms']:>11.3f}{d50:>+8.1f}"
+              f"{before['p95_ms']:>11.3f}{r['p95_ms']:>11.3f}{d95:>+8.1f}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de SuperMarket Pro.")
+    parser.add_argument("--scales", default=DEFAULT_SCALES, help="Escalas de BD separadas por comas (ver database_setup.py --scale).")
+    parser.add_argument("--repeat", type=int, default=30, help="Repeticiones por operación.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db-dir", default=DEFAULT_DB_DIR, help="Dónde guardar/reutilizar las BDs generadas.")
+    parser.add_argument("--cache", action="store_true", help="Medir con la caché de lecturas activada.")
+    parser.add_argument("--snapshot", action="store_true", help="Leer desde la copia en memoria de la BD (ver ReadSnapshot).")
+    parser.add_argument("--output", help="Archivo JSON donde guardar los resultados.")
+    parser.add_argument("--compare", nargs=2, metavar=("ANTES", "DESPUES"), help="Compara dos JSON de resultados.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    scales = [int(s) for s in args.scales.split(",") if s.strip()]
+    results = run_suite(scales, args.repeat, args.db_dir, args.seed, args.cache, args.snapshot)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\nResultados guardados en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# benchmarks/stub_page.py
+"""
+Página de Flet "sin pantalla" para medir AppController sin abrir la app.
+
+Es un ft.Page real (el diff de controles es el de Flet), pero conectado a
+una conexión falsa que procesa los comandos en memoria en lugar de
+enviarlos a un cliente. Además cuenta cuántos comandos y bytes se habrían
+enviado, que es lo que paga el cliente en cada page.update().
+"""
+import asyncio
+import dataclasses
+import json
+
+import flet as ft
+from flet.core.local_connection import LocalConnection
+from flet.core.protocol import PageCommandResponsePayload, PageCommandsBatchResponsePayload
+
+
+class StubConnection(LocalConnection):
+    """Conexión local que no habla con ningún cliente; solo mide lo que enviaría."""
+    def __init__(self):
+        super().__init__()
+        self.commands_sent = 0
+        self.bytes_sent = 0
+
+    def _measure(self, commands):
+        self.commands_sent += len(commands)
+        self.bytes_sent += len(json.dumps([dataclasses.asdict(c) for c in commands], separators=(",", ":")))
+
+    def send_command(self, session_id, command):
+        self._measure([command])
+        result, _ = self._process_command(command)
+        return PageCommandResponsePayload(result=result, error="")
+
+    def send_commands(self, session_id, commands):
+        self._measure(commands)
+        results = []
+        for command in commands:
+            result, _ = self._process_command(command)
+            if command.name in ("add", "get"):
+                results.append(result)
+        return PageCommandsBatchResponsePayload(results=results, error="")
+
+    def reset_counters(self):
+        self.commands_sent = 0
+        self.bytes_sent = 0
+
+
+def make_stub_page(width=393, height=852):
+    """Crea una página lista para pasársela a AppController."""
+    conn = StubConnection()
+    page = ft.Page(conn, "benchmark", asyncio.new_event_loop())
+    page.window.width = width
+    page.window.height = height
+    page.stub_connection = conn
+    return page
@@ -0,0 +1,138 @@
+# cache.py
+"""
+Caché de resultados de lectura del modelo.
+
+Cada entrada guarda, junto al resultado, la versión de las tablas de las que
+depende (ver la tabla 'table_versions' en schema.py). Si alguna de esas
+tablas cambió desde entonces, la entrada ya no vale y se vuelve a consultar.
+
+Las consultas son "single-flight": si varios hilos piden a la vez la misma
+entrada que no está (p. ej. varias sesiones web abriendo el dashboard justo
+después de una venta), solo el primero consulta la BD y los demás esperan
+su resultado.
+"""
+import functools
+import threading
+from collections import OrderedDict
+
+CACHE_MAX_ENTRIES = 256
+
+
+class QueryCache:
+    """Caché LRU acotada y segura entre hilos, con contadores de aciertos/fallos."""
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # clave -> (versiones de las tablas, resultado)
+        self._lock = threading.Lock()
+        self._in_flight = {}  # (clave, versiones) -> _Flight de la consulta en curso
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.coalesced = 0    # Fallos que esperaron la consulta de otro hilo en vez de repetirla
+
+    def get(self, key, versions):
+        """Devuelve (True, resultado) si hay una entrada válida para esas versiones."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == versions:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, versions, value):
+        with self._lock:
+            self._entries[key] = (versions, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key, versions, compute):
+        """
+        Devuelve el resultado en caché o lo calcula con compute() y lo guarda.
+        Si otro hilo ya está calculando esa misma entrada, espera a que
+        termine y usa su resultado. Un resultado vacío no se comparte (puede
+        ser un error o una consulta cancelada de otro hilo): quien esperaba
+        lo calcula por su cuenta.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == versions:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            flight = self._in_flight.get((key, versions))
+            leader = flight is None
+            if leader:
+                flight = self._in_flight[(key, versions)] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.value:
+                with self._lock:
+                    self.coalesced += 1
+                return flight.value
+            return compute()
+
+        try:
+            flight.value = compute()
+            if flight.value:
+                self.put(key, versions, flight.value)
+            return flight.value
+        finally:
+            with self._lock:
+                del self._in_flight[(key, versions)]
+            flight.done.set()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "coalesced": self.coalesced,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            }
+
+
+class _Flight:
+    """Una consulta en curso de get_or_compute: el resultado y el aviso de que terminó."""
+    __slots__ = ("done", "value")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+
+
+def cached(*tables):
+    """
+    Decorador para los métodos get_* de AppModel.
+    'tables' son las tablas que lee el método: su resultado se reutiliza
+    mientras ninguna de ellas cambie, y las llamadas iguales simultáneas
+    comparten una sola consulta. Los resultados vacíos (que también es lo
+    que devuelven los métodos cuando hay un error) no se guardan.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if self.cache is None:
+                return method(self, *args, **kwargs)
+
+            versions = self._table_versions(tables)
+            if versions is None:
+                return method(self, *args, **kwargs)
+
+            key = (method.__name__, args, tuple(sorted(kwargs.items())))
+            return self.cache.get_or_compute(key, versions, lambda: method(self, *args, **kwargs))
+        return wrapper
+    return decorator
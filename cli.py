@@ -0,0 +1,133 @@
+# cli.py
+"""
+Línea de comandos del modelo, sin interfaz: para scripts, informes de cron
+y comprobaciones de la BD. No importa Flet ni nada de la vista, así que
+arranca en lo que tardan Python y sqlite3.
+
+    python cli.py stats                      # todas las estadísticas
+    python cli.py stats sales inventory --json
+    python cli.py search sales "caja 03" --status completed --limit 10
+    python cli.py export sales --format jsonl --gzip     # mismas opciones que export.py
+    python cli.py check --full               # sale con código 1 si algo falla
+"""
+import argparse
+import json
+import sqlite3
+import sys
+from itertools import islice
+
+from federation import SEARCH_METHODS, STATS_METHODS
+from model import AppModel, DB_FILE
+
+# Filtros de 'search' que acepta cada sección (opción -> argumento <opción>_filter)
+SEARCH_FILTERS = {"sales": ("status",), "inventory": ("stock",), "cashiers": ("status",), "maintenance": ()}
+# Secciones que se pueden leer en streaming: solo se guardan los resultados a mostrar
+STREAM_METHODS = {"sales": "iter_sales", "inventory": "iter_inventory"}
+
+
+def _non_negative_int(value):
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"no puede ser negativo: {value}")
+    return number
+
+
+def parse_args(argv=None):
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--db", default=DB_FILE)
+    common.add_argument("--json", action="store_true", help="Salida en JSON (para otros scripts).")
+    parser = argparse.ArgumentParser(description="Estadísticas, búsquedas, exportación y comprobaciones de la BD sin abrir la app.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    stats = commands.add_parser("stats", parents=[common], help="Estadísticas de la tienda.")
+    stats.add_argument("kinds", nargs="*", metavar="TIPO", help=f"{', '.join(STATS_METHODS)} (por defecto, todas).")
+    search = commands.add_parser("search", parents=[common], help="Busca como la barra de búsqueda de la app.")
+    search.add_argument("section", choices=tuple(SEARCH_METHODS))
+    search.add_argument("query", nargs="?", default="")
+    search.add_argument("--status", help="Filtro de estado (ventas y cajas).")
+    search.add_argument("--stock", choices=("all", "low", "high"), help="Filtro de stock (inventario).")
+    search.add_argument("--limit", type=_non_negative_int, default=20, help="Resultados a mostrar.")
+    commands.add_parser("export", help="Exporta ventas o inventario (mismas opciones que export.py).")
+    check = commands.add_parser("check", parents=[common], help="Comprueba la integridad de la BD.")
+    check.add_argument("--full", action="store_true", help="PRAGMA integrity_check completo (más lento).")
+    args = parser.parse_args(argv)
+    if args.command == "search":
+        allowed = SEARCH_FILTERS[args.section]
+        for option in ("status", "stock"):
+            if getattr(args, option) is not None and option not in allowed:
+                search.error(f"--{option} no se aplica a {args.section}"
+                             + (f" (admite --{', --'.join(allowed)})" if allowed else " (no admite filtros)"))
+    return args
+
+
+def _format_value(value):
+    return f"{value:,}" if isinstance(value, int) else f"{value:,.2f}" if isinstance(value, float) else str(value)
+
+
+def run_stats(model, kinds, as_json):
+    unknown = [kind for kind in kinds if kind not in STATS_METHODS]
+    if unknown:
+        print(f"Estadísticas desconocidas: {', '.join(unknown)} (disponibles: {', '.join(STATS_METHODS)})")
+        return 1
+    stats = {kind: getattr(model, STATS_METHODS[kind])() for kind in kinds or STATS_METHODS}
+    if as_json:
+        print(json.dumps(stats, ensure_ascii=False, default=str))
+    else:
+        for kind, values in stats.items():
+            print(f"{kind}: " + ", ".join(f"{key}={_format_value(value)}" for key, value in values.items()))
+    return 0 if all(values != {} for values in stats.values()) else 1
+
+
+def run_search(model, args):
+    filters = {f"{option}_filter": getattr(args, option) for option in SEARCH_FILTERS[args.section] if getattr(args, option)}
+    try:
+        if args.section in STREAM_METHODS:
+            # Se cuentan todas las filas, pero solo las primeras 'limit' se convierten y se guardan
+            columns, rows = getattr(model, STREAM_METHODS[args.section])(search_query=args.query, **filters)
+            results = [dict(zip(columns, row)) for row in islice(rows, args.limit)]
+            total = len(results) + sum(1 for _ in rows)
+        else:
+            records = getattr(model, SEARCH_METHODS[args.section])(search_query=args.query, **filters)
+            results = [record._asdict() for record in records[:args.limit]]
+            total = len(records)
+    except sqlite3.Error as e:
+        print(f"Error al buscar: {e}")
+        return 1
+    if args.json:
+        print(json.dumps({"total": total, "results": results}, ensure_ascii=False, default=str))
+    else:
+        print(f"{total:,} resultados")
+        for result in results:
+            print("  " + ", ".join(f"{field}={value}" for field, value in result.items()))
+    return 0
+
+
+def run_check(model, full, as_json):
+    results = model.check_integrity(full)
+    if as_json:
+        print(json.dumps(results, ensure_ascii=False))
+    else:
+        for result in results:
+            print(f"  {result['check']:<22} {'OK' if result['ok'] else 'FALLO':<6} {result['detail']}")
+    return 0 if results and all(result["ok"] for result in results) else 1
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["export"]:
+        import export  # csv/gzip solo cuando hacen falta
+        return export.main(argv[1:])
+
+    args = parse_args(argv)
+    model = AppModel(args.db)
+    try:
+        if args.command == "stats":
+            return run_stats(model, args.kinds, args.json)
+        elif args.command == "search":
+            return run_search(model, args)
+        return run_check(model, args.full, args.json)
+    finally:
+        model.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -2,6 +2,15 @@
 import sqlite3
 import os
 import hashlib
+import argparse
+import math
+import random
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+from itertools import chain, islice, repeat
+
+import schema
 
 DB_FILE = "supermarket.db"
 
@@ -84,21 +93,215 @@ SALES_DATA = [
     {"id": 8, "cashier": "Caja 04", "amount": 234.50, "items": 2, "time": "13:20", "payment": "Efectivo", "customer": "Nuevo Cliente", "status": "pending"},
 ]
 
+# ============================================================================
+# GENERADOR DE DATOS SINTÉTICOS (--scale)
+# ============================================================================
+
+# Tamaño por unidad de escala: --scale 100 -> 2M ventas, 30k productos, 3k tareas
+SALES_PER_SCALE = 20_000
+PRODUCTS_PER_SCALE = 300
+TASKS_PER_SCALE = 30
+CASHIERS_PER_10_SCALE = 24
+BATCH_SIZE = 50_000  # Filas por executemany
+
+FIRST_NAMES = ["María", "Juan", "Ana", "Carlos", "Laura", "Roberto", "Patricia", "Diego", "Sofía", "Miguel",
+               "Carmen", "Fernando", "Lucía", "Javier", "Elena", "Pedro", "Isabel", "Andrés", "Valeria", "Pablo"]
+LAST_NAMES = ["González", "Pérez", "Silva", "Ruiz", "Díaz", "Sánchez", "López", "Fernández", "Ramírez", "Torres",
+              "Vargas", "Castro", "Martínez", "Gómez", "Romero", "Herrera", "Morales", "Ortiz", "Jiménez", "Navarro"]
+
+# categoría: (prefijo SKU, productos base, precio mediano, peso en el catálogo)
+PRODUCT_CATEGORIES = {
+    "Abarrotes": ("ABA", ["Arroz", "Frijol", "Azúcar", "Aceite", "Pasta", "Harina", "Sal", "Café"], 3.5, 30),
+    "Lácteos": ("LAC", ["Leche", "Yogur", "Queso", "Mantequilla", "Crema"], 2.8, 12),
+    "Bebidas": ("BEB", ["Agua", "Refresco", "Jugo", "Cerveza", "Vino", "Té frío"], 2.2, 15),
+    "Limpieza": ("LIM", ["Detergente", "Jabón", "Cloro", "Suavizante", "Esponja"], 4.5, 10),
+    "Panadería": ("PAN", ["Pan blanco", "Pan integral", "Galletas", "Pastel", "Tortillas"], 2.0, 8),
+    "Carnes": ("CAR", ["Pollo", "Res", "Cerdo", "Jamón", "Salchicha"], 8.0, 8),
+    "Frutas y Verduras": ("FRV", ["Manzana", "Plátano", "Tomate", "Papa", "Cebolla", "Lechuga"], 1.5, 9),
+    "Electrónica": ("ELE", ["Audífonos", "Cargador", "Cable USB", "Pilas", "Bombilla LED"], 25.0, 5),
+    "Accesorios": ("ACC", ["Mouse", "Teclado", "Funda", "Memoria USB"], 18.0, 3),
+}
+BRANDS = ["Del Valle", "La Costeña", "Nestlé", "Bimbo", "Lala", "Alpura", "Great Value", "Sabritas", "Marca Propia", "Herdez"]
+SIZES = ["250 g", "500 g", "1 kg", "2 kg", "355 ml", "600 ml", "1 L", "2 L", "Pack 6", "Pack 12"]
+
+PAYMENT_WEIGHTS = {"Tarjeta": 58, "Efectivo": 35, "Transferencia": 7}
+CUSTOMER_WEIGHTS = {"Cliente Regular": 70, "Nuevo Cliente": 22, "Cliente VIP": 8}
+STATUS_WEIGHTS = {"completed": 92, "pending": 5, "refunded": 3}
+CASHIER_STATUS_WEIGHTS = {"open": 55, "closed": 25, "maintenance": 20}
+PRIORITY_WEIGHTS = {"high": 25, "medium": 45, "low": 30}
+# Días de historial de ventas (terminan hoy) y afluencia por día de la semana (lunes a domingo)
+SALES_HISTORY_DAYS = 90
+WEEKDAY_WEIGHTS = (100, 110, 104, 115, 134, 163, 91)
+# Afluencia por hora del día (picos al mediodía y a la salida del trabajo)
+HOUR_WEIGHTS = {8: 3, 9: 5, 10: 7, 11: 9, 12: 13, 13: 14, 14: 10, 15: 7, 16: 7, 17: 9, 18: 12, 19: 13, 20: 9, 21: 5}
+
+MAINTENANCE_ISSUES = [(mt["issue"], mt["details"]) for mt in MAINTENANCE_DATA] + [
+    ("Báscula descalibrada", "La báscula de la caja marca un peso incorrecto. Requiere recalibración."),
+    ("Terminal de pago sin conexión", "El datáfono pierde la conexión de red de forma intermitente."),
+    ("Cinta transportadora detenida", "El motor de la cinta no arranca. Revisar fusible y sensor."),
+]
+
+
+class SyntheticDataGenerator:
+    """
+    Genera datos realistas y reproducibles (misma semilla -> misma BD) para una
+    escala dada. Cada método devuelve un iterador de tuplas listas para executemany.
+    Las fechas de las ventas son relativas al día en que se genera.
+    """
+    def __init__(self, scale, seed=42):
+        self.scale = scale
+        self.rng = random.Random(seed)
+        self.num_cashiers = CASHIERS_PER_10_SCALE * max(1, math.ceil(scale / 10))
+        self.num_products = PRODUCTS_PER_SCALE * scale
+        self.num_sales = SALES_PER_SCALE * scale
+        self.num_tasks = TASKS_PER_SCALE * scale
+        self.cashier_names = []
+        self.open_cashiers = []
+        self.maintenance_cashiers = []
+
+    def _person(self):
+        return f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}"
+
+    def cashiers(self):
+        width = max(2, len(str(self.num_cashiers)))
+        statuses = self.rng.choices(list(CASHIER_STATUS_WEIGHTS), weights=list(CASHIER_STATUS_WEIGHTS.values()), k=self.num_cashiers)
+        rows = []
+        for cashier_id, status in enumerate(statuses, start=1):
+            name = f"Caja {cashier_id:0{width}d}"
+            self.cashier_names.append(name)
+            if status == "open":
+                self.open_cashiers.append(name)
+                rows.append((cashier_id, name, status, self._person(), 0))
+            else:
+                if status == "maintenance":
+                    self.maintenance_cashiers.append(cashier_id)
+                rows.append((cashier_id, name, status, None, 0))
+        if not self.maintenance_cashiers:
+            self.maintenance_cashiers.append(1)
+        return rows
+
+    def maintenance_tasks(self):
+        priorities = list(PRIORITY_WEIGHTS)
+        priority_weights = list(PRIORITY_WEIGHTS.values())
+        for _ in range(self.num_tasks):
+            issue, details = self.rng.choice(MAINTENANCE_ISSUES)
+            day = self.rng.randint(1, 28)
+            yield (self.rng.choice(self.maintenance_cashiers), issue, details, self._person(),
+                   f"{day:02d}/10/2025", self.rng.randint(1, 7), self.rng.choices(priorities, priority_weights)[0])
+
+    def inventory(self):
+        categories = list(PRODUCT_CATEGORIES)
+        category_weights = [c[3] for c in PRODUCT_CATEGORIES.values()]
+        for product_id in range(1, self.num_products + 1):
+            category = self.rng.choices(categories, category_weights)[0]
+            prefix, bases, median_price, _ = PRODUCT_CATEGORIES[category]
+            name = f"{self.rng.choice(bases)} {self.rng.choice(BRANDS)} {self.rng.choice(SIZES)}"
+            price = round(median_price * self.rng.lognormvariate(0, 0.5), 2)
+            min_stock = self.rng.randint(5, 50)
+            # ~12% de los productos por debajo del mínimo, el resto con stock holgado
+            if self.rng.random() < 0.12:
+                stock = self.rng.randint(0, min_stock)
+            else:
+                stock = int(min_stock * self.rng.uniform(1.1, 6))
+            yield (product_id, name, f"{prefix}-{product_id:06d}", stock, min_stock, price, category)
+
+    def sales(self):
+        """
+        Ventas en lotes: cada columna se sortea de BATCH_SIZE en BATCH_SIZE con
+        rng.choices (mucho más rápido que sortear fila a fila en Python).
+        Se reparten en los últimos SALES_HISTORY_DAYS días en orden, así que los
+        IDs crecen con la fecha.
+        """
+        rng = self.rng
+        cashiers = self.open_cashiers or self.cashier_names
+        # Unas cajas venden más que otras (distribución de Zipf aproximada)
+        cashier_weights = [1 / (rank + 1) ** 0.6 for rank in range(len(cashiers))]
+        times = [f"{hour:02d}:{minute:02d}" for hour in HOUR_WEIGHTS for minute in range(60)]
+        time_offsets = [hour * 3600 + minute * 60 for hour in HOUR_WEIGHTS for minute in range(60)]
+        time_weights = [weight for weight in HOUR_WEIGHTS.values() for _ in range(60)]
+        # Cuántas ventas tiene cada día (medianoche local en segundos Unix), del más antiguo a hoy
+        today = date.today()
+        days = [today - timedelta(days=offset) for offset in range(SALES_HISTORY_DAYS - 1, -1, -1)]
+        midnights = [int(datetime.combine(day, datetime.min.time()).timestamp()) for day in days]
+        per_day = Counter(rng.choices(range(len(days)), [WEEKDAY_WEIGHTS[day.weekday()] for day in days], k=self.num_sales))
+        sale_days = chain.from_iterable(repeat(midnights[i], per_day[i]) for i in range(len(days)))
+        payments, payment_weights = list(PAYMENT_WEIGHTS), list(PAYMENT_WEIGHTS.values())
+        customers, customer_weights = list(CUSTOMER_WEIGHTS), list(CUSTOMER_WEIGHTS.values())
+        statuses, status_weights = list(STATUS_WEIGHTS), list(STATUS_WEIGHTS.values())
+        # Artículos por ticket: geométrica (muchos tickets pequeños, pocos grandes)
+        item_counts = list(range(1, 61))
+        item_weights = [0.85 ** n for n in item_counts]
+        # Precio medio por artículo: log-normal, muestreado una vez y reutilizado
+        unit_prices = [rng.lognormvariate(3.2, 0.6) for _ in range(8192)]
+
+        next_id = 1
+        remaining = self.num_sales
+        while remaining > 0:
+            k = min(BATCH_SIZE, remaining)
+            items = rng.choices(item_counts, item_weights, k=k)
+            amounts = [round(n * price, 2) for n, price in zip(items, rng.choices(unit_prices, k=k))]
+            time_indexes = rng.choices(range(len(times)), time_weights, k=k)
+            yield from zip(
+                range(next_id, next_id + k),
+                rng.choices(cashiers, cashier_weights, k=k),
+                amounts,
+                items,
+                [times[i] for i in time_indexes],
+                rng.choices(payments, payment_weights, k=k),
+                rng.choices(customers, customer_weights, k=k),
+                rng.choices(statuses, status_weights, k=k),
+                [midnight + time_offsets[i] for midnight, i in zip(islice(sale_days, k), time_indexes)],
+            )
+            next_id += k
+            remaining -= k
+
+
+def insert_in_batches(cursor, sql, rows, batch_size=BATCH_SIZE):
+    """Inserta un iterador de filas con executemany en lotes grandes. Devuelve cuántas insertó."""
+    total = 0
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return total
+        cursor.executemany(sql, batch)
+        total += len(batch)
+
+
+def today_at(hh_mm):
+    """Segundos Unix de hoy a la hora local 'HH:MM'."""
+    return int(datetime.combine(date.today(), datetime.strptime(hh_mm, "%H:%M").time()).timestamp())
+
+
 # --- FUNCIÓN DE HASHING ---
 def hash_password(password):
     """Genera un hash SHA-256 seguro para la contraseña."""
     return hashlib.sha256(password.encode()).hexdigest()
 
 
-def setup_database():
+def setup_database(db_file=DB_FILE, scale=None, seed=42):
+    """
+    Crea la BD desde cero. Sin 'scale' usa los datos de ejemplo; con 'scale'
+    genera datos sintéticos de ese tamaño (ver SyntheticDataGenerator).
+    """
+    start = time.perf_counter()
+    generator = SyntheticDataGenerator(scale, seed) if scale else None
 
-    if os.path.exists(DB_FILE):
-        os.remove(DB_FILE)
-        print(f"Archivo '{DB_FILE}' anterior eliminado.")
+    if os.path.exists(db_file):
+        os.remove(db_file)
+        print(f"Archivo '{db_file}' anterior eliminado.")
 
-    conn = sqlite3.connect(DB_FILE)
+    conn = sqlite3.connect(db_file)
     cursor = conn.cursor()
 
+    if generator:
+        # Carga masiva: sin diario ni fsync. Si se interrumpe, se vuelve a generar.
+        cursor.execute("PRAGMA journal_mode = OFF")
+        cursor.execute("PRAGMA synchronous = OFF")
+        cursor.execute("PRAGMA cache_size = -262144")
+        cursor.execute("PRAGMA locking_mode = EXCLUSIVE")
+        print(f"Generando datos sintéticos con escala {scale} (semilla {seed})...")
+
     cursor.execute('''
     CREATE TABLE cashiers (
         id INTEGER PRIMARY KEY,
@@ -108,7 +311,10 @@ def setup_database():
         sales INTEGER DEFAULT 0
     )
     ''')
-    cashiers_to_insert = [(c['id'], c['name'], c['status'], c['operator'], c['sales']) for c in CASHIERS_DATA]
+    if generator:
+        cashiers_to_insert = generator.cashiers()
+    else:
+        cashiers_to_insert = [(c['id'], c['name'], c['status'], c['operator'], c['sales']) for c in CASHIERS_DATA]
     cursor.executemany("INSERT INTO cashiers VALUES (?, ?, ?, ?, ?)", cashiers_to_insert)
     print(f"Tabla 'cashiers' creada y {len(cashiers_to_insert)} registros insertados.")
 
@@ -125,9 +331,12 @@ def setup_database():
         FOREIGN KEY(cashier_id) REFERENCES cashiers(id)
     )
     ''')
-    tasks_to_insert = [(mt['cashier_id'], mt['issue'], mt['details'], mt['reported_by'], mt['reported_date'], mt['estimated_days'], mt['priority']) for mt in MAINTENANCE_DATA]
-    cursor.executemany("INSERT INTO maintenance_tasks (cashier_id, issue, details, reported_by, reported_date, estimated_days, priority) VALUES (?, ?, ?, ?, ?, ?, ?)", tasks_to_insert)
-    print(f"Tabla 'maintenance_tasks' creada y {len(tasks_to_insert)} registros insertados.")
+    if generator:
+        tasks_to_insert = generator.maintenance_tasks()
+    else:
+        tasks_to_insert = [(mt['cashier_id'], mt['issue'], mt['details'], mt['reported_by'], mt['reported_date'], mt['estimated_days'], mt['priority']) for mt in MAINTENANCE_DATA]
+    count = insert_in_batches(cursor, "INSERT INTO maintenance_tasks (cashier_id, issue, details, reported_by, reported_date, estimated_days, priority) VALUES (?, ?, ?, ?, ?, ?, ?)", tasks_to_insert)
+    print(f"Tabla 'maintenance_tasks' creada y {count} registros insertados.")
 
 
     cursor.execute('''
@@ -141,9 +350,12 @@ def setup_database():
         category TEXT
     )
     ''')
-    inventory_to_insert = [(p['id'], p['name'], p['sku'], p['stock'], p['min_stock'], p['price'], p['category']) for p in INVENTORY_DATA]
-    cursor.executemany("INSERT INTO inventory VALUES (?, ?, ?, ?, ?, ?, ?)", inventory_to_insert)
-    print(f"Tabla 'inventory' creada y {len(inventory_to_insert)} registros insertados.")
+    if generator:
+        inventory_to_insert = generator.inventory()
+    else:
+        inventory_to_insert = [(p['id'], p['name'], p['sku'], p['stock'], p['min_stock'], p['price'], p['category']) for p in INVENTORY_DATA]
+    count = insert_in_batches(cursor, "INSERT INTO inventory VALUES (?, ?, ?, ?, ?, ?, ?)", inventory_to_insert)
+    print(f"Tabla 'inventory' creada y {count} registros insertados.")
 
     cursor.execute('''
     CREATE TABLE sales (
@@ -154,12 +366,24 @@ def setup_database():
         time TEXT,
         payment TEXT,
         customer TEXT,
-        status TEXT
+        status TEXT,
+        sold_at INTEGER
     )
     ''')
-    sales_to_insert = [(s['id'], s['cashier'], s['amount'], s['items'], s['time'], s['payment'], s['customer'], s['status']) for s in SALES_DATA]
-    cursor.executemany("INSERT INTO sales VALUES (?, ?, ?, ?, ?, ?, ?, ?)", sales_to_insert)
-    print(f"Tabla 'sales' creada y {len(sales_to_insert)} registros insertados.")
+    if generator:
+        sales_to_insert = generator.sales()
+    else:
+        # Las ventas de ejemplo son de hoy, a la hora indicada
+        sales_to_insert = [(s['id'], s['cashier'], s['amount'], s['items'], s['time'], s['payment'], s['customer'], s['status'], today_at(s['time'])) for s in SALES_DATA]
+    count = insert_in_batches(cursor, "INSERT INTO sales VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", sales_to_insert)
+    print(f"Tabla 'sales' creada y {count} registros insertados.")
+    if generator:
+        # Las ventas completadas generadas alimentan el contador de cada caja (como record_sale)
+        cursor.execute("""
+        UPDATE cashiers SET sales = totals.n
+        FROM (SELECT cashier, COUNT(*) AS n FROM sales WHERE status = 'completed' GROUP BY cashier) AS totals
+        WHERE totals.cashier = cashiers.name
+        """)
 
     cursor.execute("CREATE TABLE today_earnings (total REAL, transactions INTEGER, avg REAL)")
     today = EARNINGS_DATA['today']
@@ -217,8 +441,29 @@ def setup_database():
 
 
     conn.commit()
+
+    # Los índices, FTS y triggers se crean después de la carga: construirlos
+    # de una vez es mucho más rápido que mantenerlos fila a fila.
+    version = schema.migrate(conn)
+    print(f"Esquema migrado a la versión {version}.")
+    if generator:
+        cursor.execute("ANALYZE")
     conn.close()
-    print(f"\n¡Base de datos '{DB_FILE}' creada y poblada con éxito!")
+
+    elapsed = time.perf_counter() - start
+    size_mb = os.path.getsize(db_file) / (1024 * 1024)
+    print(f"\n¡Base de datos '{db_file}' creada y poblada con éxito! ({size_mb:,.1f} MB en {elapsed:.1f} s)")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Crea supermarket.db con datos de ejemplo o sintéticos.")
+    parser.add_argument("--scale", type=int, default=None,
+                        help=f"Genera datos sintéticos: {SALES_PER_SCALE:,} ventas, {PRODUCTS_PER_SCALE} productos y {TASKS_PER_SCALE} tareas por unidad.")
+    parser.add_argument("--seed", type=int, default=42, help="Semilla del generador (misma semilla, misma BD).")
+    parser.add_argument("--output", default=DB_FILE, help="Archivo de la BD a crear.")
+    return parser.parse_args(argv)
+
 
 if __name__ == "__main__":
-    setup_database()
\ No newline at end of file
+    args = parse_args()
+    setup_database(args.output, args.scale, args.seed)
\ No newline at end of file
@@ -0,0 +1,133 @@
+# export.py
+"""
+Exportación de ventas e inventario a CSV o JSON Lines (opcionalmente con gzip).
+
+Las filas van directas del cursor al archivo (ver AppModel.iter_sales /
+iter_inventory), así que la memoria es la misma con 100 filas que con
+10 millones. La usan el botón de exportar de la vista (solo admin) y la
+línea de comandos:
+
+    python export.py sales --format jsonl --gzip --status completed --from 2025-10-01
+    python export.py inventory --stock low --output bajo_stock.csv
+"""
+import argparse
+import csv
+import gzip
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+from model import AppModel, DB_FILE
+
+EXPORT_DIR = "exports"
+FORMATS = ("csv", "jsonl")
+TABLES = ("sales", "inventory")
+
+
+def default_path(table, fmt="csv", compress=False):
+    """exports/<tabla>_<fecha_hora>.<formato>[.gz]"""
+    name = f"{table}_{datetime.now():%Y%m%d_%H%M%S}.{fmt}" + (".gz" if compress else "")
+    return os.path.join(EXPORT_DIR, name)
+
+
+def _open_output(path, compress):
+    if compress:
+        return gzip.open(path, "wt", compresslevel=6, encoding="utf-8", newline="")  # 9 es mucho más lento y apenas comprime más
+    return open(path, "w", encoding="utf-8", newline="")
+
+
+def export_table(model, table, path=None, fmt="csv", compress=False, **filters):
+    """
+    Exporta 'sales' o 'inventory' con los mismos filtros que get_sales /
+    get_inventory. Devuelve {"path", "rows", "seconds", "rows_per_sec", "bytes"}.
+    Si algo falla, borra el archivo a medias y relanza el error.
+    """
+    if table not in TABLES:
+        raise ValueError(f"Tabla desconocida: {table}")
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato desconocido: {fmt}")
+
+    path = path or default_path(table, fmt, compress)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    start = time.perf_counter()
+    iter_rows = model.iter_sales if table == "sales" else model.iter_inventory
+    columns, rows = iter_rows(**filters)
+    count = 0
+    try:
+        with _open_output(path, compress) as f:
+            if fmt == "csv":
+                writer = csv.writer(f)
+                writer.writerow(columns)
+                for row in rows:
+                    writer.writerow(row)
+                    count += 1
+            else:
+                for row in rows:
+                    f.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False))
+                    f.write("\n")
+                    count += 1
+    except BaseException:
+        rows.close()
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+
+    seconds = time.perf_counter() - start
+    return {
+        "path": path,
+        "rows": count,
+        "seconds": round(seconds, 3),
+        "rows_per_sec": round(count / seconds) if seconds else count,
+        "bytes": os.path.getsize(path),
+    }
+
+
+def _iso_date(value):
+    """Tipo de --from/--to: fecha ISO válida ('2025-10-08' o '2025-10-08 14:30'), en segundos Unix."""
+    try:
+        return AppModel._epoch(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"fecha no válida (ISO, p. ej. 2025-10-08): {value!r}") from None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Exporta ventas o inventario a CSV / JSON Lines.")
+    parser.add_argument("table", choices=TABLES)
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--gzip", action="store_true", help="Comprime la salida con gzip.")
+    parser.add_argument("--output", help=f"Archivo de salida (por defecto en {EXPORT_DIR}/).")
+    parser.add_argument("--db", default=DB_FILE)
+    parser.add_argument("--search", default="", help="Mismo texto que la barra de búsqueda.")
+    parser.add_argument("--status", default="all", help="Ventas: completed, pending, refunded o all.")
+    parser.add_argument("--from", dest="start", type=_iso_date, help="Ventas desde esta fecha (ISO, incluida).")
+    parser.add_argument("--to", dest="end", type=_iso_date, help="Ventas hasta esta fecha (ISO, excluida).")
+    parser.add_argument("--stock", default="all", choices=("all", "low", "high"), help="Inventario: filtro de stock.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.table == "sales":
+        filters = {"status_filter": args.status, "search_query": args.search, "start": args.start, "end": args.end}
+    else:
+        filters = {"stock_filter": args.stock, "search_query": args.search}
+
+    model = AppModel(args.db)
+    try:
+        result = export_table(model, args.table, args.output, args.format, args.gzip, **filters)
+    except (OSError, sqlite3.Error) as e:
+        print(f"Error al exportar: {e}")
+        return 1
+    finally:
+        model.close()
+
+    print(f"{result['rows']:,} filas exportadas a {result['path']} "
+          f"({result['bytes'] / 1e6:,.1f} MB en {result['seconds']:.2f} s, {result['rows_per_sec']:,} filas/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,250 @@
+# federation.py
+"""
+Modo multitienda: varias tiendas, cada una con su propia BD, consultadas a
+la vez desde un pool de hilos.
+
+Cada tienda registrada tiene su AppModel (con su pool de conexiones y su
+caché). Las estadísticas y las búsquedas se lanzan en paralelo, una tarea
+por tienda, y se espera como mucho 'timeout' segundos: las tiendas que no
+han respondido se cancelan (AppModel.interrupt) y el resultado se devuelve
+igualmente con las demás, marcado como parcial. Las estadísticas se suman
+en totales de la cadena; las búsquedas devuelven (tienda, registro).
+
+Las tiendas se pasan con --store nombre=ruta o en la variable de entorno
+SUPERMARKET_STORES ("Centro=centro.db;Norte=norte.db").
+
+    python federation.py --store Centro=centro.db --store Norte=norte.db stats
+    python federation.py search sales "Caja 03" --status completed
+"""
+import argparse
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from model import AppModel
+
+FEDERATION_TIMEOUT = 2.0      # Segundos de espera antes de devolver resultados parciales
+FEDERATION_WORKERS = 8        # Hilos del pool (consultas de tiendas a la vez)
+STORES_ENV = "SUPERMARKET_STORES"
+
+# Estadísticas que se pueden pedir -> método de AppModel
+STATS_METHODS = {
+    "dashboard": "get_dashboard_stats",
+    "sales": "get_sales_stats",
+    "inventory": "get_inventory_stats",
+    "cashiers": "get_cashier_stats",
+    "maintenance": "get_maintenance_stats",
+}
+# Búsquedas -> método de AppModel (todos aceptan search_query y sus filtros)
+SEARCH_METHODS = {
+    "sales": "get_sales",
+    "inventory": "get_inventory",
+    "cashiers": "get_cashiers",
+    "maintenance": "get_maintenance_tasks",
+}
+
+
+def parse_stores(specs):
+    """["Centro=centro.db", ...] o "Centro=centro.db;Norte=norte.db" -> {nombre: ruta}."""
+    if isinstance(specs, str):
+        specs = [spec for spec in specs.split(";") if spec.strip()]
+    stores = {}
+    for spec in specs:
+        name, sep, db_file = spec.partition("=")
+        if not sep or not name.strip() or not db_file.strip():
+            raise ValueError(f"Tienda no válida (se espera nombre=ruta): {spec!r}")
+        stores[name.strip()] = db_file.strip()
+    return stores
+
+
+def merge_stats(results):
+    """
+    Totales de la cadena a partir de las estadísticas de cada tienda: los
+    contadores e importes se suman; el crecimiento y las medias se recalculan.
+    """
+    merged = {}
+    for stats in results:
+        for key, value in stats.items():
+            if isinstance(value, (int, float)):
+                merged[key] = merged.get(key, 0) + value
+    if "month_growth" in merged:
+        merged["month_growth"] = AppModel._growth(merged["recent_total"], merged["previous_total"])
+    if "avg_days" in merged:
+        weighted = sum(stats.get("avg_days", 0) * stats.get("total", 0) for stats in results)
+        merged["avg_days"] = round(weighted / merged["total"]) if merged.get("total") else 0
+    return merged
+
+
+class StoreFederation:
+    """
+    Tiendas registradas ({nombre: AppModel}) y el pool de hilos con el que se consultan.
+    Los kwargs extra se pasan a cada AppModel (p. ej. read_snapshot=True).
+    """
+    def __init__(self, stores=None, timeout=FEDERATION_TIMEOUT, max_workers=FEDERATION_WORKERS, **model_kwargs):
+        self.timeout = timeout
+        self.models = {}
+        self._model_kwargs = model_kwargs
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="store")
+        for name, db_file in (stores or {}).items():
+            self.add_store(name, db_file)
+
+    @classmethod
+    def from_env(cls, **kwargs):
+        return cls(parse_stores(os.environ.get(STORES_ENV, "")), **kwargs)
+
+    def add_store(self, name, db_file):
+        if name in self.models:
+            raise ValueError(f"La tienda {name!r} ya está registrada")
+        self.models[name] = AppModel(db_file, **self._model_kwargs)
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        for model in self.models.values():
+            model.close()
+
+    def _fan_out(self, work, timeout=None):
+        """
+        Ejecuta work(model) en todas las tiendas a la vez.
+        Devuelve ({tienda: resultado} de las que terminaron bien, {tienda: {"status", "ms"}}).
+        status es "ok", "error" (excepción o {} de un método de estadísticas) o "timeout".
+        """
+        timeout = self.timeout if timeout is None else timeout
+        running, lock = {}, threading.Lock()  # tienda -> hilo que la está consultando
+
+        def call(name, model):
+            with lock:
+                running[name] = threading.get_ident()
+            start = time.perf_counter()
+            try:
+                return work(model), (time.perf_counter() - start) * 1000
+            finally:
+                with lock:
+                    running.pop(name, None)
+
+        futures = {self._executor.submit(call, name, model): name for name, model in self.models.items()}
+        done, not_done = wait(futures, timeout=timeout)
+
+        results, stores = {}, {}
+        for future in not_done:
+            name = futures[future]
+            future.cancel()  # si aún no había empezado
+            with lock:
+                ident = running.get(name)
+                if ident is not None:
+                    self.models[name].interrupt(ident)  # que no siga ocupando un hilo del pool
+            stores[name] = {"status": "timeout", "ms": None}
+        for future in done:
+            name = futures[future]
+            try:
+                result, ms = future.result()
+            except Exception as e:
+                print(f"Error en la tienda {name}: {e}")
+                stores[name] = {"status": "error", "ms": None}
+                continue
+            stores[name] = {"status": "ok" if result != {} else "error", "ms": round(ms, 2)}
+            if result != {}:
+                results[name] = result
+        return results, {name: stores[name] for name in self.models}
+
+    def get_stats(self, kinds=tuple(STATS_METHODS), timeout=None):
+        """
+        Estadísticas de todas las tiendas (las de 'kinds', ver STATS_METHODS).
+        Devuelve {"totals": {tipo: totales de la cadena}, "by_store": {tienda: {tipo: stats}},
+        "stores": {tienda: {"status", "ms"}}, "partial": bool}.
+        """
+        methods = [(kind, STATS_METHODS[kind]) for kind in kinds]
+
+        def work(model):
+            stats = {kind: getattr(model, method)() for kind, method in methods}
+            return {} if any(value == {} for value in stats.values()) else stats
+
+        by_store, stores = self._fan_out(work, timeout)
+        return {
+            "totals": {kind: merge_stats([stats[kind] for stats in by_store.values()]) for kind, _ in methods},
+            "by_store": by_store,
+            "stores": stores,
+            "partial": len(by_store) < len(self.models),
+        }
+
+    def search(self, section, search_query="", timeout=None, **filters):
+        """
+        Búsqueda en todas las tiendas (section: sales, inventory, cashiers o maintenance).
+        Devuelve {"results": [(tienda, registro), ...], "stores": ..., "partial": bool};
+        los resultados van por tienda, en el orden en que se registraron.
+        """
+        method = SEARCH_METHODS[section]
+        by_store, stores = self._fan_out(lambda model: getattr(model, method)(search_query=search_query, **filters), timeout)
+        return {
+            "results": [(name, record) for name in self.models if name in by_store for record in by_store[name]],
+            "stores": stores,
+            "partial": len(by_store) < len(self.models),
+        }
+
+
+# ============================================================================
+# LÍNEA DE COMANDOS
+# ============================================================================
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Estadísticas y búsquedas sobre varias tiendas a la vez.")
+    parser.add_argument("--store", action="append", default=[], metavar="NOMBRE=RUTA",
+                        help=f"Tienda a consultar (se puede repetir). Por defecto, las de ${STORES_ENV}.")
+    parser.add_argument("--timeout", type=float, default=FEDERATION_TIMEOUT, help="Segundos antes de dar resultados parciales.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    stats = commands.add_parser("stats", help="Totales de la cadena.")
+    stats.add_argument("kinds", nargs="*", metavar="TIPO", help=f"{', '.join(STATS_METHODS)} (por defecto, todas).")
+    search = commands.add_parser("search", help="Busca en todas las tiendas.")
+    search.add_argument("section", choices=tuple(SEARCH_METHODS))
+    search.add_argument("query", nargs="?", default="")
+    search.add_argument("--status", help="Filtro de estado (ventas y cajas).")
+    search.add_argument("--limit", type=int, default=20, help="Resultados a mostrar.")
+    return parser.parse_args(argv)
+
+
+def _print_stores(stores):
+    for name, info in stores.items():
+        timing = f"{info['ms']:.1f} ms" if info["ms"] is not None else "-"
+        print(f"  {name:<20} {info['status']:<8} {timing}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    unknown = [kind for kind in getattr(args, "kinds", ()) if kind not in STATS_METHODS]
+    if unknown:
+        print(f"Estadísticas desconocidas: {', '.join(unknown)} (disponibles: {', '.join(STATS_METHODS)})")
+        return 1
+    try:
+        stores = parse_stores(args.store) if args.store else parse_stores(os.environ.get(STORES_ENV, ""))
+    except ValueError as e:
+        print(e)
+        return 1
+    if not stores:
+        print(f"No hay tiendas: usa --store nombre=ruta o ${STORES_ENV}")
+        return 1
+
+    federation = StoreFederation(stores, timeout=args.timeout)
+    try:
+        if args.command == "stats":
+            result = federation.get_stats(args.kinds or tuple(STATS_METHODS))
+            for kind, totals in result["totals"].items():
+                print(f"{kind}: " + ", ".join(f"{key}={value:,}" if isinstance(value, int) else f"{key}={value:,.2f}"
+                                              for key, value in totals.items()))
+        else:
+            filters = {}
+            if args.status:
+                filters["status_filter"] = args.status
+            result = federation.search(args.section, args.query, **filters)
+            print(f"{len(result['results']):,} resultados")
+            for name, record in result["results"][:args.limit]:
+                print(f"  [{name}] " + ", ".join(f"{field}={value}" for field, value in record._asdict().items()))
+    finally:
+        federation.close()
+
+    print("Tiendas" + (" (resultado parcial)" if result["partial"] else "") + ":")
+    _print_stores(result["stores"])
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,434 @@
+# importer.py
+"""
+Importación masiva de CSV: catálogo de proveedor -> inventory (upsert por
+sku) y ventas sin conexión -> sales (se añaden).
+
+El CSV se lee en streaming y cada fila se valida; las que fallan van a un
+informe de errores (línea, motivo, fila original) y no detienen la carga.
+Las filas válidas se escriben en transacciones de IMPORT_CHUNK_SIZE filas.
+
+Los triggers por fila (índices FTS, acumulados de ganancias, versiones de
+tabla) multiplican el coste de cada INSERT, así que dentro de cada
+transacción se quitan, se inserta con executemany y se hace el mismo
+mantenimiento de una vez con SQL por conjuntos; al final se vuelven a crear.
+Como todo ocurre en la misma transacción, ninguna otra conexión llega a ver
+las tablas sin sus triggers.
+
+    python importer.py inventory catalogo.csv
+    python importer.py sales ventas_offline.csv --errors errores.csv
+"""
+import argparse
+import csv
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from operator import itemgetter
+
+from model import AppModel, DB_FILE
+from schema import SALE_STATUSES, SALES_BUCKET_SQL, WEEK_OF_DAY_SQL, ImmediateTransaction
+
+IMPORT_CHUNK_SIZE = 50_000
+
+
+# ============================================================================
+# VALIDACIÓN
+# ============================================================================
+
+def _text(value):
+    return value.strip() or None
+
+
+def _required_text(value):
+    value = value.strip()
+    if not value:
+        raise ValueError("no puede estar vacío")
+    return value
+
+
+def _non_negative(convert, default=None):
+    """Con 'default', una celda vacía toma ese valor (el de la columna en la tabla)."""
+    def parse(value):
+        if default is not None and not value.strip():
+            return default
+        try:
+            number = convert(value)
+        except ValueError:
+            raise ValueError(f"no es un número válido: {value!r}") from None
+        if number < 0:
+            raise ValueError("no puede ser negativo")
+        return number
+    return parse
+
+
+def _status(value):
+    value = value.strip().lower() or "completed"
+    if value not in SALE_STATUSES:
+        raise ValueError(f"debe ser uno de {', '.join(SALE_STATUSES)}")
+    return value
+
+
+def _hh_mm(value):
+    """Hora 'HH:MM' (se normaliza: '9:05' -> '09:05'); vacía = None."""
+    value = value.strip()
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%H:%M").strftime("%H:%M")
+    except ValueError:
+        raise ValueError(f"hora no válida (HH:MM): {value!r}") from None
+
+
+def _sold_at(value):
+    """Segundos Unix o fecha/hora ISO ('2025-10-08 14:32'); sin zona = hora local; vacía = None."""
+    value = value.strip()
+    if not value:
+        return None
+    if value.isdigit():
+        return int(value)
+    try:
+        return int(datetime.fromisoformat(value).timestamp())
+    except ValueError:
+        raise ValueError(f"fecha no válida: {value!r}") from None
+
+
+# Columna -> (conversión, obligatoria). Las opcionales que falten, o que vengan
+# vacías, toman el valor por defecto de la tabla (o se calculan, como
+# time/sold_at en ventas).
+INVENTORY_COLUMNS = {
+    "sku": (_required_text, True),
+    "name": (_required_text, True),
+    "stock": (_non_negative(int, 0), False),
+    "min_stock": (_non_negative(int, 0), False),
+    "price": (_non_negative(float, 0.0), False),
+    "category": (_text, False),
+}
+SALES_COLUMNS = {
+    "cashier": (_required_text, True),
+    "amount": (_non_negative(float), True),
+    "items": (_non_negative(int, 1), False),
+    "time": (_hh_mm, False),
+    "payment": (_text, False),
+    "customer": (_text, False),
+    "status": (_status, False),
+    "sold_at": (_sold_at, False),
+}
+
+
+def read_rows(f, spec, errors):
+    """
+    Lee el CSV fila a fila y devuelve (columnas, iterador de filas validadas).
+    Las columnas son las de 'spec' presentes en la cabecera (en ese orden).
+    Cada fila inválida se añade a 'errors' como (línea, motivo, fila).
+    """
+    reader = csv.reader(f)
+    header = [name.strip().lower() for name in next(reader, [])]
+    missing = [name for name, (_, required) in spec.items() if required and name not in header]
+    if missing:
+        raise ValueError(f"Faltan columnas obligatorias: {', '.join(missing)}")
+
+    columns = [name for name in spec if name in header]
+    converters = [spec[name][0] for name in columns]
+    pick = itemgetter(*[header.index(name) for name in columns])
+    if len(columns) == 1:
+        pick = lambda raw, _pick=pick: (_pick(raw),)
+
+    def rows():
+        for line, raw in enumerate(reader, start=2):
+            if not raw:
+                continue
+            try:
+                # Lista por comprensión: bastante más rápida que tuple(genexpr) y executemany la acepta igual
+                yield [convert(value) for convert, value in zip(converters, pick(raw))]
+            except IndexError:
+                errors.append((line, "faltan campos", raw))
+            except ValueError as e:
+                errors.append((line, str(e), raw))
+    return columns, rows()
+
+
+# ============================================================================
+# CARGA
+# ============================================================================
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+_DONE = object()
+
+
+def _read_ahead(rows, size):
+    """
+    Igual que _chunks, pero leyendo y validando en otro hilo: sqlite3 suelta el
+    GIL mientras ejecuta, así que el siguiente lote se prepara mientras se
+    escribe el actual. Los errores del hilo lector se relanzan aquí.
+    """
+    chunks = queue.Queue(maxsize=2)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                chunks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for chunk in _chunks(rows, size):
+                if not put(chunk):
+                    return
+            put(_DONE)
+        except Exception as e:
+            put(e)
+
+    reader = threading.Thread(target=produce, name="csv-import-reader", daemon=True)
+    reader.start()
+    try:
+        while True:
+            item = chunks.get()
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        reader.join()
+
+
+class _TriggersSuspended:
+    """
+    Dentro de una transacción ya abierta, quita los triggers por fila de una
+    tabla y los vuelve a crear al salir (con su SQL original de sqlite_master).
+    """
+    def __init__(self, conn, table, names):
+        self.conn = conn
+        self.triggers = conn.execute(
+            f"SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = ? AND name IN ({', '.join('?' * len(names))})",
+            (table, *names),
+        ).fetchall()
+
+    def __enter__(self):
+        for name, _ in self.triggers:
+            self.conn.execute(f"DROP TRIGGER {name}")
+
+    def __exit__(self, *exc):
+        for _, sql in self.triggers:
+            self.conn.execute(sql)
+
+
+# --- Inventario: upsert por sku ---
+INVENTORY_TRIGGERS = ("inventory_fts_ai", "inventory_fts_au", "inventory_version_insert", "inventory_version_update")
+
+
+def _load_inventory_chunk(conn, columns, chunk):
+    """Upsert de un lote de productos. Devuelve (insertados, actualizados)."""
+    column_list = ", ".join(columns)
+    updates = ", ".join(f"{c} = excluded.{c}" for c in columns if c != "sku")
+    conn.execute("DROP TABLE IF EXISTS temp.import_inventory")
+    conn.execute(f"CREATE TEMP TABLE import_inventory AS SELECT {column_list} FROM inventory WHERE 0")
+    conn.executemany(f"INSERT INTO import_inventory ({column_list}) VALUES ({', '.join('?' * len(columns))})", chunk)
+
+    with _TriggersSuspended(conn, "inventory", INVENTORY_TRIGGERS):
+        existing = conn.execute("SELECT COUNT(*) FROM inventory WHERE sku IN (SELECT sku FROM import_inventory)").fetchone()[0]
+        # Quita del índice FTS la versión anterior de los productos que se van a actualizar
+        conn.execute("""
+            INSERT INTO inventory_fts(inventory_fts, rowid, name, sku, category)
+            SELECT 'delete', id, name, sku, category FROM inventory WHERE sku IN (SELECT sku FROM import_inventory)
+        """)
+        # Si un sku se repite en el archivo, gana la última fila
+        conn.execute(f"""
+            INSERT INTO inventory ({column_list}) SELECT {column_list} FROM import_inventory WHERE true ORDER BY rowid
+            ON CONFLICT(sku) DO UPDATE SET {updates}
+        """)
+        conn.execute("""
+            INSERT INTO inventory_fts(rowid, name, sku, category)
+            SELECT id, name, sku, category FROM inventory WHERE sku IN (SELECT sku FROM import_inventory)
+        """)
+        conn.execute("UPDATE table_versions SET version = version + 1 WHERE name = 'inventory'")
+        total = conn.execute("SELECT COUNT(DISTINCT sku) FROM import_inventory").fetchone()[0]
+    return total - existing, existing
+
+
+# --- Ventas: se añaden ---
+SALES_DEFAULTS = {"items": "1", "status": "'completed'"}  # Literales SQL
+SALES_TRIGGERS = ("sales_fts_ai", "sales_daily_ai", "sales_weekly_ai", "sales_version_insert")
+def _prepare_sales(columns):
+    """
+    Las ventas guardan la hora dos veces: 'time' (HH:MM, la que se muestra) y
+    'sold_at' (segundos Unix). Si en una fila falta una (no viene la columna
+    o la celda está vacía), se calcula a partir de la otra: con solo 'time'
+    la venta es de hoy a esa hora, y sin ninguna, del momento de la
+    importación. Devuelve (columnas finales, función que completa cada fila).
+    """
+    final = columns + [name for name in ("time", "sold_at") if name not in columns]
+    time_at, sold_at_at = final.index("time"), final.index("sold_at")
+    padding = [None] * (len(final) - len(columns))
+
+    now = datetime.now()
+    now_hh_mm, now_epoch = now.strftime("%H:%M"), int(now.timestamp())
+    today = now.date()
+    # Pocas horas distintas en miles de filas: cada conversión se calcula una vez
+    hh_mm_by_minute, epoch_by_hh_mm = {}, {}
+
+    def complete(row):
+        row += padding
+        hh_mm, epoch = row[time_at], row[sold_at_at]
+        if epoch is None:
+            if hh_mm is None:
+                row[time_at], row[sold_at_at] = now_hh_mm, now_epoch
+                return row
+            epoch = epoch_by_hh_mm.get(hh_mm)
+            if epoch is None:
+                epoch = epoch_by_hh_mm[hh_mm] = int(datetime.combine(today, datetime.strptime(hh_mm, "%H:%M").time()).timestamp())
+            row[sold_at_at] = epoch
+        elif hh_mm is None:
+            minute = epoch - epoch % 60
+            hh_mm = hh_mm_by_minute.get(minute)
+            if hh_mm is None:
+                hh_mm = hh_mm_by_minute[minute] = datetime.fromtimestamp(minute).strftime("%H:%M")
+            row[time_at] = hh_mm
+        return row
+    return final, complete
+
+
+def _load_sales_chunk(conn, columns, chunk):
+    """Añade un lote de ventas. Devuelve (insertadas, 0)."""
+    # Las columnas opcionales que no vienen en el CSV van como constantes en el INSERT
+    missing = [name for name in SALES_DEFAULTS if name not in columns]
+    insert = (f"INSERT INTO sales ({', '.join(columns + missing)}) "
+              f"VALUES ({', '.join(['?'] * len(columns) + [SALES_DEFAULTS[name] for name in missing])})")
+
+    last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM sales").fetchone()[0]
+    with _TriggersSuspended(conn, "sales", SALES_TRIGGERS):
+        conn.executemany(insert, chunk)
+        conn.execute("""
+            INSERT INTO sales_fts(rowid, sale_id, cashier, customer)
+            SELECT id, CAST(id AS TEXT), cashier, customer FROM sales WHERE id > ?
+        """, (last_id,))
+        # Acumulados de ganancias (lo que harían sales_daily_ai / sales_weekly_ai): la
+        # semana se saca de los días ya agrupados en lugar de volver a recorrer el lote
+        conn.execute("DROP TABLE IF EXISTS temp.import_days")
+        conn.execute(f"""
+            CREATE TEMP TABLE import_days AS
+            SELECT {SALES_BUCKET_SQL["day"].format(row="sales")} AS day, SUM(amount) AS amount, COUNT(*) AS transactions
+            FROM sales WHERE id > ? AND status = 'completed' AND sold_at IS NOT NULL GROUP BY 1
+        """, (last_id,))
+        conn.execute("""
+            INSERT INTO sales_daily (day, amount, transactions) SELECT day, amount, transactions FROM import_days WHERE true
+            ON CONFLICT(day) DO UPDATE SET amount = amount + excluded.amount, transactions = transactions + excluded.transactions
+        """)
+        conn.execute(f"""
+            INSERT INTO sales_weekly (week, amount, transactions)
+            SELECT {WEEK_OF_DAY_SQL.format(day="day")}, SUM(amount), SUM(transactions) FROM import_days GROUP BY 1
+            ON CONFLICT(week) DO UPDATE SET amount = amount + excluded.amount, transactions = transactions + excluded.transactions
+        """)
+        # Como en record_sale, solo las ventas completadas cuentan para su caja
+        conn.execute("""
+            UPDATE cashiers SET sales = sales + totals.n
+            FROM (SELECT cashier, COUNT(*) AS n FROM sales WHERE id > ? AND status = 'completed' GROUP BY cashier) AS totals
+            WHERE totals.cashier = cashiers.name
+        """, (last_id,))
+        conn.execute("UPDATE table_versions SET version = version + 1 WHERE name = 'sales'")
+    return len(chunk), 0
+
+
+def import_csv(model, table, path, errors_path=None, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Importa un CSV en 'inventory' (upsert por sku) o 'sales' (se añaden).
+    Devuelve {"inserted", "updated", "errors", "seconds", "rows_per_sec", "error_rows"}.
+    'error_rows' son las primeras filas rechazadas; con errors_path se
+    escriben todas en un CSV (línea, error, campos originales).
+    """
+    if table not in ("inventory", "sales"):
+        raise ValueError(f"Tabla desconocida: {table}")
+
+    start = time.perf_counter()
+    conn = model.pool.get()
+    errors = []
+    inserted = updated = 0
+    # La traza de sentencias de las métricas se llamaría una vez por fila de executemany
+    conn.set_trace_callback(None)
+    try:
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            if table == "inventory":
+                columns, rows = read_rows(f, INVENTORY_COLUMNS, errors)
+                load_chunk = _load_inventory_chunk
+            else:
+                columns, rows = read_rows(f, SALES_COLUMNS, errors)
+                columns, complete = _prepare_sales(columns)
+                rows = map(complete, rows)
+                load_chunk = _load_sales_chunk
+
+            for chunk in _read_ahead(rows, chunk_size):
+                with ImmediateTransaction(conn):
+                    added, changed = load_chunk(conn, columns, chunk)
+                inserted += added
+                updated += changed
+    finally:
+        model.metrics.attach(conn)
+        model._note_write()
+
+    if errors_path and errors:
+        with open(errors_path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["linea", "error", "fila"])
+            for line, message, raw in errors:
+                writer.writerow([line, message, *raw])
+
+    seconds = time.perf_counter() - start
+    processed = inserted + updated + len(errors)
+    return {
+        "inserted": inserted,
+        "updated": updated,
+        "errors": len(errors),
+        "seconds": round(seconds, 3),
+        "rows_per_sec": round(processed / seconds) if seconds else processed,
+        "error_rows": errors[:20],
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Importa un CSV de inventario (upsert por sku) o de ventas.")
+    parser.add_argument("table", choices=("inventory", "sales"))
+    parser.add_argument("csv_file")
+    parser.add_argument("--db", default=DB_FILE)
+    parser.add_argument("--errors", help="CSV donde guardar todas las filas rechazadas.")
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE, help="Filas por transacción.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    model = AppModel(args.db)
+    try:
+        result = import_csv(model, args.table, args.csv_file, args.errors, args.chunk_size)
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"Error al importar: {e}")
+        return 1
+    finally:
+        model.close()
+
+    print(f"{result['inserted']:,} filas nuevas, {result['updated']:,} actualizadas, {result['errors']:,} con errores "
+          f"en {result['seconds']:.2f} s ({result['rows_per_sec']:,} filas/s)")
+    for line, message, _ in result["error_rows"]:
+        print(f"  línea {line}: {message}")
+    if result["errors"] > len(result["error_rows"]):
+        print(f"  ... y {result['errors'] - len(result['error_rows'])} más" + (f" (ver {args.errors})" if args.errors else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,366 @@
+# instrumentation.py
+"""
+Métricas de las consultas del modelo y perfilado de los renders.
+
+Cada método público de AppModel marcado con @timed registra su duración,
+las filas que devolvió y si falló. Dentro de cada llamada, el trace callback
+de sqlite3 avisa cuando empieza cada sentencia: la duración de una sentencia
+es el tiempo hasta que empieza la siguiente o termina el método (en este
+modelo cada execute() va seguido de su fetch, así que incluye la lectura de
+filas). Las sentencias que superan el umbral se escriben, junto con su
+EXPLAIN QUERY PLAN, en el log de consultas lentas.
+
+RenderProfiler (opcional) reparte el tiempo de AppController.render() entre
+consulta, construcción de controles y envío al cliente, y lo anota en un log
+rotativo junto con el número de controles enviados y el tamaño de la
+actualización.
+"""
+import bisect
+import functools
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+
+SLOW_QUERY_MS = 100                     # Umbral de consulta lenta (None lo desactiva)
+SLOW_QUERY_LOG = "slow_queries.log"
+METRICS_FILE = "query_metrics.json"
+HISTOGRAM_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000)  # + un cubo final "más de 1000"
+
+# --- Perfilado de renders (se activa con SUPERMARKET_PROFILE_RENDER=1) ---
+PROFILE_RENDER = os.environ.get("SUPERMARKET_PROFILE_RENDER") == "1"
+RENDER_PROFILE_LOG = "render_profile.log"
+RENDER_PROFILE_LOG_BYTES = 1_000_000    # Tamaño de cada archivo del log rotativo
+RENDER_PROFILE_LOG_BACKUPS = 3
+
+logger = logging.getLogger("supermarket.queries")
+render_logger = logging.getLogger("supermarket.render")
+
+_log_config_lock = threading.Lock()
+
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SPACES_RE = re.compile(r"\s+")
+
+
+def normalize_sql(sql):
+    """
+    El trace callback entrega la sentencia con los parámetros ya sustituidos;
+    los volvemos a cambiar por '?' para agrupar las ejecuciones de la misma consulta.
+    """
+    return _SPACES_RE.sub(" ", _LITERAL_RE.sub("?", sql)).strip()
+
+
+def configure_slow_query_log(path=SLOW_QUERY_LOG):
+    """
+    Envía el log de consultas lentas (y los errores de BD) a un archivo.
+    Cada AppModel la llama; el handler de un mismo archivo se añade una sola
+    vez (FileHandler guarda la ruta absoluta en baseFilename).
+    """
+    path = os.path.abspath(path)
+    with _log_config_lock:
+        if not any(getattr(h, "baseFilename", None) == path for h in logger.handlers):
+            handler = logging.FileHandler(path, encoding="utf-8", delay=True)
+            handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+            logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+class _Timing:
+    """Acumulado de llamadas, tiempos, filas e histograma de latencias."""
+    __slots__ = ("calls", "errors", "rows", "total_ms", "max_ms", "histogram")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.histogram = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+
+    def add(self, elapsed_ms, rows=0, error=False):
+        self.calls += 1
+        self.errors += error
+        self.rows += rows
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.histogram[bisect.bisect_left(HISTOGRAM_BUCKETS_MS, elapsed_ms)] += 1
+
+    def as_dict(self):
+        labels = [f"<={b}ms" for b in HISTOGRAM_BUCKETS_MS] + [f">{HISTOGRAM_BUCKETS_MS[-1]}ms"]
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "rows": self.rows,
+            "total_ms": round(self.total_ms, 3),
+            "avg_ms": round(self.total_ms / self.calls, 3) if self.calls else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "histogram": dict(zip(labels, self.histogram)),
+        }
+
+
+class QueryMetrics:
+    """Contadores de métodos y sentencias, seguros entre hilos."""
+    def __init__(self, slow_query_ms=SLOW_QUERY_MS):
+        self.slow_query_ms = slow_query_ms
+        self.slow_queries = 0
+        self._methods = {}
+        self._statements = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()  # llamada en curso del hilo
+
+    # --- Enganche con las conexiones ---
+    def attach(self, conn):
+        """Se llama con cada conexión nueva del pool."""
+        conn.set_trace_callback(self._on_statement)
+
+    def _on_statement(self, sql):
+        call = getattr(self._local, "call", None)
+        if call is None or sql.startswith("--"):
+            return  # fuera de un método medido (migraciones, EXPLAIN...) o subsentencia de un trigger
+        now = time.perf_counter()
+        call.close_statement(now)
+        call.statements.append([sql, now, None])
+
+    # --- Medición de llamadas ---
+    def begin(self):
+        call = _Call()
+        self._local.call = call
+        return call
+
+    def end(self, method_name, call, result, error=False, connect=None):
+        """Cierra la llamada; 'connect' da la conexión para el EXPLAIN de las lentas."""
+        now = time.perf_counter()
+        call.close_statement(now)
+        self._local.call = None
+
+        rows = _count_rows(result)
+        slow = []
+        with self._lock:
+            self._methods.setdefault(method_name, _Timing()).add((now - call.start) * 1000, rows, error or call.error)
+            last = len(call.statements) - 1
+            for i, (sql, _, elapsed_ms) in enumerate(call.statements):
+                # Las filas del resultado se atribuyen a la última sentencia (la que lo produce)
+                self._statements.setdefault(normalize_sql(sql), _Timing()).add(elapsed_ms, rows if i == last else 0)
+                if self.slow_query_ms is not None and elapsed_ms >= self.slow_query_ms:
+                    self.slow_queries += 1
+                    slow.append((sql, elapsed_ms))
+
+        for sql, elapsed_ms in slow:
+            self._log_slow_query(method_name, sql, elapsed_ms, connect)
+
+    def _log_slow_query(self, method_name, sql, elapsed_ms, connect):
+        plan = ""
+        if connect is not None and sql.lstrip().upper().startswith(("SELECT", "WITH")):
+            try:
+                plan = "\n".join(f"    {row[3]}" for row in connect().execute("EXPLAIN QUERY PLAN " + sql))
+            except sqlite3.Error as e:
+                plan = f"    (sin plan: {e})"
+        logger.warning("Consulta lenta en %s (%.1f ms): %s\n%s", method_name, elapsed_ms, normalize_sql(sql), plan)
+
+    def record_error(self, method_name, e):
+        """Anota el error en la llamada en curso (los métodos lo capturan y devuelven vacío) y lo registra."""
+        call = getattr(self._local, "call", None)
+        if call is not None:
+            call.error = True
+        logger.error("Error en %s: %s", method_name, e)
+
+    # --- Lectura ---
+    def snapshot(self):
+        """Copia de todos los contadores (para el volcado o un panel de diagnóstico)."""
+        with self._lock:
+            return {
+                "slow_query_ms": self.slow_query_ms,
+                "slow_queries": self.slow_queries,
+                "methods": {name: t.as_dict() for name, t in sorted(self._methods.items())},
+                "statements": {sql: t.as_dict() for sql, t in sorted(self._statements.items(), key=lambda kv: -kv[1].total_ms)},
+            }
+
+    def dump(self, path=METRICS_FILE):
+        """Vuelca las métricas a un JSON. No escribe nada si no se midió nada."""
+        data = self.snapshot()
+        if not data["methods"]:
+            return None
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        return path
+
+    def reset(self):
+        with self._lock:
+            self._methods.clear()
+            self._statements.clear()
+            self.slow_queries = 0
+
+
+class _Call:
+    """Una llamada en curso a un método medido: cuándo empezó y sus sentencias."""
+    __slots__ = ("start", "statements", "error")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.error = False
+        self.statements = []  # [sql, inicio, duración en ms]
+
+    def close_statement(self, now):
+        if self.statements and self.statements[-1][2] is None:
+            self.statements[-1][2] = (now - self.statements[-1][1]) * 1000
+
+
+def _count_rows(result):
+    """Filas de un resultado del modelo: lista, (lista, next_key), dict/Row o escalar."""
+    if isinstance(result, tuple) and len(result) == 2 and isinstance(result[0], list):
+        return len(result[0])
+    if isinstance(result, list):
+        return len(result)
+    return 1 if result else 0
+
+
+def timed(method):
+    """
+    Decorador para los métodos públicos de AppModel. Se pone por fuera de
+    @cached, así que mide lo que espera quien llama (incluidos los aciertos de caché).
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        metrics = self.metrics
+        if metrics is None or getattr(metrics._local, "call", None) is not None:
+            return method(self, *args, **kwargs)  # desactivado, o llamada anidada
+
+        call = metrics.begin()
+        result, error = None, False
+        try:
+            result = method(self, *args, **kwargs)
+            return result
+        except BaseException:
+            error = True
+            raise
+        finally:
+            metrics.end(method.__name__, call, result, error, self.pool.get)
+    return wrapper
+
+
+# ============================================================================
+# PERFILADO DE RENDERS
+# ============================================================================
+
+class RenderProfiler:
+    """
+    Mide las fases de cada render: 'fetch' (modelo), 'build' (vista) y
+    'update' (diff de Flet + envío). Cada render es una línea JSON en un log
+    rotativo; summary() da los promedios por sección.
+    Desactivado, begin() devuelve una muestra que no hace nada.
+    """
+    def __init__(self, enabled=PROFILE_RENDER, log_file=RENDER_PROFILE_LOG):
+        self.enabled = enabled
+        self._totals = {}  # sección -> {"renders": n, "fetch_ms": ..., ...}
+        self._lock = threading.Lock()
+        if enabled and not render_logger.handlers:
+            import logging.handlers  # solo con el perfilado activo: cli.py no lo paga al arrancar
+            handler = logging.handlers.RotatingFileHandler(
+                log_file, maxBytes=RENDER_PROFILE_LOG_BYTES, backupCount=RENDER_PROFILE_LOG_BACKUPS, encoding="utf-8"
+            )
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            render_logger.addHandler(handler)
+            render_logger.setLevel(logging.INFO)
+            render_logger.propagate = False
+
+    def begin(self, page):
+        if not self.enabled:
+            return _NULL_SAMPLE
+        return _RenderSample(self, page)
+
+    def _record(self, sample):
+        with self._lock:
+            totals = self._totals.setdefault(sample["section"], {"renders": 0})
+            totals["renders"] += 1
+            for key, value in sample.items():
+                if key != "section":
+                    totals[key] = totals.get(key, 0) + value
+        render_logger.info(json.dumps(sample))
+
+    def summary(self):
+        """Promedio de cada fase, controles y bytes por sección."""
+        with self._lock:
+            return {
+                section: {key: round(value / totals["renders"], 3) for key, value in totals.items() if key != "renders"}
+                | {"renders": totals["renders"]}
+                for section, totals in self._totals.items()
+            }
+
+
+class _RenderSample:
+    """
+    Un render en curso. Mientras dura, mide lo que la página envía al cliente:
+    comandos, bytes y controles enviados (los de cada 'add', con sus
+    descendientes, más uno por cada 'set' de un control que cambió).
+    """
+    def __init__(self, profiler, page):
+        self.profiler = profiler
+        self.phases = {}
+        self.payload_bytes = 0
+        self.commands = 0
+        self.controls = 0
+        self._measure_ms = 0.0  # lo que cuesta medir el payload no se cuenta en 'update'
+        self._conn = page.connection
+        self._measured = None
+        if self._conn is not None:
+            import dataclasses  # solo hace falta para medir el payload de un render perfilado
+            self._original = send_commands = self._conn.send_commands
+
+            def measured_send_commands(session_id, commands):
+                if self._measured is not None:
+                    start = time.perf_counter()
+                    self.commands += len(commands)
+                    self.controls += sum(len(c.commands) if c.name == "add" else c.name == "set" for c in commands)
+                    self.payload_bytes += len(json.dumps([dataclasses.asdict(c) for c in commands], separators=(",", ":"), default=str))
+                    self._measure_ms += (time.perf_counter() - start) * 1000
+                return send_commands(session_id, commands)
+            self._conn.send_commands = self._measured = measured_send_commands
+        self._last = time.perf_counter()
+
+    def mark(self, phase):
+        """Cierra la fase en curso con el nombre dado."""
+        now = time.perf_counter()
+        self.phases[phase] = (now - self._last) * 1000
+        self._last = now
+
+    def restore(self):
+        """
+        Deja de medir y vuelve a poner el send_commands que había (se puede
+        llamar más de una vez). Si otro render lo envolvió después, se deja
+        el suyo: el de esta muestra solo pasa los comandos sin medirlos.
+        """
+        if self._measured is not None:
+            if self._conn.send_commands is self._measured:
+                self._conn.send_commands = self._original
+            self._measured = None
+
+    def finish(self, section):
+        self.restore()
+        phases = dict(self.phases)
+        if "update" in phases:
+            phases["update"] = max(0.0, phases["update"] - self._measure_ms)
+        sample = {"section": section or "dashboard"}
+        sample.update({f"{phase}_ms": round(ms, 3) for phase, ms in phases.items()})
+        sample["total_ms"] = round(sum(phases.values()), 3)
+        sample["controls"] = self.controls
+        sample["commands"] = self.commands
+        sample["payload_bytes"] = self.payload_bytes
+        self.profiler._record(sample)
+
+
+class _NullSample:
+    def mark(self, phase):
+        pass
+
+    def restore(self):
+        pass
+
+    def finish(self, section):
+        pass
+
+
+_NULL_SAMPLE = _NullSample()
@@ -1,12 +1,31 @@
 
-import flet as ft
-from model import AppModel
-from view import AppView
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+import export
+from instrumentation import RenderProfiler
+from model import AppModel, shared_model
+
+# Flet (y view.py, que lo usa) se importan solo al abrir la interfaz: los
+# scripts que solo necesitan el modelo (cli.py, export.py...) no lo cargan.
+if TYPE_CHECKING:
+    import flet as ft
+
+SEARCH_DEBOUNCE_SECONDS = 0.25  # Espera tras la última tecla antes de lanzar la búsqueda
+RESIZE_DEBOUNCE_SECONDS = 0.15  # Espera tras el último evento de resize antes de recolocar la vista
+RESIZE_MAX_WAIT_SECONDS = 0.5   # Durante un arrastre largo, se recoloca al menos cada tanto
 
 class AppController:
-    def __init__(self, page: ft.Page):
+    def __init__(self, page: "ft.Page", model=None):
+        """
+        'model' es el AppModel a usar; main() pasa el compartido por todas las
+        sesiones (shared_model), así que aquí solo vive el estado de la interfaz.
+        """
+        from view import AppView
         self.page = page
-        self.model = AppModel()
+        self.model = model if model is not None else AppModel()
         self.view = AppView(self)
         
 
@@ -17,14 +36,93 @@ class AppController:
         self.active_filter = "all"
         self.active_earnings_tab = "week" 
 
+        # --- Paginación de las listas de ventas e inventario ---
+        self.next_page_key = None                 # Clave para pedir la siguiente página (None = no hay más)
+        self.page_load_lock = threading.Lock()    # Evita pedir la misma página dos veces al hacer scroll
+
+        # --- Búsqueda en segundo plano ---
+        # Cada pulsación crea una "generación" nueva; solo el resultado de la
+        # última se aplica a la vista, y la consulta anterior se cancela.
+        self.search_lock = threading.Lock()
+        self.search_generation = 0
+        self.search_timer = None
+        self.search_running = None                # Generación que el worker está consultando
+        self.search_worker_ident = None           # Hilo del worker (para interrumpir su conexión)
+        self.search_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="search")
+
+        # --- Exportación en segundo plano (una a la vez) ---
+        self.export_running = False
+
+        # --- Redimensionado agrupado ---
+        # Los eventos de resize llegan en ráfagas (arrastrar la ventana, girar
+        # la tablet): se agrupan y solo se recoloca la vista, sin consultar el modelo.
+        self.resize_lock = threading.Lock()
+        self.resize_timer = None
+        self.resize_burst_start = None            # Primer evento de la ráfaga en curso
+        self.resize_events = 0
+        self.relayouts = 0
+
+        # --- Perfilado de renders (opcional, ver instrumentation.PROFILE_RENDER) ---
+        self.render_profiler = RenderProfiler()
+
     def start(self):
         """Inicia y renderiza la vista inicial de la aplicación."""
-        self.page.on_resize = self.handle_resize
+        self.page.on_resized = self.handle_resize
         self.render()
 
+    def close(self):
+        """
+        Libera lo que es solo de esta sesión (búsqueda y resize pendientes, hilo
+        de búsqueda). El modelo no se cierra: puede ser el compartido.
+        """
+        self.cancel_pending_search()
+        with self.resize_lock:
+            if self.resize_timer is not None:
+                self.resize_timer.cancel()
+                self.resize_timer = None
+        self.search_executor.shutdown(wait=False, cancel_futures=True)
+
     def handle_resize(self, e):
-        """Maneja el redimensionamiento de la ventana y vuelve a renderizar."""
-        self.render()
+        """
+        Maneja el redimensionamiento de la ventana. No renderiza en cada evento:
+        programa un relayout tras RESIZE_DEBOUNCE_SECONDS sin eventos nuevos, o
+        como mucho RESIZE_MAX_WAIT_SECONDS después del primero de la ráfaga.
+        """
+        now = time.monotonic()
+        with self.resize_lock:
+            self.resize_events += 1
+            if self.resize_timer is not None:
+                self.resize_timer.cancel()
+            if self.resize_burst_start is None:
+                self.resize_burst_start = now
+            delay = min(RESIZE_DEBOUNCE_SECONDS, max(0.0, self.resize_burst_start + RESIZE_MAX_WAIT_SECONDS - now))
+            self.resize_timer = threading.Timer(delay, self._relayout)
+            self.resize_timer.daemon = True
+            self.resize_timer.start()
+
+    def _relayout(self):
+        """
+        Cierra la ráfaga de resize: recoloca la vista actual con el tamaño nuevo
+        (sin AppModel). Lo ejecuta el temporizador; si mientras tanto llegó otro
+        evento y programó uno nuevo, este ya no es el vigente y no hace nada.
+        """
+        with self.resize_lock:
+            if self.resize_timer is not threading.current_thread():
+                return
+            self.resize_timer = None
+            self.resize_burst_start = None
+            self.relayouts += 1
+        self.view.relayout()
+
+    def resize_stats(self):
+        """
+        Eventos de resize recibidos, relayouts hechos y trabajo ahorrado: antes
+        cada evento era un render(); ahora una ráfaga de eventos se agrupa en
+        un solo relayout, así que se ahorran eventos - relayouts.
+        """
+        with self.resize_lock:
+            return {"events": self.resize_events, "relayouts": self.relayouts,
+                    "renders_saved": self.resize_events - self.relayouts}
 
     def handle_login(self, username, password):
         """Manejador para el evento de inicio de sesión."""
@@ -42,6 +140,7 @@ class AppController:
 
     def handle_logout(self, e):
         """Manejador para el evento de cierre de sesión."""
+        self.cancel_pending_search()
         self.is_logged_in = False
         self.current_user_role = None 
         self.current_section = None
@@ -49,6 +148,7 @@ class AppController:
 
     def handle_select_section(self, section_name):
         """Manejador para la selección de una sección del dashboard."""
+        self.cancel_pending_search()
         self.current_section = section_name
         self.active_filter = "all"
         self.search_query = ""
@@ -57,26 +157,107 @@ class AppController:
 
     def handle_back(self, e):
         """Manejador para el botón de 'volver'."""
+        self.cancel_pending_search()
         self.current_section = None
         self.render()
 
     def handle_search(self, section, query):
-        """Manejador para los cambios en las barras de búsqueda."""
+        """
+        Manejador para los cambios en las barras de búsqueda.
+        No consulta la BD en el hilo de la UI: programa la búsqueda tras una
+        pequeña pausa (debounce) y la ejecuta en un hilo de fondo.
+        """
         self.search_query = query.lower()
-        self.update_dynamic_list(section)
+        generation = self.cancel_pending_search()
+
+        timer = threading.Timer(SEARCH_DEBOUNCE_SECONDS, self._submit_search, args=(section, generation))
+        timer.daemon = True
+        with self.search_lock:
+            if generation == self.search_generation:
+                self.search_timer = timer
+                timer.start()
+
+    def cancel_pending_search(self):
+        """
+        Invalida cualquier búsqueda pendiente o en curso: cancela el temporizador
+        y, si el worker está consultando, interrumpe su conexión SQLite.
+        Devuelve la nueva generación.
+        """
+        with self.search_lock:
+            self.search_generation += 1
+            if self.search_timer is not None:
+                self.search_timer.cancel()
+                self.search_timer = None
+            if self.search_running is not None and self.search_worker_ident is not None:
+                self.model.interrupt(self.search_worker_ident)
+            return self.search_generation
+
+    def _submit_search(self, section, generation):
+        """Pasa la búsqueda al worker una vez vencido el debounce."""
+        state = (section, self.active_filter, self.search_query)
+        self.search_executor.submit(self._run_search, generation, state)
+
+    def _run_search(self, generation, state):
+        """Se ejecuta en el hilo del worker; descarta resultados que ya no son los últimos."""
+        section, active_filter, search_query = state
+        with self.search_lock:
+            if generation != self.search_generation:
+                return
+            self.search_running = generation
+            self.search_worker_ident = threading.get_ident()
+        try:
+            data, next_key = self._fetch_list(section, active_filter, search_query)
+        finally:
+            with self.search_lock:
+                self.search_running = None
+
+        with self.search_lock:
+            if generation != self.search_generation or section != self.current_section:
+                return  # llegó otra pulsación (o cambió la sección) mientras consultábamos
+            self._apply_list(section, data, next_key)
 
     # --- ¡ARREGLO AQUÍ! ---
     def handle_filter_change(self, section, filter_type):
         """
         Manejador para los clics en los botones de filtro.
+        Como update_dynamic_list: solo se consulta la lista (las estadísticas
+        no dependen del filtro) y la vista cambia el botón activo y la lista
+        en su sitio, sin reconstruir la sección.
         """
+        self.cancel_pending_search()
         self.active_filter = filter_type
-        self.render()
+        data, self.next_page_key = self._fetch_list(section, filter_type, self.search_query)
+        if section != self.current_section or not self.view.update_filtered_list(section, filter_type, data):
+            self.render()
+
+
+    def handle_export(self, section):
+        """
+        Manejador del botón de exportar: vuelca la lista de la sección, con el
+        filtro y la búsqueda actuales, a un CSV en un hilo aparte.
+        """
+        if self.export_running or self.current_user_role != 'admin':
+            return
+        self.export_running = True
+        if section == 'sales':
+            filters = {"status_filter": self.active_filter, "search_query": self.search_query}
+        else:
+            filters = {"stock_filter": self.active_filter, "search_query": self.search_query}
+        threading.Thread(target=self._run_export, args=(section, filters), daemon=True).start()
 
+    def _run_export(self, section, filters):
+        try:
+            result = export.export_table(self.model, section, **filters)
+            message = f"{result['rows']:,} filas exportadas a {result['path']} ({result['rows_per_sec']:,} filas/s)"
+        except (OSError, sqlite3.Error) as e:
+            message = f"Error al exportar: {e}"
+        finally:
+            self.export_running = False
+        self.view.show_message(message)
 
     def handle_earnings_tab_change(self, tab_name):
         """
-        Manejador para cambiar entre 'semana' y 'mes' en ganancias.
+        Manejador para cambiar entre 'semana', 'mes' y 'análisis' en ganancias.
         """
         self.active_earnings_tab = tab_name
         self.render()
@@ -84,81 +265,139 @@ class AppController:
     def update_dynamic_list(self, section):
         """
         Pide datos filtrados al modelo y le dice a la vista que
-        actualice solo la lista de elementos.
-        (Esta función se usa ahora SOLO para la búsqueda)
+        actualice solo la lista de elementos (de forma síncrona).
         """
+        data, next_key = self._fetch_list(section, self.active_filter, self.search_query)
+        self._apply_list(section, data, next_key)
+
+    def _fetch_list(self, section, active_filter, search_query):
+        """Consulta la lista de una sección. Devuelve (datos, clave de la siguiente página)."""
+        if section == 'cashiers':
+            return self.model.get_cashiers(active_filter, search_query), None
+        elif section == 'maintenance':
+            return self.model.get_maintenance_tasks(search_query), None
+        elif section == 'inventory':
+            return self.model.get_inventory_page(active_filter, search_query)
+        elif section == 'sales':
+            return self.model.get_sales_page(active_filter, search_query)
+        return [], None
+
+    def _apply_list(self, section, data, next_key):
+        """Le dice a la vista que reemplace la lista de la sección."""
+        self.next_page_key = next_key
         if section == 'cashiers':
-            data = self.model.get_cashiers(self.active_filter, self.search_query)
             self.view.update_cashier_list(data)
         elif section == 'maintenance':
-            data = self.model.get_maintenance_tasks(self.search_query)
             self.view.update_maintenance_list(data)
         elif section == 'inventory':
-            data = self.model.get_inventory(self.active_filter, self.search_query)
             self.view.update_inventory_list(data)
         elif section == 'sales':
-            data = self.model.get_sales(self.active_filter, self.search_query)
             self.view.update_sales_list(data)
 
+    def handle_load_more(self, section):
+        """
+        Manejador para el scroll de las listas paginadas: cuando la vista llega
+        al final, pide la siguiente página al modelo y la añade a la lista.
+        """
+        if self.next_page_key is None or section != self.current_section:
+            return
+        if not self.page_load_lock.acquire(blocking=False):
+            return  # ya se está cargando una página
+        try:
+            state = (self.active_filter, self.search_query, self.next_page_key)
+            if section == 'inventory':
+                data, next_key = self.model.get_inventory_page(self.active_filter, self.search_query, after_key=self.next_page_key)
+            elif section == 'sales':
+                data, next_key = self.model.get_sales_page(self.active_filter, self.search_query, after_key=self.next_page_key)
+            else:
+                return
+            # Si el filtro o la búsqueda cambiaron mientras cargábamos, esta página ya no sirve
+            if state != (self.active_filter, self.search_query, self.next_page_key) or section != self.current_section:
+                return
+            self.next_page_key = next_key
+            if section == 'inventory':
+                self.view.append_inventory_list(data)
+            else:
+                self.view.append_sales_list(data)
+        finally:
+            self.page_load_lock.release()
+
     def render(self):
         """
-        Lógica principal de renderizado. Limpia la página y construye la
-        vista adecuada basándose en el estado actual de la aplicación.
+        Lógica principal de renderizado. Consulta los datos de la vista actual
+        y la muestra: las secciones ya construidas se reutilizan (AppView
+        las guarda por sección y rol) y solo se actualizan sus datos.
         """
-        self.page.controls.clear()
-        view_to_render = None
+        profile = self.render_profiler.begin(self.page)
+        try:
+            section, args = self._fetch_section() if self.is_logged_in else ("login", ())
+            profile.mark("fetch")
 
-        if not self.is_logged_in:
-            view_to_render = self.view.build_login_screen()
-        else:
-            section = self.current_section
-            if section is None:
-                stats = self.model.get_dashboard_stats()
-                view_to_render = self.view.build_dashboard(stats)
-            
-            elif section == "cashiers":
-                stats = self.model.get_cashier_stats()
-                # Al llamar a render(), los datos se obtienen aquí
-                data = self.model.get_cashiers(self.active_filter, self.search_query)
-                view_to_render = self.view.build_cashier_section(data, stats, self.active_filter)
-            
-            elif section == "maintenance":
-                if self.current_user_role == 'admin':
-                    stats = self.model.get_maintenance_stats()
-                    data = self.model.get_maintenance_tasks(self.search_query)
-                    view_to_render = self.view.build_maintenance_section(data, stats)
-                else:
-                    self.current_section = None 
-                    stats = self.model.get_dashboard_stats()
-                    view_to_render = self.view.build_dashboard(stats)
-            
-            elif section == "inventory":
-                stats = self.model.get_inventory_stats()
-                data = self.model.get_inventory(self.active_filter, self.search_query)
-                view_to_render = self.view.build_inventory_section(data, stats, self.active_filter)
-            
-            elif section == "sales":
-                stats = self.model.get_sales_stats()
-                data = self.model.get_sales(self.active_filter, self.search_query)
-                view_to_render = self.view.build_sales_section(data, stats, self.active_filter)
-
-            elif section == "earnings":
-                if self.current_user_role == 'admin':
-                    data = self.model.get_earnings_data()
-                    view_to_render = self.view.build_earnings_section(data, self.active_earnings_tab)
-                else:
-                    self.current_section = None 
-                    stats = self.model.get_dashboard_stats()
-                    view_to_render = self.view.build_dashboard(stats)
-
-        if view_to_render:
-            self.page.add(view_to_render)
-        self.page.update()
-
-def main(page: ft.Page):
+            view_to_render = self._build_section(section, args)
+            profile.mark("build")
+
+            if view_to_render:
+                self.view.mount(view_to_render)
+            else:
+                self.page.controls.clear()
+            self.page.update()
+            profile.mark("update")
+            profile.finish(section)
+        finally:
+            profile.restore()  # si el render falla, la página deja de medirse igual
+
+    def _fetch_section(self):
+        """
+        Pide al modelo los datos de la sección actual.
+        Devuelve (sección a construir, argumentos para su builder).
+        """
+        section = self.current_section
+        if section in ("maintenance", "earnings") and self.current_user_role != 'admin':
+            self.current_section = section = None
+
+        if section is None:
+            return section, (self.model.get_dashboard_stats(),)
+        elif section == "cashiers":
+            stats = self.model.get_cashier_stats()
+            data = self.model.get_cashiers(self.active_filter, self.search_query)
+            return section, (data, stats, self.active_filter)
+        elif section == "maintenance":
+            stats = self.model.get_maintenance_stats()
+            data = self.model.get_maintenance_tasks(self.search_query)
+            return section, (data, stats)
+        elif section == "inventory":
+            stats = self.model.get_inventory_stats()
+            data, self.next_page_key = self.model.get_inventory_page(self.active_filter, self.search_query)
+            return section, (data, stats, self.active_filter)
+        elif section == "sales":
+            stats = self.model.get_sales_stats()
+            data, self.next_page_key = self.model.get_sales_page(self.active_filter, self.search_query)
+            return section, (data, stats, self.active_filter)
+        elif section == "earnings":
+            data = self.model.get_earnings_data()
+            analytics = self.model.get_sales_analytics() if self.active_earnings_tab == "analysis" else None
+            return section, (data, self.active_earnings_tab, analytics)
+        return section, ()
+
+    def _build_section(self, section, args):
+        """Construye el árbol de controles de la sección con los datos ya consultados."""
+        builders = {
+            "login": self.view.build_login_screen,
+            None: self.view.build_dashboard,
+            "cashiers": self.view.build_cashier_section,
+            "maintenance": self.view.build_maintenance_section,
+            "inventory": self.view.build_inventory_section,
+            "sales": self.view.build_sales_section,
+            "earnings": self.view.build_earnings_section,
+        }
+        builder = builders.get(section)
+        return builder(*args) if builder else None
+
+def main(page: "ft.Page"):
     """Función de entrada de la aplicación Flet."""
+    from flet import ThemeMode
     page.title = "SuperMarket Pro"
-    page.theme_mode = ft.ThemeMode.DARK
+    page.theme_mode = ThemeMode.DARK
     page.bgcolor = "#000000" 
     page.padding = 0
       
@@ -167,8 +406,10 @@ def main(page: ft.Page):
     page.window_resizable = False
     page.update() 
     
-    app = AppController(page)
+    app = AppController(page, shared_model())
+    page.on_close = lambda e: app.close()  # la sesión web caducó
     app.start()
 
 if __name__ == "__main__":
-    ft.app(target=main, view=ft.AppView.FLET_APP)
\ No newline at end of file
+    from flet import AppView, app
+    app(target=main, view=AppView.FLET_APP)
\ No newline at end of file
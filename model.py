@@ -1,34 +1,419 @@
 # model.py
+import atexit
+import concurrent.futures
+import os
+import queue
 import sqlite3
 import hashlib
+import threading
+import time
+import re
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+from functools import partial
+
+import analytics
+import schema
+from cache import QueryCache, cached
+from instrumentation import QueryMetrics, SLOW_QUERY_MS, configure_slow_query_log, timed
+from sale_writer import SALE_COMMIT_TIMEOUT, SALE_SUBMIT_TIMEOUT, SaleWriter
 
 DB_FILE = "supermarket.db"
+PAGE_SIZE = 50  # Filas por página en las listas paginadas (ventas, inventario)
+STREAM_BATCH_SIZE = 1000  # Filas por fetchmany al recorrer una consulta en streaming (exportación)
+
+# --- Ganancias (calculadas desde las ventas, ver sales_daily/sales_weekly en schema.py) ---
+PROFIT_MARGIN = 0.30   # Margen de beneficio sobre las ventas completadas
+EARNINGS_WEEKS = 4     # Semanas de la vista "Mes" (y de la comparación para el crecimiento)
+DAY_LABELS = ("Lun", "Mar", "Mié", "Jue", "Vie", "Sáb", "Dom")
+
+# --- Agrupación de ventas por periodo (hora local, ver schema.SALES_BUCKET_SQL y get_sales_buckets) ---
+SALES_BUCKETS = {name: sql.format(row="s") for name, sql in schema.SALES_BUCKET_SQL.items()}
+
+# --- Configuración de las conexiones (se aplica una sola vez por conexión) ---
+POOL_PRUNE_THRESHOLD = 8          # Con tantas conexiones, se cierran las de hilos ya terminados
+STATEMENT_CACHE_SIZE = 256        # Sentencias preparadas que sqlite3 reutiliza por conexión
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",         # Lectores y escritor no se bloquean entre sí
+    "PRAGMA synchronous = NORMAL",       # Seguro con WAL y mucho más rápido que FULL
+    "PRAGMA cache_size = -32000",        # ~32 MB de caché de páginas
+    "PRAGMA mmap_size = 268435456",      # 256 MB mapeados en memoria
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA busy_timeout = 5000",        # Espera a otras terminales en vez de fallar
+)
+
+
+# --- Copia en memoria para las lecturas (opcional, se activa con SUPERMARKET_READ_SNAPSHOT=1) ---
+READ_SNAPSHOT = os.environ.get("SUPERMARKET_READ_SNAPSHOT") == "1"
+SNAPSHOT_REFRESH_SECONDS = 2.0    # Antigüedad máxima de la copia cuando otra terminal escribe
+
+# --- Filas de las listas (ver record_maker) ---
+RECORD_NAMES = {
+    "cashiers": "Cashier",
+    "maintenance_tasks": "MaintenanceTask",
+    "inventory": "Product",
+    "sales": "Sale",
+}
+_record_makers = {}  # (nombre, columnas) -> constructor
+_record_makers_lock = threading.Lock()
+
+# --- Modelos compartidos por todo el proceso (ver shared_model) ---
+_shared_models = {}  # ruta de la BD -> AppModel
+_shared_models_lock = threading.Lock()
+
+
+def record_maker(name, columns):
+    """
+    Devuelve una función que convierte una tupla de la BD en un registro con
+    nombre (namedtuple 'name' con esas columnas): sale.amount, product.stock...
+    Un registro es una tupla normal, sin objeto intermedio como sqlite3.Row,
+    y cada campo se lee por posición fija en lugar de buscar el nombre entre
+    las columnas. Se construye con tuple.__new__, así que map(maker, filas)
+    no ejecuta código Python por fila.
+    El tipo se crea una vez por (nombre, columnas) y se reutiliza.
+    """
+    key = (name, tuple(columns))
+    maker = _record_makers.get(key)
+    if maker is None:
+        with _record_makers_lock:
+            maker = _record_makers.get(key)
+            if maker is None:
+                record_type = namedtuple(name, key[1], rename=True)  # rename: columnas repetidas en un JOIN
+                maker = _record_makers[key] = partial(tuple.__new__, record_type)
+    return maker
+
+
+class ConnectionPool:
+    """
+    Pequeño pool de conexiones SQLite de larga vida.
+    Cada hilo obtiene siempre la misma conexión, que se configura una única vez
+    (WAL, caché, mmap) y conserva su caché de sentencias preparadas.
+    'init_db' se ejecuta una sola vez, con la primera conexión (p. ej. migraciones).
+    'on_connect' se llama con cada conexión nueva (p. ej. para instrumentarla).
+    No hay un máximo de conexiones: cada una pertenece a su hilo y los hilos
+    de Flet no terminan, así que esperar a que se libere una podría bloquear
+    para siempre. Al llegar a 'prune_threshold' conexiones, la siguiente
+    conexión nueva cierra antes las de hilos que ya terminaron.
+    """
+    def __init__(self, db_file, prune_threshold=POOL_PRUNE_THRESHOLD, init_db=None, on_connect=None):
+        self.db_file = db_file
+        self.prune_threshold = prune_threshold
+        self._init_db = init_db
+        self._on_connect = on_connect
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = {}  # ident del hilo -> conexión
+
+    def get(self):
+        """Devuelve la conexión del hilo actual, creándola si no existe."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+
+        conn = sqlite3.connect(self.db_file, check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
+        conn.row_factory = sqlite3.Row
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+
+        with self._lock:
+            if self._init_db is not None:
+                try:
+                    self._init_db(conn)
+                except sqlite3.Error:
+                    conn.close()
+                    raise
+                self._init_db = None
+            if self._on_connect is not None:
+                self._on_connect(conn)
+            if len(self._connections) >= self.prune_threshold:
+                self._prune_dead_threads()
+            stale = self._connections.pop(threading.get_ident(), None)  # ident reutilizado
+            if stale is not None:
+                stale.close()
+            self._connections[threading.get_ident()] = conn
+        self._local.conn = conn
+        return conn
+
+    def _prune_dead_threads(self):
+        """Cierra las conexiones de hilos que ya terminaron. Requiere tener el lock."""
+        alive = {t.ident for t in threading.enumerate()}
+        for ident in [i for i in self._connections if i not in alive]:
+            self._connections.pop(ident).close()
+
+    def interrupt(self, thread_ident):
+        """Interrumpe la sentencia en curso de la conexión de otro hilo (si la hay)."""
+        with self._lock:
+            conn = self._connections.get(thread_ident)
+        if conn is not None:
+            conn.interrupt()
+
+    def close_all(self):
+        """Cierra todas las conexiones del pool (al salir de la aplicación)."""
+        with self._lock:
+            for conn in self._connections.values():
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+
+class ReadSnapshot:
+    """
+    Copia en memoria de la BD a la que van todas las lecturas, para que las
+    pantallas no compitan con las escrituras de las cajas por el archivo.
+    La copia se hace con la API de backup de sqlite3. Cada 'refresh_interval'
+    segundos, la siguiente lectura mira si la BD en disco cambió (PRAGMA
+    data_version de una conexión propia) y, si es así, la rehace en un hilo
+    aparte mientras se sigue leyendo la anterior. Solo esperan los lectores
+    en la primera copia y tras expire(), que usan las escrituras del propio
+    modelo para que la siguiente lectura ya las vea.
+    Cada refresco crea una BD en memoria nueva y la cambia por la anterior de
+    golpe: quien estaba leyendo la anterior termina sobre ella.
+    """
+    def __init__(self, pool, refresh_interval=SNAPSHOT_REFRESH_SECONDS, on_connect=None):
+        self.pool = pool
+        self.refresh_interval = refresh_interval
+        self._on_connect = on_connect
+        self._refresh_lock = threading.Lock()
+        self._source = None           # Conexión a disco solo para detectar cambios y copiar
+        self._conn = None             # Copia en memoria vigente (compartida entre hilos)
+        self._data_version = None     # data_version del origen al hacer la copia
+        self._checked_at = 0.0
+        self._expired = False
+        self._refreshing = False      # Hay un refresco en segundo plano en marcha
+        self.refreshes = 0
+        self.last_refresh_ms = 0.0
+
+    def get(self):
+        """Devuelve la conexión a la copia vigente, refrescándola si toca."""
+        conn = self._conn
+        if conn is not None and not self._expired and time.monotonic() - self._checked_at < self.refresh_interval:
+            return conn
+
+        if conn is None or self._expired:
+            with self._refresh_lock:
+                if self._conn is None or self._expired:
+                    self._refresh()
+            return self._conn
+
+        # Toca comprobar: si otro hilo ya lo está haciendo, se sigue con la copia actual
+        if self._refresh_lock.acquire(blocking=False):
+            try:
+                self._checked_at = time.monotonic()
+                if not self._refreshing and self._source_changed():
+                    self._refreshing = True
+                    threading.Thread(target=self._refresh_in_background, name="read-snapshot", daemon=True).start()
+            finally:
+                self._refresh_lock.release()
+        return conn
+
+    def expire(self):
+        self._expired = True
+
+    def _refresh_in_background(self):
+        try:
+            with self._refresh_lock:
+                if self._source is not None:  # no se cerró entre tanto
+                    self._refresh()
+        except sqlite3.Error as e:
+            print(f"Error al refrescar la copia en memoria de la BD: {e}")
+        finally:
+            self._refreshing = False
+
+    def _source_changed(self):
+        return self._source.execute("PRAGMA data_version").fetchone()[0] != self._data_version
+
+    def _refresh(self):
+        """Copia la BD entera a una BD en memoria nueva. Requiere tener _refresh_lock."""
+        start = time.perf_counter()
+        if self._source is None:
+            self.pool.get()  # la primera conexión del pool aplica las migraciones
+            self._source = sqlite3.connect(self.pool.db_file, check_same_thread=False)
+            self._source.execute("PRAGMA busy_timeout = 5000")
+
+        self._expired = False
+        self._data_version = self._source.execute("PRAGMA data_version").fetchone()[0]
+        snapshot = sqlite3.connect(":memory:", check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
+        try:
+            self._source.backup(snapshot)
+            snapshot.execute("PRAGMA query_only = 1")  # las escrituras van siempre a disco
+        except sqlite3.Error:
+            snapshot.close()
+            raise
+        snapshot.row_factory = sqlite3.Row
+        if self._on_connect is not None:
+            self._on_connect(snapshot)
+
+        self._conn = snapshot  # la anterior se cierra sola cuando nadie la usa
+        self._checked_at = time.monotonic()
+        self.refreshes += 1
+        self.last_refresh_ms = (time.perf_counter() - start) * 1000
+
+    def stats(self):
+        return {
+            "refreshes": self.refreshes,
+            "last_refresh_ms": round(self.last_refresh_ms, 3),
+            "age_s": round(time.monotonic() - self._checked_at, 3) if self._conn is not None else None,
+        }
+
+    def close(self):
+        with self._refresh_lock:
+            for conn in (self._conn, self._source):
+                if conn is not None:
+                    conn.close()
+            self._conn = self._source = None
+
 
 class AppModel:
     """
     Maneja todos los datos de la aplicación y la lógica de negocio.
-    Ahora se conecta a una base de datos SQLite.
+    Ahora se conecta a una base de datos SQLite a través de un pool de
+    conexiones persistentes.
     """
-    def __init__(self):
-        self.db_file = DB_FILE
+    def __init__(self, db_file=DB_FILE, slow_query_ms=SLOW_QUERY_MS, read_snapshot=READ_SNAPSHOT):
+        self.db_file = db_file
+
+        # --- Métricas de consultas (tiempos, filas, consultas lentas) ---
+        self.metrics = QueryMetrics(slow_query_ms)
+        configure_slow_query_log()
+
+        self.pool = ConnectionPool(self.db_file, init_db=schema.migrate, on_connect=self.metrics.attach)
+        # --- Lecturas desde una copia en memoria (None: se lee del disco) ---
+        self.snapshot = ReadSnapshot(self.pool, on_connect=self.metrics.attach) if read_snapshot else None
+        # --- Ventas de las cajas: un único hilo escritor con group commit ---
+        self.sales_writer = SaleWriter(self.pool.get, on_commit=self._note_write)
+
+        # --- Caché de lecturas (None la desactiva) ---
+        self.cache = QueryCache()
+        self._version_state = threading.local()  # Últimas versiones de tablas vistas por cada hilo
+        self._local_writes = 0                    # Escrituras hechas por este modelo
 
     def _connect_db(self):
         """
-        Crea una conexión a la base de datos.
-        Usamos sqlite3.Row para que los resultados se comporten como diccionarios.
+        Devuelve la conexión persistente del hilo actual.
+        Usa sqlite3.Row (las estadísticas se leen como diccionarios); los
+        listados devuelven registros compactos, ver _fetch_records.
+        La conexión NO debe cerrarse al terminar: se reutiliza en la siguiente consulta.
+        Con el modo de copia en memoria activo, devuelve la de la copia (solo lectura).
         """
         try:
-            conn = sqlite3.connect(self.db_file)
-            conn.row_factory = sqlite3.Row 
-            return conn
+            if self.snapshot is not None:
+                return self.snapshot.get()
+            return self.pool.get()
         except sqlite3.Error as e:
             print(f"Error al conectar a la BD: {e}")
             return None
 
+    def close(self):
+        """Escribe las ventas pendientes y libera todas las conexiones del modelo."""
+        self.sales_writer.close()
+        if self.snapshot is not None:
+            self.snapshot.close()
+        self.pool.close_all()
+
+    def interrupt(self, thread_ident):
+        """
+        Cancela la consulta que esté ejecutando el hilo indicado (p. ej. una
+        búsqueda que ya quedó obsoleta). La consulta falla con 'interrupted'.
+        Con la copia en memoria no se hace nada: su conexión es compartida
+        entre hilos (interrumpirla cortaría las de todos) y las consultas
+        sobre ella son lo bastante cortas como para dejarlas terminar.
+        """
+        if self.snapshot is None:
+            self.pool.interrupt(thread_ident)
+
+    def _table_versions(self, tables):
+        """
+        Devuelve la versión actual de las tablas pedidas (tupla), o None si falla.
+        Solo se relee 'table_versions' cuando PRAGMA data_version indica que otra
+        conexión escribió, o cuando este modelo escribió; si no, no hay consulta.
+        """
+        conn = self._connect_db()
+        if not conn: return None
+
+        state = self._version_state
+        try:
+            data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+            if (getattr(state, "conn", None) is not conn
+                    or state.data_version != data_version
+                    or state.local_writes != self._local_writes):
+                local_writes = self._local_writes
+                state.versions = {row["name"]: row["version"] for row in conn.execute("SELECT name, version FROM table_versions")}
+                state.conn, state.data_version, state.local_writes = conn, data_version, local_writes
+        except sqlite3.Error as e:
+            self._report_error("_table_versions", e)
+            return None
+        return tuple(state.versions.get(table, 0) for table in tables)
+
+    def _note_write(self):
+        """Las escrituras del propio modelo no cambian su data_version: lo anotamos a mano."""
+        self._local_writes += 1
+        if self.snapshot is not None:
+            self.snapshot.expire()  # que la siguiente lectura ya la vea
+
+    def get_cache_stats(self):
+        """Aciertos, fallos y tamaño de la caché de lecturas."""
+        return self.cache.stats() if self.cache is not None else {}
+
+    def get_query_metrics(self):
+        """Tiempos, filas e histograma por método y por sentencia, más los contadores de la caché."""
+        metrics = self.metrics.snapshot()
+        metrics["cache"] = self.get_cache_stats()
+        if self.snapshot is not None:
+            metrics["snapshot"] = self.snapshot.stats()
+        metrics["sales_writer"] = self.sales_writer.stats()
+        return metrics
+
+    def dump_query_metrics(self, path=None):
+        """Vuelca las métricas a un JSON (por defecto query_metrics.json). Devuelve la ruta o None."""
+        return self.metrics.dump(path) if path else self.metrics.dump()
+
+    def _report_error(self, method_name, e):
+        """Informa de un error de BD; una consulta cancelada a propósito no es un error."""
+        if isinstance(e, sqlite3.OperationalError) and str(e) == "interrupted":
+            return
+        print(f"Error en {method_name}: {e}")
+        self.metrics.record_error(method_name, e)
+
+    @staticmethod
+    def _fts_match(search_query):
+        """
+        Convierte el texto de búsqueda en una consulta FTS5 de prefijos:
+        "caja 0" -> '"caja"* "0"*' (todas las palabras, cada una como prefijo).
+        Devuelve None si no hay nada que buscar.
+        """
+        terms = re.findall(r"\w+", search_query or "")
+        if not terms:
+            return None
+        return " ".join(f'"{term}"*' for term in terms)
+
+    @staticmethod
+    def _epoch(value):
+        """
+        Convierte un límite de rango a segundos Unix: date (medianoche local),
+        datetime, texto ISO ('2025-10-08' o '2025-10-08 14:30') o un número.
+        """
+        if value is None or isinstance(value, (int, float)):
+            return value
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value) if len(value) > 10 else date.fromisoformat(value)
+        if not isinstance(value, datetime):
+            value = datetime.combine(value, datetime.min.time())
+        return int(value.timestamp())
+
+    def _add_time_range(self, where_clauses, params, start, end):
+        """Añade el filtro [start, end) sobre sales.sold_at (usa idx_sales_sold_at)."""
+        if start is not None:
+            where_clauses.append("s.sold_at >= ?")
+            params.append(self._epoch(start))
+        if end is not None:
+            where_clauses.append("s.sold_at < ?")
+            params.append(self._epoch(end))
+
     def hash_password(self, password):
         """Genera un hash SHA-256 seguro para la contraseña."""
         return hashlib.sha256(password.encode()).hexdigest()
 
+    @timed
     def authenticate(self, username, password):
         """
         Lógica de autenticación real.
@@ -56,31 +441,65 @@ class AppModel:
                 return None 
                 
         except sqlite3.Error as e:
-            print(f"Error en authenticate: {e}")
+            self._report_error("authenticate", e)
             return None
-        finally:
-            if conn: conn.close()
 
+    @staticmethod
+    def _earnings_window(today):
+        """
+        Fechas (ISO) que delimitan las ganancias: el lunes de esta semana, el
+        primer lunes de las últimas EARNINGS_WEEKS semanas y el de las
+        EARNINGS_WEEKS anteriores (con las que se compara el crecimiento).
+        """
+        monday = date.fromisoformat(today) - timedelta(days=date.fromisoformat(today).weekday())
+        recent = monday - timedelta(weeks=EARNINGS_WEEKS - 1)
+        previous = recent - timedelta(weeks=EARNINGS_WEEKS)
+        return {"today": today, "monday": monday.isoformat(), "recent": recent.isoformat(), "previous": previous.isoformat()}
+
+    @staticmethod
+    def _growth(total, previous_total):
+        """Crecimiento porcentual (entero) respecto al periodo anterior."""
+        return round((total - previous_total) * 100 / previous_total) if previous_total else 0
+
+    @timed
     def get_dashboard_stats(self):
-        """Obtiene las estadísticas del dashboard desde la BD."""
+        """
+        Obtiene las estadísticas del dashboard desde la BD.
+        Una sola sentencia (un viaje a la BD) que recorre cada tabla una vez.
+        """
+        return self._get_dashboard_stats(date.today().isoformat())
+
+    @cached("maintenance_tasks", "cashiers", "sales", "inventory")
+    def _get_dashboard_stats(self, today):
         conn = self._connect_db()
         if not conn: return {}
-        
-        stats = {}
+
+        query = """
+        SELECT
+            (SELECT COUNT(*) FROM maintenance_tasks) AS maintenance_count,
+            (SELECT COUNT(*) FROM cashiers) AS total_cashiers,
+            (SELECT COUNT(*) FROM sales WHERE sold_at >= :day_start AND sold_at < :day_end) AS transactions_today,
+            (SELECT COUNT(*) FROM inventory WHERE stock <= min_stock) AS low_stock_count,
+            (SELECT COALESCE(SUM(amount) FILTER (WHERE week >= :recent), 0) FROM sales_weekly
+             WHERE week BETWEEN :previous AND :monday) AS recent_total,
+            (SELECT COALESCE(SUM(amount) FILTER (WHERE week < :recent), 0) FROM sales_weekly
+             WHERE week BETWEEN :previous AND :monday) AS previous_total
+        """
+        day = date.fromisoformat(today)
+        params = self._earnings_window(today)
+        params.update(day_start=self._epoch(day), day_end=self._epoch(day + timedelta(days=1)))
         try:
-            stats["maintenance_count"] = conn.execute("SELECT COUNT(*) FROM maintenance_tasks").fetchone()[0]
-            stats["total_cashiers"] = conn.execute("SELECT COUNT(*) FROM cashiers").fetchone()[0]
-            stats["transactions_today"] = conn.execute("SELECT COUNT(*) FROM sales").fetchone()[0]
-            stats["low_stock_count"] = conn.execute("SELECT COUNT(*) FROM inventory WHERE stock <= min_stock").fetchone()[0]
-            stats["month_growth"] = conn.execute("SELECT growth FROM month_stats").fetchone()["growth"]
+            stats = dict(conn.execute(query, params).fetchone())
+            # recent_total/previous_total se quedan para poder sumar tiendas (ver federation.py)
+            stats["month_growth"] = self._growth(stats["recent_total"], stats["previous_total"])
         except sqlite3.Error as e:
-            print(f"Error en get_dashboard_stats: {e}")
+            self._report_error("get_dashboard_stats", e)
             return {}
-        finally:
-            if conn: conn.close()
             
         return stats
 
+    @timed
+    @cached("cashiers")
     def get_cashiers(self, status_filter="all", search_query=""):
         """Filtra y devuelve las cajas desde la BD."""
         conn = self._connect_db()
@@ -103,41 +522,44 @@ class AppModel:
             query += " WHERE " + " AND ".join(where_clauses)
             
         try:
-            data = conn.execute(query, params).fetchall()
+            data = self._fetch_records(conn, "cashiers", query, params)
         except sqlite3.Error as e:
-            print(f"Error en get_cashiers: {e}")
+            self._report_error("get_cashiers", e)
             data = []
-        finally:
-            if conn: conn.close()
             
         return data
 
+    @timed
+    @cached("cashiers")
     def get_cashier_stats(self):
-        """Calcula y devuelve estadísticas de las cajas desde la BD."""
+        """Calcula y devuelve estadísticas de las cajas desde la BD en una sola pasada."""
         conn = self._connect_db()
         if not conn: return {}
         
-        stats = {"open": 0, "closed": 0, "maintenance": 0}
+        query = """
+        SELECT
+            COALESCE(SUM(status = 'open'), 0) AS open,
+            COALESCE(SUM(status = 'closed'), 0) AS closed,
+            COALESCE(SUM(status = 'maintenance'), 0) AS maintenance,
+            COALESCE(SUM(sales), 0) AS total_sales,
+            COUNT(*) AS total_cashiers
+        FROM cashiers
+        """
         try:
-            query = "SELECT status, COUNT(*) as count FROM cashiers GROUP BY status"
-            status_counts = conn.execute(query).fetchall()
-            
-            for row in status_counts:
-                if row["status"] in stats:
-                    stats[row["status"]] = row["count"]
-
-            stats["total_sales"] = conn.execute("SELECT SUM(sales) FROM cashiers").fetchone()[0] or 0
-            stats["total_cashiers"] = sum(stats.values())
+            stats = dict(conn.execute(query).fetchone())
         except sqlite3.Error as e:
-            print(f"Error en get_cashier_stats: {e}")
+            self._report_error("get_cashier_stats", e)
             return {}
-        finally:
-            if conn: conn.close()
             
         return stats
     
+    @timed
+    @cached("maintenance_tasks", "cashiers")
     def get_maintenance_tasks(self, search_query=""):
-        """Filtra y devuelve las tareas de mantenimiento desde la BD."""
+        """
+        Filtra y devuelve las tareas de mantenimiento desde la BD.
+        La búsqueda usa el índice maintenance_fts (incluye el nombre de la caja).
+        """
         conn = self._connect_db()
         if not conn: return []
 
@@ -148,155 +570,423 @@ class AppModel:
         """
         params = []
         
-        if search_query:
-            like_query = f"%{search_query.lower()}%"
-            query += """
-            WHERE lower(c.name) LIKE ?
-               OR lower(mt.issue) LIKE ?
-               OR lower(mt.details) LIKE ?
-               OR lower(mt.reported_by) LIKE ?
+        match = self._fts_match(search_query)
+        if match:
+            query = """
+            SELECT mt.*, c.name
+            FROM maintenance_fts
+            JOIN maintenance_tasks mt ON mt.id = maintenance_fts.rowid
+            JOIN cashiers c ON mt.cashier_id = c.id
+            WHERE maintenance_fts MATCH ?
+            ORDER BY maintenance_fts.rank
             """
-            params.extend([like_query, like_query, like_query, like_query])
+            params.append(match)
             
         try:
-            data = conn.execute(query, params).fetchall()
+            data = self._fetch_records(conn, "maintenance_tasks", query, params)
         except sqlite3.Error as e:
-            print(f"Error en get_maintenance_tasks: {e}")
+            self._report_error("get_maintenance_tasks", e)
             data = []
-        finally:
-            if conn: conn.close()
             
         return data
 
+    @timed
+    @cached("maintenance_tasks")
     def get_maintenance_stats(self):
-        """Obtiene estadísticas de mantenimiento desde la BD."""
+        """Obtiene estadísticas de mantenimiento desde la BD en una sola pasada."""
         conn = self._connect_db()
         if not conn: return {}
         
-        stats = {}
+        query = """
+        SELECT
+            COUNT(*) AS total,
+            COALESCE(SUM(priority = 'high'), 0) AS high_priority,
+            AVG(estimated_days) AS avg_days
+        FROM maintenance_tasks
+        """
         try:
-            stats["total"] = conn.execute("SELECT COUNT(*) FROM maintenance_tasks").fetchone()[0]
-            stats["high_priority"] = conn.execute("SELECT COUNT(*) FROM maintenance_tasks WHERE priority = 'high'").fetchone()[0]
-            avg_days_result = conn.execute("SELECT AVG(estimated_days) FROM maintenance_tasks").fetchone()[0]
-            stats["avg_days"] = round(avg_days_result) if avg_days_result else 0
+            stats = dict(conn.execute(query).fetchone())
+            stats["avg_days"] = round(stats["avg_days"]) if stats["avg_days"] else 0
         except sqlite3.Error as e:
-            print(f"Error en get_maintenance_stats: {e}")
+            self._report_error("get_maintenance_stats", e)
             return {}
-        finally:
-            if conn: conn.close()
             
         return stats
 
+    @timed
     def get_earnings_data(self):
-        """Obtiene los datos de ganancias desde las tablas de la BD."""
+        """
+        Obtiene las ganancias de hoy, de esta semana (por día) y de las últimas
+        EARNINGS_WEEKS semanas (por semana), calculadas desde las ventas
+        completadas. Lee solo los acumulados por día/semana, nunca la tabla de ventas.
+        """
+        return self._get_earnings_data(date.today().isoformat())
+
+    @cached("sales")
+    def _get_earnings_data(self, today):
         conn = self._connect_db()
         if not conn: return {}
-        
-        data = {}
+
+        window = self._earnings_window(today)
+        monday = date.fromisoformat(window["monday"])
         try:
-            data["today"] = conn.execute("SELECT * FROM today_earnings").fetchone()
-            data["week"] = conn.execute("SELECT * FROM daily_earnings").fetchall()
-            
-            month_stats = conn.execute("SELECT * FROM month_stats").fetchone()
-            month_weeks = conn.execute("SELECT * FROM weekly_earnings").fetchall()
-            
-            data["month"] = {
-                "total": month_stats["total"],
-                "profit": month_stats["profit"],
-                "growth": month_stats["growth"],
-                "weeks": month_weeks
-            }
+            days = {row["day"]: row for row in conn.execute(
+                "SELECT day, amount, transactions FROM sales_daily WHERE day BETWEEN ? AND ?",
+                (window["monday"], (monday + timedelta(days=6)).isoformat()),
+            )}
+            weeks = {row["week"]: row for row in conn.execute(
+                "SELECT week, amount, transactions FROM sales_weekly WHERE week BETWEEN ? AND ?",
+                (window["previous"], window["monday"]),
+            )}
         except sqlite3.Error as e:
-            print(f"Error en get_earnings_data: {e}")
+            self._report_error("get_earnings_data", e)
             return {}
-        finally:
-            if conn: conn.close()
-            
-        return data
 
-    def get_inventory(self, stock_filter="all", search_query=""):
-        """Filtra y devuelve los productos del inventario desde la BD."""
+        def bucket(row):
+            amount = round(row["amount"]) if row else 0
+            return {"amount": amount, "profit": round(amount * PROFIT_MARGIN), "transactions": row["transactions"] if row else 0}
+
+        week = [
+            {"day": label, **bucket(days.get((monday + timedelta(days=offset)).isoformat()))}
+            for offset, label in enumerate(DAY_LABELS)
+        ]
+
+        month_weeks, previous_total = [], 0
+        for offset in range(2 * EARNINGS_WEEKS - 1, -1, -1):
+            start = monday - timedelta(weeks=offset)
+            row = weeks.get(start.isoformat())
+            if offset >= EARNINGS_WEEKS:
+                previous_total += row["amount"] if row else 0
+            else:
+                month_weeks.append({"week": f"Semana del {start:%d/%m}", **bucket(row)})
+
+        today_row = bucket(days.get(today))
+        month_total = sum(w["amount"] for w in month_weeks)
+        return {
+            "today": {
+                "total": today_row["amount"],
+                "transactions": today_row["transactions"],
+                "avg": round(today_row["amount"] / today_row["transactions"]) if today_row["transactions"] else 0,
+            },
+            "week": week,
+            "month": {
+                "total": month_total,
+                "profit": round(month_total * PROFIT_MARGIN),
+                "growth": self._growth(month_total, round(previous_total)),
+                "weeks": month_weeks,
+            },
+        }
+
+    @timed
+    def get_sales_analytics(self):
+        """
+        Análisis de las ventas completadas de los últimos ANALYTICS_DAYS días
+        (percentiles del ticket, media móvil, mapa de calor, previsión...), ver
+        analytics.py. Devuelve {} si NumPy no está instalado.
+        """
+        return self._get_sales_analytics(date.today().isoformat())
+
+    @cached("sales")
+    def _get_sales_analytics(self, today):
+        if not analytics.AVAILABLE:
+            return {}
         conn = self._connect_db()
-        if not conn: return []
-        
-        query = "SELECT * FROM inventory"
+        if not conn: return {}
+
+        try:
+            return analytics.sales_analytics(conn, today)
+        except sqlite3.Error as e:
+            self._report_error("get_sales_analytics", e)
+            return {}
+
+    def _inventory_filter(self, stock_filter="all", search_query=""):
+        """
+        Partes comunes de las consultas de inventario: (SELECT ... FROM,
+        condiciones del WHERE, parámetros, ORDER BY por relevancia o "").
+        """
+        query = "SELECT i.* FROM inventory i"
         params = []
         where_clauses = []
+        order_by = ""
 
         if stock_filter == "low":
-            where_clauses.append("stock <= min_stock")
+            where_clauses.append("i.stock <= i.min_stock")
         elif stock_filter == "high":
-            where_clauses.append("stock > min_stock * 2")
-        
-        if search_query:
-            like_query = f"%{search_query.lower()}%"
-            where_clauses.append("(lower(name) LIKE ? OR lower(sku) LIKE ? OR lower(category) LIKE ?)")
-            params.extend([like_query, like_query, like_query])
+            where_clauses.append("i.stock > i.min_stock * 2")
         
+        match = self._fts_match(search_query)
+        if match:
+            query = "SELECT i.* FROM inventory_fts JOIN inventory i ON i.id = inventory_fts.rowid"
+            where_clauses.insert(0, "inventory_fts MATCH ?")
+            params.append(match)
+            order_by = " ORDER BY inventory_fts.rank"
+        return query, where_clauses, params, order_by
+
+    def _inventory_query(self, stock_filter="all", search_query=""):
+        """Consulta (SQL, parámetros) de get_inventory; la comparte con iter_inventory."""
+        query, where_clauses, params, order_by = self._inventory_filter(stock_filter, search_query)
         if where_clauses:
             query += " WHERE " + " AND ".join(where_clauses)
-            
+        return query + order_by, params
+
+    @timed
+    def get_inventory(self, stock_filter="all", search_query=""):
+        """
+        Filtra y devuelve los productos del inventario desde la BD.
+        La búsqueda usa el índice inventory_fts y ordena por relevancia.
+        """
+        conn = self._connect_db()
+        if not conn: return []
+
+        query, params = self._inventory_query(stock_filter, search_query)
         try:
-            data = conn.execute(query, params).fetchall()
+            data = self._fetch_records(conn, "inventory", query, params)
         except sqlite3.Error as e:
-            print(f"Error en get_inventory: {e}")
+            self._report_error("get_inventory", e)
             data = []
-        finally:
-            if conn: conn.close()
             
         return data
 
+    def iter_inventory(self, stock_filter="all", search_query="", batch_size=STREAM_BATCH_SIZE):
+        """Igual que get_inventory pero en streaming (ver _stream). Devuelve (columnas, filas)."""
+        return self._stream(*self._inventory_query(stock_filter, search_query), batch_size)
+
+    @timed
+    def get_inventory_page(self, stock_filter="all", search_query="", page_size=PAGE_SIZE, after_key=None, sort_by="name", descending=False):
+        """
+        Igual que get_inventory pero por páginas (paginación por clave).
+        sort_by: 'name' (clave nombre + id) o 'id'.
+        Devuelve (productos, next_key); pasar next_key como after_key da la siguiente página.
+        """
+        conn = self._connect_db()
+        if not conn: return [], None
+
+        # Mismo filtro que get_inventory; el orden lo pone la clave de paginación
+        query, where_clauses, params, _ = self._inventory_filter(stock_filter, search_query)
+        if sort_by == "id":
+            key_columns = [("i.id", "id")]
+        else:
+            key_columns = [("i.name", "name"), ("i.id", "id")]
+
+        try:
+            return self._keyset_page(conn, "inventory", query, where_clauses, params, key_columns, after_key, descending, page_size)
+        except sqlite3.Error as e:
+            self._report_error("get_inventory_page", e)
+            return [], None
+
+    def _keyset_page(self, conn, table, query, where_clauses, params, key_columns, after_key, descending, page_size):
+        """
+        Paginación por clave ("keyset"): en vez de OFFSET, continúa justo después
+        de la última clave vista, así cada página cuesta lo mismo sea la 1 o la 1000.
+        key_columns es una lista de (expresión SQL, nombre del campo en la fila).
+        Devuelve (registros de 'table', next_key); next_key es None en la última página.
+        """
+        where_clauses = list(where_clauses)
+        params = list(params)
+        if after_key is not None:
+            columns = ", ".join(expr for expr, _ in key_columns)
+            marks = ", ".join("?" for _ in key_columns)
+            where_clauses.append(f"({columns}) {'<' if descending else '>'} ({marks})")
+            params.extend(after_key)
+
+        if where_clauses:
+            query += " WHERE " + " AND ".join(where_clauses)
+        direction = "DESC" if descending else "ASC"
+        query += " ORDER BY " + ", ".join(f"{expr} {direction}" for expr, _ in key_columns) + " LIMIT ?"
+        params.append(page_size + 1)  # una fila extra para saber si hay más
+
+        rows = self._fetch_records(conn, table, query, params)
+        if len(rows) <= page_size:
+            return rows, None
+        rows = rows[:page_size]
+        return rows, tuple(getattr(rows[-1], field) for _, field in key_columns)
+
+    def _stream(self, query, params, batch_size):
+        """
+        Ejecuta la consulta y devuelve (nombres de columna, iterador de tuplas)
+        que lee de batch_size en batch_size con fetchmany: la memoria no depende
+        del tamaño de la tabla. A diferencia de los get_*, los errores se
+        propagan, para que una exportación a medias no parezca completa.
+        """
+        conn = self.pool.get()
+        cursor = conn.cursor()
+        cursor.row_factory = None  # tuplas: más ligeras que sqlite3.Row para volcar a archivo
+        cursor.execute(query, params)
+        columns = [d[0] for d in cursor.description]
+
+        def rows():
+            try:
+                while batch := cursor.fetchmany(batch_size):
+                    yield from batch
+            finally:
+                cursor.close()
+        return columns, rows()
+
+    @staticmethod
+    def _fetch_records(conn, table, query, params=()):
+        """
+        Ejecuta una consulta de listado y devuelve sus filas como registros de
+        'table' (ver record_maker) en lugar de sqlite3.Row.
+        sqlite3 crea un str nuevo por cada valor de texto aunque se repita
+        ('completed', 'Caja 03', 'Tarjeta'...), y eso es la mayor parte de la
+        memoria de un listado grande: las columnas de texto se pasan por un
+        diccionario para que los valores iguales compartan el mismo objeto.
+        Se procesa por columnas y en lotes para que todo ocurra en C (map, zip).
+        """
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        try:
+            cursor.execute(query, params)
+            make = record_maker(RECORD_NAMES[table], [d[0] for d in cursor.description])
+            records, shared = [], None
+            while batch := cursor.fetchmany(STREAM_BATCH_SIZE):
+                columns = list(zip(*batch))
+                if shared is None:
+                    shared = [{} if any(isinstance(v, str) for v in column) else None for column in columns]
+                columns = [column if values is None else map(values.setdefault, column, column)
+                           for values, column in zip(shared, columns)]
+                records.extend(map(make, zip(*columns)))
+            return records
+        finally:
+            cursor.close()
+
+    @timed
+    @cached("inventory")
     def get_inventory_stats(self):
-        """Obtiene estadísticas de inventario desde la BD."""
+        """Obtiene estadísticas de inventario desde la BD en una sola pasada."""
         conn = self._connect_db()
         if not conn: return {}
         
-        stats = {}
+        query = """
+        SELECT
+            COUNT(*) AS total_products,
+            COALESCE(SUM(stock <= min_stock), 0) AS low_stock_count,
+            COALESCE(SUM(stock > min_stock * 2), 0) AS high_stock_count,
+            COALESCE(SUM(stock * price), 0) AS total_value,
+            COALESCE(SUM(stock), 0) AS total_stock_units
+        FROM inventory
+        """
         try:
-            stats["total_products"] = conn.execute("SELECT COUNT(*) FROM inventory").fetchone()[0]
-            stats["low_stock_count"] = conn.execute("SELECT COUNT(*) FROM inventory WHERE stock <= min_stock").fetchone()[0]
-            stats["high_stock_count"] = conn.execute("SELECT COUNT(*) FROM inventory WHERE stock > min_stock * 2").fetchone()[0]
-            stats["total_value"] = conn.execute("SELECT SUM(stock * price) FROM inventory").fetchone()[0] or 0
-            stats["total_stock_units"] = conn.execute("SELECT SUM(stock) FROM inventory").fetchone()[0] or 0
+            stats = dict(conn.execute(query).fetchone())
         except sqlite3.Error as e:
-            print(f"Error en get_inventory_stats: {e}")
+            self._report_error("get_inventory_stats", e)
             return {}
-        finally:
-            if conn: conn.close()
             
         return stats
 
-    def get_sales(self, status_filter="all", search_query=""):
-        """Filtra y devuelve las ventas desde la BD."""
-        conn = self._connect_db()
-        if not conn: return []
-        
-        query = "SELECT * FROM sales"
+    def _sales_query(self, status_filter="all", search_query="", start=None, end=None):
+        """Consulta (SQL, parámetros) de get_sales; la comparte con iter_sales."""
+        query = "SELECT s.* FROM sales s"
         params = []
         where_clauses = []
+        order_by = ""
+
+        match = self._fts_match(search_query)
+        if match:
+            query = "SELECT s.* FROM sales_fts JOIN sales s ON s.id = sales_fts.rowid"
+            where_clauses.append("sales_fts MATCH ?")
+            params.append(match)
+            order_by = " ORDER BY sales_fts.rank"
 
         if status_filter != "all":
-            where_clauses.append("status = ?")
+            where_clauses.append("s.status = ?")
             params.append(status_filter)
-        
-        if search_query:
-            like_query = f"%{search_query.lower()}%"
-            where_clauses.append("(lower(cashier) LIKE ? OR lower(customer) LIKE ? OR CAST(id AS TEXT) LIKE ?)")
-            params.extend([like_query, like_query, like_query])
+        self._add_time_range(where_clauses, params, start, end)
         
         if where_clauses:
             query += " WHERE " + " AND ".join(where_clauses)
-            
+        return query + order_by, params
+
+    @timed
+    def get_sales(self, status_filter="all", search_query="", start=None, end=None):
+        """
+        Filtra y devuelve las ventas desde la BD.
+        La búsqueda (ID, caja o cliente) usa el índice sales_fts y ordena por relevancia.
+        start/end limitan las ventas a [start, end) (ver _epoch para los formatos).
+        """
+        conn = self._connect_db()
+        if not conn: return []
+
+        query, params = self._sales_query(status_filter, search_query, start, end)
         try:
-            data = conn.execute(query, params).fetchall()
+            data = self._fetch_records(conn, "sales", query, params)
         except sqlite3.Error as e:
-            print(f"Error en get_sales: {e}")
+            self._report_error("get_sales", e)
             data = []
-        finally:
-            if conn: conn.close()
             
         return data
 
+    def iter_sales(self, status_filter="all", search_query="", start=None, end=None, batch_size=STREAM_BATCH_SIZE):
+        """Igual que get_sales pero en streaming (ver _stream). Devuelve (columnas, filas)."""
+        return self._stream(*self._sales_query(status_filter, search_query, start, end), batch_size)
+
+    @timed
+    def get_sales_page(self, status_filter="all", search_query="", page_size=PAGE_SIZE, after_key=None, descending=True, start=None, end=None):
+        """
+        Igual que get_sales pero por páginas, ordenadas por ID (por defecto las
+        más recientes primero). Con start/end se limitan a [start, end) y se
+        ordenan por fecha de venta.
+        Devuelve (ventas, next_key); pasar next_key como after_key da la siguiente página.
+        """
+        conn = self._connect_db()
+        if not conn: return [], None
+
+        query = "SELECT s.* FROM sales s"
+        params = []
+        where_clauses = []
+        key_columns = [("s.id", "id")]
+
+        match = self._fts_match(search_query)
+        if match:
+            query = "SELECT s.* FROM sales_fts JOIN sales s ON s.id = sales_fts.rowid"
+            where_clauses.append("sales_fts MATCH ?")
+            params.append(match)
+            key_columns = [("sales_fts.rowid", "id")]  # el índice FTS recorre por rowid directamente
+
+        if status_filter != "all":
+            where_clauses.append("s.status = ?")
+            params.append(status_filter)
+        self._add_time_range(where_clauses, params, start, end)
+        if not match and (start is not None or end is not None):
+            key_columns = [("s.sold_at", "sold_at"), ("s.id", "id")]  # recorre idx_sales_sold_at en orden
+
+        try:
+            return self._keyset_page(conn, "sales", query, where_clauses, params, key_columns, after_key, descending, page_size)
+        except sqlite3.Error as e:
+            self._report_error("get_sales_page", e)
+            return [], None
+
+    @timed
+    @cached("sales")
+    def get_sales_buckets(self, start, end, bucket="day", status_filter="completed"):
+        """
+        Ventas de [start, end) agrupadas por 'hour', 'day' o 'week' (hora local).
+        Recorre solo ese rango de idx_sales_sold_at. Devuelve una lista de
+        {"bucket", "transactions", "amount"} en orden cronológico, sin los periodos vacíos.
+        """
+        conn = self._connect_db()
+        if not conn: return []
+
+        where_clauses, params = [], []
+        if status_filter != "all":
+            where_clauses.append("s.status = ?")
+            params.append(status_filter)
+        self._add_time_range(where_clauses, params, start, end)
+
+        query = f"SELECT {SALES_BUCKETS[bucket]} AS bucket, COUNT(*) AS transactions, ROUND(COALESCE(SUM(s.amount), 0), 2) AS amount FROM sales s"
+        if where_clauses:
+            query += " WHERE " + " AND ".join(where_clauses)
+        query += " GROUP BY 1 ORDER BY 1"
+        try:
+            data = [dict(row) for row in conn.execute(query, params)]
+        except sqlite3.Error as e:
+            self._report_error("get_sales_buckets", e)
+            data = []
+
+        return data
+
+    @timed
+    @cached("sales")
     def get_sales_stats(self):
         """Obtiene estadísticas de ventas desde la BD."""
         conn = self._connect_db()
@@ -318,9 +1008,132 @@ class AppModel:
                     stats["total_all"] += row["count"]
                 
         except sqlite3.Error as e:
-            print(f"Error en get_sales_stats: {e}")
+            self._report_error("get_sales_stats", e)
             return {}
-        finally:
-            if conn: conn.close()
             
-        return stats
\ No newline at end of file
+        return stats
+
+    def submit_sale(self, cashier, lines, payment=None, customer=None, status="completed", amount=None, timeout=SALE_SUBMIT_TIMEOUT):
+        """
+        Encola una venta sin esperar a que se escriba (ver sale_writer.py).
+        Devuelve un Future con el id de la venta; lanza queue.Full si la cola
+        sigue llena tras 'timeout' segundos y ValueError si la venta no es válida.
+        """
+        return self.sales_writer.submit(cashier, lines, payment, customer, status, amount, timeout)
+
+    @timed
+    def record_sale(self, cashier, lines, payment=None, customer=None, status="completed", amount=None,
+                    timeout=SALE_SUBMIT_TIMEOUT, commit_timeout=SALE_COMMIT_TIMEOUT):
+        """
+        Registra una venta de una caja: la inserta y, si está completada, suma
+        una venta a la caja y descuenta del stock las cantidades de 'lines'
+        ([(sku, cantidad), ...]), todo en la misma transacción. Si amount es
+        None se calcula con los precios del inventario. El stock puede quedar
+        negativo: la venta ya se hizo en caja y el descuadre tiene que verse
+        en el inventario.
+        Espera a que se confirme (las ventas concurrentes se agrupan en un solo
+        COMMIT) como mucho 'commit_timeout' segundos y devuelve su id, o None
+        si falla o no se confirma a tiempo (entonces se cancela si aún no se
+        estaba escribiendo).
+        """
+        try:
+            future = self.submit_sale(cashier, lines, payment, customer, status, amount, timeout)
+            return future.result(timeout=commit_timeout)
+        except queue.Full:
+            self._report_error("record_sale", RuntimeError("cola de ventas llena, inténtalo de nuevo"))
+        except concurrent.futures.TimeoutError:
+            written = "" if future.cancel() else " (puede que se escriba más tarde)"
+            self._report_error("record_sale", concurrent.futures.TimeoutError(f"la venta no se confirmó en {commit_timeout} s{written}"))
+        except (ValueError, sqlite3.Error) as e:
+            self._report_error("record_sale", e)
+        return None
+
+    @timed
+    def check_integrity(self, full=False):
+        """
+        Comprobaciones de la BD en disco (para cron o antes de una copia):
+          - sqlite: PRAGMA quick_check (integrity_check con full=True)
+          - foreign_keys: filas que apuntan a otras que no existen
+          - schema: todas las migraciones aplicadas
+          - fts: cada índice de búsqueda coincide con su tabla
+          - rollups: sales_daily/sales_weekly cuadran con las ventas
+        Devuelve [{"check", "ok", "detail"}, ...], o [] si no hay conexión.
+        """
+        try:
+            conn = self.pool.get()
+        except sqlite3.Error as e:
+            print(f"Error al conectar a la BD: {e}")
+            return []
+
+        results = []
+
+        def check(name, run):
+            try:
+                problems = run()
+            except sqlite3.Error as e:
+                problems = [str(e)]
+            results.append({"check": name, "ok": not problems, "detail": "; ".join(map(str, problems[:5])) or "ok"})
+
+        def sqlite_check():
+            rows = [row[0] for row in conn.execute("PRAGMA integrity_check" if full else "PRAGMA quick_check")]
+            return [] if rows == ["ok"] else rows
+
+        def foreign_keys():
+            return [f"{row[0]} rowid {row[1]} -> {row[2]}" for row in conn.execute("PRAGMA foreign_key_check")]
+
+        def schema_version():
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            return [] if version == len(schema.MIGRATIONS) else [f"versión {version} de {len(schema.MIGRATIONS)}"]
+
+        def fts_index(table):
+            def run():
+                # rank = 1: compara el índice con la tabla de contenido, no solo consigo mismo.
+                # Es un INSERT "de control" que no escribe nada; se deshace igualmente.
+                try:
+                    conn.execute(f"INSERT INTO {table}({table}, rank) VALUES ('integrity-check', 1)")
+                finally:
+                    if conn.in_transaction:
+                        conn.rollback()
+                return []
+            return run
+
+        def rollup(table, key, bucket):
+            def run():
+                expected = {row[0]: (row[1], row[2]) for row in conn.execute(
+                    f"SELECT {bucket}, SUM(s.amount), COUNT(*) FROM sales s "
+                    "WHERE s.status = 'completed' AND s.sold_at IS NOT NULL GROUP BY 1")}
+                problems = []
+                for period, amount, transactions in conn.execute(f"SELECT {key}, amount, transactions FROM {table}"):
+                    want_amount, want_transactions = expected.pop(period, (0.0, 0))
+                    if transactions != want_transactions or abs(amount - want_amount) > 0.01:
+                        problems.append(f"{period}: {transactions} ventas / {amount:.2f} (esperado {want_transactions} / {want_amount:.2f})")
+                problems.extend(f"{period}: falta en {table}" for period in expected)
+                return problems
+            return run
+
+        check("sqlite", sqlite_check)
+        check("foreign_keys", foreign_keys)
+        check("schema", schema_version)
+        for table in ("inventory_fts", "sales_fts", "maintenance_fts"):
+            check(f"fts:{table}", fts_index(table))
+        check("rollups:sales_daily", rollup("sales_daily", "day", SALES_BUCKETS["day"]))
+        check("rollups:sales_weekly", rollup("sales_weekly", "week", SALES_BUCKETS["week"]))
+        return results
+
+
+def shared_model(db_file=DB_FILE):
+    """
+    AppModel único del proceso para esa BD. Al servir la app por web, cada
+    sesión de Flet tiene su controlador y su vista, pero todas usan este
+    modelo: un pool de conexiones, una caché de lecturas y un escritor de
+    ventas para todas (y las consultas iguales a la vez se hacen una vez, ver
+    cache.py). Al salir del proceso se vuelcan sus métricas y se cierra.
+    """
+    key = os.path.abspath(db_file)
+    with _shared_models_lock:
+        model = _shared_models.get(key)
+        if model is None:
+            model = _shared_models[key] = AppModel(db_file)
+            atexit.register(model.close)
+            atexit.register(model.dump_query_metrics)  # métricas de consultas en query_metrics.json (antes que close)
+        return model
@@ -0,0 +1,225 @@
+# sale_writer.py
+"""
+Registro de ventas de las cajas con "group commit".
+
+Todas las ventas pasan por una cola acotada y las escribe un único hilo:
+cada vez que termina una transacción, mete en la siguiente todas las que se
+hayan acumulado mientras tanto (hasta GROUP_COMMIT_MAX). Así SQLite, que
+solo admite un escritor a la vez, paga un COMMIT por grupo en lugar de uno
+por venta, y las cajas no se pelean por el bloqueo de escritura.
+
+Dentro del grupo cada venta se valida por separado: si una falla (SKU o
+caja desconocidos), solo esa se rechaza y el resto del grupo se confirma.
+Si la cola está llena, quien envía espera hasta SALE_SUBMIT_TIMEOUT
+segundos y después recibe queue.Full (contrapresión: mejor avisar a la caja
+que acumular ventas sin límite en memoria). Si el hilo escritor falla (p. ej.
+no puede abrir la BD), las ventas encoladas reciben ese error y la siguiente
+venta arranca un hilo nuevo: nadie se queda esperando un Future que nunca
+se resolverá. Una venta cancelada antes de entrar en un grupo no se escribe.
+"""
+import queue
+import sqlite3
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from datetime import datetime
+
+from schema import SALE_STATUSES, ImmediateTransaction
+
+SALE_QUEUE_SIZE = 10_000        # Ventas pendientes como máximo
+SALE_SUBMIT_TIMEOUT = 2.0       # Segundos que espera una caja si la cola está llena
+SALE_COMMIT_TIMEOUT = 30.0      # Segundos que espera record_sale a que se confirme la venta
+GROUP_COMMIT_MAX = 1000         # Ventas por transacción como máximo
+SQL_IN_LIMIT = 500              # Parámetros por consulta IN (...) al leer los precios
+
+_STOP = object()
+
+
+class SaleWriter:
+    """
+    Hilo escritor de ventas. 'connect' devuelve la conexión a disco del hilo
+    que llama (AppModel.pool.get) y 'on_commit' se llama tras cada grupo
+    confirmado (AppModel._note_write).
+    """
+    def __init__(self, connect, on_commit=None, queue_size=SALE_QUEUE_SIZE, group_max=GROUP_COMMIT_MAX):
+        self._connect = connect
+        self._on_commit = on_commit
+        self.group_max = group_max
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._thread = None
+        # Contadores (ver stats)
+        self.committed = 0
+        self.failed = 0
+        self.groups = 0
+        self.largest_group = 0
+
+    def submit(self, cashier, lines, payment=None, customer=None, status="completed", amount=None, timeout=SALE_SUBMIT_TIMEOUT):
+        """
+        Encola una venta y devuelve un Future con su id cuando se confirme.
+        lines: [(sku, cantidad), ...]. Si amount es None, se calcula con los
+        precios del inventario. Lanza queue.Full si la cola sigue llena tras 'timeout'.
+        """
+        lines = [(sku, int(quantity)) for sku, quantity in lines]
+        if not lines or any(quantity <= 0 for _, quantity in lines):
+            raise ValueError("La venta necesita al menos una línea con cantidad positiva")
+        if status not in SALE_STATUSES:
+            raise ValueError(f"Estado de venta desconocido: {status}")
+
+        self._ensure_started()
+        future = Future()
+        self._queue.put((future, (cashier, lines, payment, customer, status, amount, time.time())), timeout=timeout)
+        return future
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                thread = threading.Thread(target=self._run, name="sale-writer", daemon=True)
+                thread.start()
+                self._thread = thread
+
+    def close(self, timeout=None):
+        """Escribe lo que quede en la cola y para el hilo."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def stats(self):
+        return {
+            "committed": self.committed,
+            "failed": self.failed,
+            "groups": self.groups,
+            "avg_group": round(self.committed / self.groups, 1) if self.groups else 0,
+            "largest_group": self.largest_group,
+            "pending": self.pending(),
+        }
+
+    # --- Hilo escritor ---
+    def _run(self):
+        try:
+            self._write_loop()
+        except Exception as e:  # el hilo no puede seguir: que las ventas encoladas no esperen para siempre
+            self._fail_pending(e)
+
+    def _fail_pending(self, error):
+        """Suelta este hilo (la siguiente venta arranca otro) y falla las ventas que quedan en la cola."""
+        with self._lock:
+            if self._thread is threading.current_thread():
+                self._thread = None
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not _STOP and item[0].set_running_or_notify_cancel():
+                item[0].set_exception(error)
+                self.failed += 1
+
+    def _write_loop(self):
+        conn = self._connect()
+        # Estas sentencias no pertenecen a ningún método medido del modelo:
+        # sin el callback de las métricas no se paga una llamada a Python por sentencia.
+        conn.set_trace_callback(None)
+        stopping = False
+        while not stopping:
+            group = [self._queue.get()]
+            while len(group) < self.group_max:
+                try:
+                    group.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if group[-1] is _STOP or _STOP in group:
+                stopping = True
+                group = [item for item in group if item is not _STOP]
+            if group:
+                self._write_group(conn, group)
+
+    def _write_group(self, conn, group):
+        """
+        Un grupo = una transacción. Los precios y las cajas del grupo se leen
+        con una consulta cada uno y el stock y los contadores de las cajas se
+        actualizan una vez por producto/caja con las cantidades sumadas, en vez
+        de una vez por línea. Solo las ventas 'completed' descuentan stock y
+        suman a su caja: las pendientes y las devoluciones se guardan sin
+        mover ninguno de los dos (como los acumulados de ganancias).
+        Cada venta sigue siendo atómica: si no vale, no se inserta ni cuenta
+        para los UPDATE; si su INSERT falla, SQLite deshace solo esa sentencia.
+        """
+        group = [(future, sale) for future, sale in group if future.set_running_or_notify_cancel()]
+        if not group:
+            return
+        skus = list({sku for _, sale in group for sku, _ in sale[1]})
+        names = list({sale[0] for _, sale in group})
+        results = []
+        stock, sales_per_cashier = Counter(), Counter()
+        try:
+            with ImmediateTransaction(conn):
+                products = {}
+                for i in range(0, len(skus), SQL_IN_LIMIT):
+                    chunk = skus[i:i + SQL_IN_LIMIT]
+                    products.update((sku, price) for sku, price in conn.execute(
+                        f"SELECT sku, price FROM inventory WHERE sku IN ({', '.join('?' * len(chunk))})", chunk))
+                cashiers = {name for name, in conn.execute(
+                    f"SELECT name FROM cashiers WHERE name IN ({', '.join('?' * len(names))})", names)}
+
+                for future, sale in group:
+                    try:
+                        sale_id = self._insert_sale(conn, products, cashiers, *sale)
+                    except (ValueError, sqlite3.Error) as e:  # la venta no vale: no se escribe
+                        results.append((future, None, e))
+                        continue
+                    results.append((future, sale_id, None))
+                    if sale[4] == "completed":
+                        for sku, quantity in sale[1]:
+                            stock[sku] += quantity
+                        sales_per_cashier[sale[0]] += 1
+
+                conn.executemany("UPDATE inventory SET stock = stock - ? WHERE sku = ?", ((q, sku) for sku, q in stock.items()))
+                conn.executemany("UPDATE cashiers SET sales = sales + ? WHERE name = ?", ((n, name) for name, n in sales_per_cashier.items()))
+        except Exception as e:  # falló la transacción entera (disco, bloqueo...)
+            for future, _ in group:
+                future.set_exception(e)
+            self.failed += len(group)
+            return
+
+        self.groups += 1
+        self.largest_group = max(self.largest_group, len(group))
+        if self._on_commit is not None:
+            self._on_commit()
+        for future, sale_id, error in results:
+            if error is None:
+                self.committed += 1
+                future.set_result(sale_id)
+            else:
+                self.failed += 1
+                future.set_exception(error)
+
+    @staticmethod
+    def _insert_sale(conn, products, cashiers, cashier, lines, payment, customer, status, amount, submitted_at):
+        """
+        Comprueba la venta contra los productos ({sku: precio}) y las cajas del
+        grupo y la inserta. Devuelve su id; el stock y la caja los actualiza _write_group.
+        """
+        if cashier not in cashiers:
+            raise ValueError(f"Caja desconocida: {cashier}")
+        total = 0.0
+        for sku, quantity in lines:
+            if sku not in products:
+                raise ValueError(f"SKU desconocido: {sku}")
+            total += products[sku] * quantity
+
+        sold_at = int(submitted_at)
+        cursor = conn.execute(
+            "INSERT INTO sales (cashier, amount, items, time, payment, customer, status, sold_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (cashier, round(total, 2) if amount is None else amount, sum(quantity for _, quantity in lines),
+             datetime.fromtimestamp(sold_at).strftime("%H:%M"), payment, customer, status, sold_at),
+        )
+        return cursor.lastrowid
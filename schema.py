@@ -0,0 +1,290 @@
+# schema.py
+"""
+Migraciones del esquema de la base de datos.
+
+database_setup.py crea las tablas base; todo lo que se añade después
+(índices de búsqueda, etc.) vive aquí como una lista de migraciones
+numeradas. PRAGMA user_version guarda cuál fue la última aplicada, así que
+tanto una BD recién creada como un supermarket.db antiguo quedan al día
+la primera vez que AppModel se conecta.
+"""
+import sqlite3
+
+# Estados posibles de una venta (sales.status); solo 'completed' cuenta para
+# las ganancias, el stock y el contador de ventas de cada caja.
+SALE_STATUSES = ("completed", "pending", "refunded")
+
+
+class ImmediateTransaction:
+    """
+    Transacción BEGIN IMMEDIATE controlada a mano (el bloqueo de escritura se
+    toma al empezar, no a mitad): COMMIT al salir, ROLLBACK si hubo una
+    excepción, y el isolation_level de la conexión vuelve a como estaba.
+    La usan migrate, el escritor de ventas y el importador.
+
+        with ImmediateTransaction(conn):
+            conn.execute(...)
+    """
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self._previous_isolation = self.conn.isolation_level
+        self.conn.isolation_level = None
+        try:
+            self.conn.execute("BEGIN IMMEDIATE")
+        except BaseException:
+            self.conn.isolation_level = self._previous_isolation
+            raise
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.conn.execute("COMMIT")
+        finally:
+            try:
+                if self.conn.in_transaction:  # hubo una excepción o falló el COMMIT
+                    self.conn.execute("ROLLBACK")
+            finally:
+                self.conn.isolation_level = self._previous_isolation
+
+# --- Migración 1: índices de texto completo (FTS5) para las búsquedas ---
+# Las tablas FTS son de "contenido externo": no duplican los datos, solo el
+# índice. Los triggers mantienen el índice sincronizado con cada tabla.
+SEARCH_INDEX_SQL = """
+CREATE VIEW IF NOT EXISTS sales_search_src AS
+    SELECT id, CAST(id AS TEXT) AS sale_id, cashier, customer FROM sales;
+
+CREATE VIEW IF NOT EXISTS maintenance_search_src AS
+    SELECT mt.id, c.name, mt.issue, mt.details, mt.reported_by
+    FROM maintenance_tasks mt JOIN cashiers c ON mt.cashier_id = c.id;
+
+CREATE VIRTUAL TABLE IF NOT EXISTS inventory_fts USING fts5(
+    name, sku, category,
+    content='inventory', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2', prefix='1 2 3'
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS sales_fts USING fts5(
+    sale_id, cashier, customer,
+    content='sales_search_src', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2', prefix='1 2 3'
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS maintenance_fts USING fts5(
+    name, issue, details, reported_by,
+    content='maintenance_search_src', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2', prefix='1 2 3'
+);
+
+-- inventory: solo los cambios de texto tocan el índice (no los de stock)
+CREATE TRIGGER IF NOT EXISTS inventory_fts_ai AFTER INSERT ON inventory BEGIN
+    INSERT INTO inventory_fts(rowid, name, sku, category) VALUES (new.id, new.name, new.sku, new.category);
+END;
+CREATE TRIGGER IF NOT EXISTS inventory_fts_ad AFTER DELETE ON inventory BEGIN
+    INSERT INTO inventory_fts(inventory_fts, rowid, name, sku, category) VALUES ('delete', old.id, old.name, old.sku, old.category);
+END;
+CREATE TRIGGER IF NOT EXISTS inventory_fts_au AFTER UPDATE OF id, name, sku, category ON inventory BEGIN
+    INSERT INTO inventory_fts(inventory_fts, rowid, name, sku, category) VALUES ('delete', old.id, old.name, old.sku, old.category);
+    INSERT INTO inventory_fts(rowid, name, sku, category) VALUES (new.id, new.name, new.sku, new.category);
+END;
+
+-- sales
+CREATE TRIGGER IF NOT EXISTS sales_fts_ai AFTER INSERT ON sales BEGIN
+    INSERT INTO sales_fts(rowid, sale_id, cashier, customer) VALUES (new.id, CAST(new.id AS TEXT), new.cashier, new.customer);
+END;
+CREATE TRIGGER IF NOT EXISTS sales_fts_ad AFTER DELETE ON sales BEGIN
+    INSERT INTO sales_fts(sales_fts, rowid, sale_id, cashier, customer) VALUES ('delete', old.id, CAST(old.id AS TEXT), old.cashier, old.customer);
+END;
+CREATE TRIGGER IF NOT EXISTS sales_fts_au AFTER UPDATE OF id, cashier, customer ON sales BEGIN
+    INSERT INTO sales_fts(sales_fts, rowid, sale_id, cashier, customer) VALUES ('delete', old.id, CAST(old.id AS TEXT), old.cashier, old.customer);
+    INSERT INTO sales_fts(rowid, sale_id, cashier, customer) VALUES (new.id, CAST(new.id AS TEXT), new.cashier, new.customer);
+END;
+
+-- maintenance_tasks (el índice incluye el nombre de la caja)
+CREATE TRIGGER IF NOT EXISTS maintenance_fts_ai AFTER INSERT ON maintenance_tasks BEGIN
+    INSERT INTO maintenance_fts(rowid, name, issue, details, reported_by)
+    SELECT new.id, c.name, new.issue, new.details, new.reported_by FROM cashiers c WHERE c.id = new.cashier_id;
+END;
+CREATE TRIGGER IF NOT EXISTS maintenance_fts_ad AFTER DELETE ON maintenance_tasks BEGIN
+    INSERT INTO maintenance_fts(maintenance_fts, rowid, name, issue, details, reported_by)
+    SELECT 'delete', old.id, c.name, old.issue, old.details, old.reported_by FROM cashiers c WHERE c.id = old.cashier_id;
+END;
+CREATE TRIGGER IF NOT EXISTS maintenance_fts_au AFTER UPDATE OF id, cashier_id, issue, details, reported_by ON maintenance_tasks BEGIN
+    INSERT INTO maintenance_fts(maintenance_fts, rowid, name, issue, details, reported_by)
+    SELECT 'delete', old.id, c.name, old.issue, old.details, old.reported_by FROM cashiers c WHERE c.id = old.cashier_id;
+    INSERT INTO maintenance_fts(rowid, name, issue, details, reported_by)
+    SELECT new.id, c.name, new.issue, new.details, new.reported_by FROM cashiers c WHERE c.id = new.cashier_id;
+END;
+
+-- cashiers: renombrar una caja reindexa sus tareas de mantenimiento
+CREATE TRIGGER IF NOT EXISTS cashiers_name_fts_au AFTER UPDATE OF name ON cashiers BEGIN
+    INSERT INTO maintenance_fts(maintenance_fts, rowid, name, issue, details, reported_by)
+    SELECT 'delete', mt.id, old.name, mt.issue, mt.details, mt.reported_by FROM maintenance_tasks mt WHERE mt.cashier_id = old.id;
+    INSERT INTO maintenance_fts(rowid, name, issue, details, reported_by)
+    SELECT mt.id, new.name, mt.issue, mt.details, mt.reported_by FROM maintenance_tasks mt WHERE mt.cashier_id = new.id;
+END;
+
+INSERT INTO inventory_fts(inventory_fts) VALUES ('rebuild');
+INSERT INTO sales_fts(sales_fts) VALUES ('rebuild');
+INSERT INTO maintenance_fts(maintenance_fts) VALUES ('rebuild');
+"""
+
+# --- Migración 2: índices para la paginación por clave de las listas ---
+PAGINATION_INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS idx_inventory_name_id ON inventory(name, id);
+CREATE INDEX IF NOT EXISTS idx_sales_status_id ON sales(status, id);
+"""
+
+# --- Migración 3: contadores de cambios por tabla (invalidan la caché de lecturas) ---
+VERSIONED_TABLES = (
+    "cashiers", "maintenance_tasks", "inventory", "sales", "users",
+    "today_earnings", "daily_earnings", "weekly_earnings", "month_stats",
+)
+
+
+def _table_versions_sql(tables):
+    """Genera la tabla table_versions y los triggers que suben la versión de cada tabla."""
+    sql = "CREATE TABLE IF NOT EXISTS table_versions (name TEXT PRIMARY KEY, version INTEGER NOT NULL DEFAULT 0) WITHOUT ROWID;\n"
+    for table in tables:
+        sql += f"INSERT OR IGNORE INTO table_versions (name) VALUES ('{table}');\n"
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            sql += (
+                f"CREATE TRIGGER IF NOT EXISTS {table}_version_{event.lower()} AFTER {event} ON {table} BEGIN\n"
+                f"    UPDATE table_versions SET version = version + 1 WHERE name = '{table}';\n"
+                f"END;\n"
+            )
+    return sql
+
+
+TABLE_VERSIONS_SQL = _table_versions_sql(VERSIONED_TABLES)
+
+# --- Migración 4: ganancias calculadas a partir de las ventas ---
+# sales.sold_at es el instante de la venta (segundos Unix). sales_daily y
+# sales_weekly acumulan las ventas completadas por día y por semana (que
+# empieza en lunes), en hora local; los triggers las mantienen al día en cada
+# alta, baja, cambio de importe/fecha o devolución, así que leer las ganancias
+# cuesta lo que el número de días/semanas pedidos, no lo que la tabla de ventas.
+# Las tablas antiguas (today_earnings, etc.) se conservan para las terminales
+# con versiones anteriores, pero el modelo ya no las lee.
+SALES_TIMESTAMP_BACKFILL_SQL = """
+UPDATE sales SET sold_at = COALESCE(
+    CAST(strftime('%s', date('now', 'localtime') || ' ' || time, 'utc') AS INTEGER),
+    CAST(strftime('%s', 'now') AS INTEGER)
+) WHERE sold_at IS NULL
+"""
+
+# Periodo de una venta (hora local) a partir de sold_at; {row} es la tabla o
+# alias de la venta ('new'/'old' en los triggers, 's' en el modelo). Los
+# triggers, la carga por conjuntos de importer.py, get_sales_buckets y la
+# comprobación de check_integrity salen todos de aquí, así que siempre cuadran.
+_LOCAL_TIME = "{row}.sold_at, 'unixepoch', 'localtime'"
+WEEK_START_MODIFIERS = "'-6 days', 'weekday 1'"  # De un día al lunes de su semana
+SALES_BUCKET_SQL = {
+    "hour": f"strftime('%Y-%m-%d %H:00', {_LOCAL_TIME})",
+    "day": f"date({_LOCAL_TIME})",
+    "week": f"date({_LOCAL_TIME}, {WEEK_START_MODIFIERS})",
+}
+WEEK_OF_DAY_SQL = f"date({{day}}, {WEEK_START_MODIFIERS})"  # Semana de un día ya agrupado ('YYYY-MM-DD')
+
+
+def _rollup_sql(table, key, bucket):
+    """Triggers que mantienen una tabla de acumulados (sales_daily o sales_weekly)."""
+    new, old = bucket.format(row="new"), bucket.format(row="old")
+    upsert = f"ON CONFLICT({key}) DO UPDATE SET amount = amount + excluded.amount, transactions = transactions + 1"
+    return f"""
+CREATE TABLE IF NOT EXISTS {table} (
+    {key} TEXT PRIMARY KEY,
+    amount REAL NOT NULL DEFAULT 0,
+    transactions INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+
+INSERT INTO {table} ({key}, amount, transactions)
+SELECT {bucket.format(row="sales")}, SUM(amount), COUNT(*) FROM sales
+WHERE status = 'completed' AND sold_at IS NOT NULL GROUP BY 1;
+
+CREATE TRIGGER IF NOT EXISTS {table}_ai AFTER INSERT ON sales
+WHEN new.status = 'completed' AND new.sold_at IS NOT NULL BEGIN
+    INSERT INTO {table} ({key}, amount, transactions) VALUES ({new}, new.amount, 1) {upsert};
+END;
+CREATE TRIGGER IF NOT EXISTS {table}_ad AFTER DELETE ON sales
+WHEN old.status = 'completed' AND old.sold_at IS NOT NULL BEGIN
+    UPDATE {table} SET amount = amount - old.amount, transactions = transactions - 1 WHERE {key} = {old};
+END;
+CREATE TRIGGER IF NOT EXISTS {table}_au AFTER UPDATE OF amount, status, sold_at ON sales BEGIN
+    UPDATE {table} SET amount = amount - old.amount, transactions = transactions - 1
+    WHERE {key} = {old} AND old.status = 'completed' AND old.sold_at IS NOT NULL;
+    INSERT INTO {table} ({key}, amount, transactions)
+    SELECT {new}, new.amount, 1 WHERE new.status = 'completed' AND new.sold_at IS NOT NULL {upsert};
+END;
+"""
+
+
+EARNINGS_ROLLUP_SQL = (_rollup_sql("sales_daily", "day", SALES_BUCKET_SQL["day"])
+                       + _rollup_sql("sales_weekly", "week", SALES_BUCKET_SQL["week"]))
+
+
+def _derive_earnings(conn):
+    """Añade sales.sold_at a las BDs antiguas (las ventas existentes quedan en el día de hoy) y crea los acumulados."""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(sales)")}
+    if "sold_at" not in columns:
+        conn.execute("ALTER TABLE sales ADD COLUMN sold_at INTEGER")
+        conn.execute(SALES_TIMESTAMP_BACKFILL_SQL)
+    for statement in _split_statements(EARNINGS_ROLLUP_SQL):
+        conn.execute(statement)
+
+
+# --- Migración 5: índice por fecha de venta ---
+# Incluye status y amount para que los recuentos y sumas de un rango de
+# fechas se resuelvan solo con el índice, sin leer las filas de sales.
+SALES_TIMESTAMP_INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS idx_sales_sold_at ON sales(sold_at, status, amount);
+"""
+
+# Migración N = MIGRATIONS[N - 1]. Solo se añaden al final, nunca se editan.
+# Cada una es un script SQL o una función que recibe la conexión.
+MIGRATIONS = [
+    SEARCH_INDEX_SQL,
+    PAGINATION_INDEX_SQL,
+    TABLE_VERSIONS_SQL,
+    _derive_earnings,
+    SALES_TIMESTAMP_INDEX_SQL,
+]
+
+
+def _split_statements(script):
+    """Divide un script SQL en sentencias completas (respeta los BEGIN...END de los triggers)."""
+    statements = []
+    current = ""
+    for line in script.splitlines(keepends=True):
+        if not current and (not line.strip() or line.lstrip().startswith("--")):
+            continue
+        current += line
+        if sqlite3.complete_statement(current):
+            statements.append(current.strip())
+            current = ""
+    return statements
+
+
+def migrate(conn):
+    """
+    Aplica las migraciones pendientes dentro de una transacción IMMEDIATE,
+    de modo que si varias terminales arrancan a la vez solo una las ejecuta.
+    Devuelve la versión final del esquema.
+    """
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version >= len(MIGRATIONS):
+        return version
+
+    with ImmediateTransaction(conn):
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for number in range(version + 1, len(MIGRATIONS) + 1):
+            migration = MIGRATIONS[number - 1]
+            if callable(migration):
+                migration(conn)
+            else:
+                for statement in _split_statements(migration):
+                    conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {number}")
+    return len(MIGRATIONS)
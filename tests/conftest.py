@@ -0,0 +1,18 @@
+# tests/conftest.py
+"""Fixtures comunes: cada test trabaja sobre una copia de supermarket.db."""
+import os
+import shutil
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def db_file(tmp_path):
+    """Copia de la BD de ejemplo en un directorio temporal (la del repo no se toca)."""
+    path = tmp_path / "supermarket.db"
+    shutil.copy(os.path.join(ROOT, "supermarket.db"), path)
+    return str(path)
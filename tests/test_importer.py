@@ -0,0 +1,71 @@
+# tests/test_importer.py
+from datetime import datetime
+
+from importer import import_csv
+from model import AppModel
+
+
+def write_csv(tmp_path, text):
+    path = tmp_path / "import.csv"
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def cashier_sales(model, name):
+    return next(c.sales for c in model.get_cashiers() if c.name == name)
+
+
+def test_only_completed_sales_count_for_the_cashier(db_file, tmp_path):
+    model = AppModel(db_file)
+    try:
+        name = model.get_cashiers()[0].name
+        before = cashier_sales(model, name)
+        path = write_csv(tmp_path, f"cashier,amount,status\n{name},5,refunded\n{name},6,pending\n{name},7,completed\n")
+        result = import_csv(model, "sales", path)
+        assert (result["inserted"], result["errors"]) == (3, 0)
+        assert cashier_sales(model, name) == before + 1
+    finally:
+        model.close()
+
+
+def imported_sales(model, count):
+    conn = model.pool.get()
+    return conn.execute("SELECT time, sold_at FROM sales ORDER BY id DESC LIMIT ?", (count,)).fetchall()[::-1]
+
+
+def test_blank_sold_at_is_derived_from_time(db_file, tmp_path):
+    model = AppModel(db_file)
+    try:
+        name = model.get_cashiers()[0].name
+        path = write_csv(tmp_path, f"cashier,amount,time,sold_at\n{name},5,09:30,\n{name},6,10:15,2025-10-08 10:15\n")
+        result = import_csv(model, "sales", path)
+        assert (result["inserted"], result["errors"]) == (2, 0)
+        (time_1, sold_at_1), row_2 = imported_sales(model, 2)
+        assert time_1 == "09:30" and datetime.fromtimestamp(sold_at_1).strftime("%H:%M") == "09:30"
+        assert tuple(row_2) == ("10:15", int(datetime(2025, 10, 8, 10, 15).timestamp()))
+    finally:
+        model.close()
+
+
+def test_blank_time_is_derived_from_sold_at(db_file, tmp_path):
+    model = AppModel(db_file)
+    try:
+        name = model.get_cashiers()[0].name
+        path = write_csv(tmp_path, f"cashier,amount,time,sold_at\n{name},5,,2025-10-08 14:32\n")
+        result = import_csv(model, "sales", path)
+        assert (result["inserted"], result["errors"]) == (1, 0)
+        assert tuple(imported_sales(model, 1)[0]) == ("14:32", int(datetime(2025, 10, 8, 14, 32).timestamp()))
+    finally:
+        model.close()
+
+
+def test_imported_sales_keep_the_earnings_rollups_in_step(db_file, tmp_path):
+    model = AppModel(db_file)
+    try:
+        name = model.get_cashiers()[0].name
+        rows = "".join(f"{name},{10 + day},2025-09-{day:02d} 23:30\n" for day in range(1, 15))
+        import_csv(model, "sales", write_csv(tmp_path, "cashier,amount,sold_at\n" + rows))
+        rollups = [r for r in model.check_integrity() if r["check"].startswith("rollups:")]
+        assert len(rollups) == 2 and all(r["ok"] for r in rollups), rollups
+    finally:
+        model.close()
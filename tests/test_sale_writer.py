@@ -0,0 +1,37 @@
+# tests/test_sale_writer.py
+import sqlite3
+import threading
+
+import pytest
+
+from model import AppModel
+from sale_writer import SaleWriter
+
+
+def test_pending_sales_fail_when_the_writer_cannot_start():
+    def connect():
+        raise sqlite3.OperationalError("unable to open database file")
+
+    writer = SaleWriter(connect)
+    future = writer.submit("Caja 01", [("SKU", 1)])
+    with pytest.raises(sqlite3.OperationalError):
+        future.result(timeout=5)
+    # El hilo caído se suelta: la siguiente venta arranca otro (y falla igual, sin colgarse)
+    with pytest.raises(sqlite3.OperationalError):
+        writer.submit("Caja 01", [("SKU", 1)]).result(timeout=5)
+
+
+def test_record_sale_gives_up_after_commit_timeout(db_file):
+    model = AppModel(db_file)
+    release = threading.Event()
+    model.sales_writer._connect = lambda: release.wait() or model.pool.get()  # escritor atascado
+    count_sales = "SELECT COUNT(*) FROM sales"
+    before = sqlite3.connect(db_file).execute(count_sales).fetchone()[0]
+    try:
+        cashier, sku = model.get_cashiers()[0].name, model.get_inventory()[0].sku
+        assert model.record_sale(cashier, [(sku, 1)], commit_timeout=0.2) is None
+        assert model.get_query_metrics()["methods"]["record_sale"]["errors"] == 1
+    finally:
+        release.set()
+        model.close()  # el escritor termina la cola: la venta cancelada no se escribe
+    assert sqlite3.connect(db_file).execute(count_sales).fetchone()[0] == before
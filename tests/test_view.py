@@ -0,0 +1,49 @@
+# tests/test_view.py
+import pytest
+
+pytest.importorskip("flet")
+
+from benchmarks.stub_page import make_stub_page
+from main import AppController
+from model import AppModel
+
+
+@pytest.fixture
+def admin_app(db_file):
+    model = AppModel(db_file)
+    app = AppController(make_stub_page(), model)
+    app.current_user_role = "admin"
+    yield app
+    app.close()
+    model.close()
+
+
+@pytest.mark.parametrize("growth, expected", [(12, "+12% este mes"), (0, "+0% este mes"), (-2, "-2% este mes")])
+def test_dashboard_growth_sign_comes_from_the_value(admin_app, growth, expected):
+    root = admin_app.view.build_dashboard({"month_growth": growth})
+    assert root.data["menu_stats"]["earnings"].value == expected
+
+
+def sent_commands(app, action):
+    conn = app.page.stub_connection
+    conn.reset_counters()
+    action()
+    return conn.commands_sent
+
+
+def test_relayout_only_updates_the_page_when_its_size_changed(admin_app):
+    admin_app.start()
+    assert sent_commands(admin_app, admin_app.view.relayout) == 0  # mismo tamaño que al montar
+    admin_app.page._set_attr("width", "500")
+    assert admin_app.view.relayout() is True
+    assert admin_app.view.relayout() is False
+
+
+def test_a_superseded_resize_timer_does_not_relayout(admin_app):
+    admin_app.start()
+    admin_app.handle_resize(None)
+    timer = admin_app.resize_timer
+    admin_app._relayout()  # como un temporizador que ya saltó cuando llegó el evento siguiente
+    assert admin_app.relayouts == 0
+    timer.join(1)
+    assert admin_app.relayouts == 1 and admin_app.resize_timer is None
@@ -1,7 +1,8 @@
 # view.py
 import flet as ft
-import random
-import math
+from datetime import date
+
+from model import DAY_LABELS
 
 # ============================================================================
 # COMPONENTES REUTILIZABLES (Nuevo Estilo Profesional Oscuro)
@@ -16,6 +17,8 @@ BUTTON_BORDER_COLOR = ft.Colors.BLUE_600   # Borde de botón
 TEXT_FIELD_BG_COLOR = ft.Colors.GREY_800   # Fondo de campos de texto
 TEXT_FIELD_BORDER_COLOR = ft.Colors.GREY_700 # Borde de campos de texto
 
+LOAD_MORE_THRESHOLD = 300  # Píxeles antes del final de una lista para pedir la siguiente página
+
 def create_solid_background():
     """Crea un fondo sólido de color negro."""
     return ft.Container(
@@ -98,8 +101,10 @@ def create_stats_card(title, value, subtitle, icon, gradient_color, expand=True)
     icon_bg_color = ft.Colors.with_opacity(0.1, gradient_color)
     card_bgcolor = ft.Colors.with_opacity(0.15, gradient_color)
     card_border_color = ft.Colors.with_opacity(0.3, gradient_color)
+    value_text = ft.Text(str(value), size=18, weight=ft.FontWeight.BOLD, color=ft.Colors.WHITE)
+    subtitle_text = ft.Text(subtitle, size=10, color=ft.Colors.WHITE54)
 
-    return create_styled_container(
+    card = create_styled_container(
         content=ft.Column(
             [
                 ft.Container(
@@ -108,9 +113,9 @@ def create_stats_card(title, value, subtitle, icon, gradient_color, expand=True)
                     border_radius=10, 
                     bgcolor=icon_bg_color,
                 ),
-                ft.Text(str(value), size=18, weight=ft.FontWeight.BOLD, color=ft.Colors.WHITE),
+                value_text,
                 ft.Text(title, size=11, color=ft.Colors.WHITE70),
-                ft.Text(subtitle, size=10, color=ft.Colors.WHITE54),
+                subtitle_text,
             ],
             spacing=5, horizontal_alignment=ft.CrossAxisAlignment.CENTER, tight=True,
         ),
@@ -119,14 +124,24 @@ def create_stats_card(title, value, subtitle, icon, gradient_color, expand=True)
         bgcolor=card_bgcolor,
         border_color=card_border_color,
     )
+    card.data = {"refs": (value_text, subtitle_text)}
+    return card
+
+def patch_stats_card(card, value, subtitle=None):
+    """Cambia el valor (y el subtítulo) de una tarjeta de create_stats_card sin reconstruirla."""
+    value_text, subtitle_text = card.data["refs"]
+    value_text.value = str(value)
+    if subtitle is not None:
+        subtitle_text.value = subtitle
 
 def create_header(title, subtitle, on_back, page_width, extra_button=None):
     header_content = [ft.IconButton(icon=ft.Icons.ARROW_BACK, icon_color=ft.Colors.WHITE70, on_click=on_back, tooltip="Volver", icon_size=22)]
 
+    subtitle_text = ft.Text(subtitle, size=12, color=ft.Colors.WHITE70)
     text_col = ft.Column(
         [
             ft.Text(title, size=18, weight=ft.FontWeight.BOLD, color=ft.Colors.WHITE),
-            ft.Text(subtitle, size=12, color=ft.Colors.WHITE70),
+            subtitle_text,
         ], spacing=2, horizontal_alignment=ft.CrossAxisAlignment.START, expand=True,
     )
 
@@ -135,13 +150,28 @@ def create_header(title, subtitle, on_back, page_width, extra_button=None):
     else:
         header_content.append(text_col)
 
-    return create_styled_container(
+    header = create_styled_container(
         content=ft.Row(header_content, alignment=ft.MainAxisAlignment.START, vertical_alignment=ft.CrossAxisAlignment.CENTER, spacing=8),
         padding=ft.padding.only(left=8, right=16, top=40, bottom=12),
         border_radius=0,
         border_color=BORDER_COLOR,
         bgcolor=CONTAINER_COLOR
     )
+    header.data = {"refs": (subtitle_text,)}
+    return header
+
+def patch_header(header, subtitle):
+    """Cambia el subtítulo de una cabecera de create_header."""
+    header.data["refs"][0].value = subtitle
+
+class SectionRoot(ft.Stack):
+    """
+    Raíz de una sección en caché (ver AppView.mount). Mientras está oculta es
+    "aislada": page.update() no recorre sus controles, así que tener varias
+    secciones montadas no encarece el diff de la visible.
+    """
+    def is_isolated(self):
+        return not self.visible
 
 # ============================================================================
 # CLASE DE LA VISTA
@@ -154,9 +184,19 @@ class AppView:
 
         self.cashier_list_container = ft.Column(spacing=8, horizontal_alignment=ft.CrossAxisAlignment.STRETCH)
         self.maintenance_list_container = ft.Column(spacing=8, horizontal_alignment=ft.CrossAxisAlignment.STRETCH)
-        self.inventory_list_container = ft.Column(spacing=8, horizontal_alignment=ft.CrossAxisAlignment.STRETCH)
-        self.sales_list_container = ft.Column(spacing=8, horizontal_alignment=ft.CrossAxisAlignment.STRETCH)
+        # Ventas e inventario pueden tener miles de filas: ListView solo dibuja lo visible
+        # y pide la siguiente página al controlador cuando el usuario llega al final.
+        self.inventory_list_container = ft.ListView(spacing=8, expand=True, on_scroll_interval=100, on_scroll=lambda e: self._handle_list_scroll('inventory', e))
+        self.sales_list_container = ft.ListView(spacing=8, expand=True, on_scroll_interval=100, on_scroll=lambda e: self._handle_list_scroll('sales', e))
         
+        # Tarjetas ya construidas por sección, indexadas por el 'id' de cada fila
+        self._keyed_cards = {'cashiers': {}, 'maintenance': {}, 'inventory': {}, 'sales': {}}
+        self._empty_cards = {}
+
+        # Árboles de controles ya construidos por (sección, rol); ver _cached_section y mount
+        self._sections = {}
+        self._layout_size = None  # (ancho, alto) de la página al colocar la vista por última vez
+
         # --- Control para el error de login ---
         self.login_error_text = ft.Text(
             value="", 
@@ -169,6 +209,53 @@ class AppView:
         
         self.background = create_solid_background() 
 
+    # --- Caché de secciones ---
+    def _cached_section(self, section, create):
+        """
+        Devuelve el árbol de la sección para el rol actual, creándolo la primera
+        vez. Los builders solo cambian después sus partes con datos (valores de
+        las tarjetas, filtros, listas...) con los _patch_* correspondientes.
+        """
+        key = (section, self.controller.current_user_role)
+        root = self._sections.get(key)
+        if root is None:
+            root = self._sections[key] = create()
+        return root
+
+    def mount(self, root):
+        """
+        Deja 'root' como la vista visible de la página (sin llamar a update).
+        Las secciones en caché del rol actual se quedan en la página, ocultas:
+        volver a una de ellas solo cambia su visibilidad y sus datos, así que
+        Flet envía un parche pequeño en vez del árbol entero. El resto de
+        vistas (login, secciones de otro rol) se quitan de la página.
+        """
+        role = self.controller.current_user_role
+        mounted = [control for (_, r), control in self._sections.items() if r == role]
+        if not any(control is root for control in mounted):
+            mounted = [root]
+        controls = self.page.controls
+        if len(controls) != len(mounted) or any(a is not b for a, b in zip(controls, mounted)):
+            controls[:] = mounted
+        for control in mounted:
+            control.visible = control is root
+        self._layout_size = (self.page.width, self.page.height)
+
+    def relayout(self):
+        """
+        Recoloca la vista montada tras un cambio de tamaño, sin pedir datos ni
+        reconstruir nada: todas las vistas se ajustan con expand, así que basta
+        con reenviar la página (las secciones ocultas no se recorren). Si el
+        tamaño es el de la última vez que se colocó (la ráfaga volvió al de
+        partida), no hay nada que enviar. Devuelve si se actualizó la página.
+        """
+        size = (self.page.width, self.page.height)
+        if not self.page.controls or size == self._layout_size:
+            return False
+        self._layout_size = size
+        self.page.update()
+        return True
+
     def build_login_screen(self):
         # Campos de texto
         username_field = ft.TextField(label="Usuario", prefix_icon=ft.Icons.PERSON_OUTLINE, height=50, text_size=14, border_radius=10, border_color=TEXT_FIELD_BORDER_COLOR, focused_border_color=ft.Colors.BLUE_500, bgcolor=TEXT_FIELD_BG_COLOR, color=ft.Colors.WHITE)
@@ -242,9 +329,18 @@ class AppView:
             self.login_error_text.visible = False
             if self.page.controls:
                 self.login_error_text.update()
+
+    def show_message(self, message):
+        """Muestra un aviso breve en la parte inferior (p. ej. el resultado de una exportación)."""
+        self.page.open(ft.SnackBar(ft.Text(message), duration=5000))
     # ---------------------------------------------
 
     def build_dashboard(self, stats):
+        root = self._cached_section(None, self._create_dashboard)
+        self._patch_dashboard(root, stats)
+        return root
+
+    def _create_dashboard(self):
         person_icon_glass = create_styled_container(
             content=ft.Icon(ft.Icons.PERSON, color=ft.Colors.DEEP_PURPLE_200, size=22),
             padding=12,
@@ -281,7 +377,9 @@ class AppView:
 
         # --- Lógica de Roles para la Alerta ---
         maintenance_alert = ft.Container() # Empezar vacío
-        if stats.get('maintenance_count', 0) > 0 and self.controller.current_user_role == 'admin':
+        alert_text = None
+        if self.controller.current_user_role == 'admin':  # se muestra u oculta en _patch_dashboard
+            alert_text = ft.Text(size=12, color=ft.Colors.WHITE, max_lines=2)
             maintenance_icon_glass = create_styled_container(
                 content=ft.Icon(ft.Icons.BUILD_OUTLINED, color=ft.Colors.WHITE, size=20),
                 padding=12,
@@ -297,7 +395,7 @@ class AppView:
                             ft.Icon(ft.Icons.WARNING_AMBER_ROUNDED, color=ft.Colors.ORANGE_300, size=14), 
                             ft.Text("Cajas en Mantenimiento", size=14, color=ft.Colors.ORANGE_300, weight=ft.FontWeight.BOLD)
                         ], spacing=6),
-                        ft.Text(f"{stats['maintenance_count']} cajas requieren atención. Haz clic para ver.", size=12, color=ft.Colors.WHITE, max_lines=2),
+                        alert_text,
                     ], spacing=2, expand=True),
                     ft.Icon(ft.Icons.ARROW_FORWARD_IOS_ROUNDED, color=ft.Colors.WHITE30, size=16),
                 ], alignment=ft.MainAxisAlignment.CENTER, vertical_alignment=ft.CrossAxisAlignment.CENTER, spacing=14),
@@ -308,11 +406,11 @@ class AppView:
 
         # --- Lógica de Roles para el Menú ---
         menu_items_all = [
-            {"id": "cashiers", "title": "Cajas", "desc": "Estado de las cajas", "icon": ft.Icons.POINT_OF_SALE_OUTLINED, "stat": f"{stats.get('total_cashiers', 0)} activas", "color": ft.Colors.LIGHT_BLUE_400},
-            {"id": "sales", "title": "Ventas", "desc": "Listado de ventas", "icon": ft.Icons.RECEIPT_LONG_OUTLINED, "stat": f"{stats.get('transactions_today', 0)} hoy", "color": ft.Colors.PURPLE_300},
-            {"id": "inventory", "title": "Inventario", "desc": "Productos y stock", "icon": ft.Icons.INVENTORY_2_OUTLINED, "stat": f"{stats.get('low_stock_count', 0)} bajos", "color": ft.Colors.ORANGE_300},
-            {"id": "earnings", "title": "Ganancias", "desc": "Ingresos del periodo", "icon": ft.Icons.TRENDING_UP_OUTLINED, "stat": f"+{stats.get('month_growth', 0)}% este mes", "color": ft.Colors.GREEN_400},
-            {"id": "maintenance", "title": "Mantenimiento", "desc": "Tareas pendientes", "icon": ft.Icons.BUILD_OUTLINED, "stat": f"{stats.get('maintenance_count', 0)} tareas", "color": ft.Colors.RED_300}
+            {"id": "cashiers", "title": "Cajas", "desc": "Estado de las cajas", "icon": ft.Icons.POINT_OF_SALE_OUTLINED, "color": ft.Colors.LIGHT_BLUE_400},
+            {"id": "sales", "title": "Ventas", "desc": "Listado de ventas", "icon": ft.Icons.RECEIPT_LONG_OUTLINED, "color": ft.Colors.PURPLE_300},
+            {"id": "inventory", "title": "Inventario", "desc": "Productos y stock", "icon": ft.Icons.INVENTORY_2_OUTLINED, "color": ft.Colors.ORANGE_300},
+            {"id": "earnings", "title": "Ganancias", "desc": "Ingresos del periodo", "icon": ft.Icons.TRENDING_UP_OUTLINED, "color": ft.Colors.GREEN_400},
+            {"id": "maintenance", "title": "Mantenimiento", "desc": "Tareas pendientes", "icon": ft.Icons.BUILD_OUTLINED, "color": ft.Colors.RED_300}
         ]
         
         menu_items_visible = []
@@ -323,7 +421,9 @@ class AppView:
             menu_items_visible = [item for item in menu_items_all if item['id'] in ['cashiers', 'sales', 'inventory']]
 
         menu_cards = []
+        menu_stats = {}  # id de la sección -> Text con su dato (ver _patch_dashboard)
         for item in menu_items_visible: # <-- Usar la lista filtrada
+            stat_text = menu_stats[item['id']] = ft.Text(size=11, weight=ft.FontWeight.W_500, color=item['color'])
             menu_icon_glass = create_styled_container(
                 content=ft.Icon(item['icon'], color=item['color'], size=24),
                 padding=12,
@@ -340,7 +440,7 @@ class AppView:
                         ft.Text(item['desc'], size=12, color=ft.Colors.WHITE70),
                         ft.Container(height=10),
                         ft.Container(
-                            content=ft.Text(item['stat'], size=11, weight=ft.FontWeight.W_500, color=item['color']),
+                            content=stat_text,
                             padding=ft.padding.symmetric(horizontal=10, vertical=5), border_radius=6, 
                             bgcolor=ft.Colors.with_opacity(0.2, item['color'])
                         )
@@ -355,9 +455,9 @@ class AppView:
             )
             menu_cards.append(card)
         
-        return ft.Stack(
+        root = SectionRoot(
             controls=[
-                self.background,
+                create_solid_background(),
                 ft.Column(
                     controls=[
                         ft.Container(
@@ -394,44 +494,102 @@ class AppView:
             ],
             expand=True
         )
+        root.data = {"alert": maintenance_alert, "alert_text": alert_text, "menu_stats": menu_stats}
+        return root
 
-    def _create_icon_filter_button(self, icon, count, filter_type, section, active_filter):
-        is_active = active_filter == filter_type
-        
-        bgcolor = BUTTON_COLOR if is_active else CONTAINER_COLOR
-        border = ft.border.all(1.5, BUTTON_BORDER_COLOR) if is_active else ft.border.all(1.5, BORDER_COLOR)
+    def _patch_dashboard(self, root, stats):
+        refs = root.data
+        maintenance_count = stats.get('maintenance_count', 0)
+        if refs["alert_text"] is not None:
+            refs["alert"].visible = maintenance_count > 0
+            refs["alert_text"].value = f"{maintenance_count} cajas requieren atención. Haz clic para ver."
+        values = {
+            "cashiers": f"{stats.get('total_cashiers', 0)} activas",
+            "sales": f"{stats.get('transactions_today', 0)} hoy",
+            "inventory": f"{stats.get('low_stock_count', 0)} bajos",
+            "earnings": f"{stats.get('month_growth', 0):+}% este mes",
+            "maintenance": f"{maintenance_count} tareas",
+        }
+        for section, text in refs["menu_stats"].items():
+            text.value = values[section]
 
-        return ft.Container(
-            content=ft.Row([ft.Icon(icon, size=18, color=ft.Colors.WHITE if is_active else ft.Colors.WHITE70), ft.Text(str(count), size=12, color=ft.Colors.WHITE if is_active else ft.Colors.WHITE70, weight=ft.FontWeight.BOLD)], spacing=6, tight=True),
+    def _handle_list_scroll(self, section, e):
+        """Pide otra página cuando el scroll de una lista paginada se acerca al final."""
+        if e.max_scroll_extent is not None and e.pixels >= e.max_scroll_extent - LOAD_MORE_THRESHOLD:
+            self.controller.handle_load_more(section)
+
+    def _create_icon_filter_button(self, icon, count, filter_type, section, active_filter):
+        icon_control = ft.Icon(icon, size=18)
+        count_text = ft.Text(size=12, weight=ft.FontWeight.BOLD)
+        button = ft.Container(
+            content=ft.Row([icon_control, count_text], spacing=6, tight=True),
             padding=ft.padding.symmetric(horizontal=16, vertical=10),
             border_radius=10,
-            bgcolor=bgcolor,
-            border=border,
             on_click=lambda e, f_type=filter_type: self.controller.handle_filter_change(section, f_type),
             animate=ft.Animation(200, ft.AnimationCurve.EASE_OUT),
             ink=True,
         )
+        button.data = {"refs": (icon_control, count_text), "filter": filter_type}
+        self._patch_filter_button(button, count, active_filter)
+        return button
+
+    def _patch_filter_button(self, button, count, active_filter):
+        """Estilo de activo/inactivo y contador de un botón de filtro (count=None lo deja como está)."""
+        icon_control, count_text = button.data["refs"]
+        is_active = active_filter == button.data["filter"]
+        button.bgcolor = BUTTON_COLOR if is_active else CONTAINER_COLOR
+        button.border = ft.border.all(1.5, BUTTON_BORDER_COLOR) if is_active else ft.border.all(1.5, BORDER_COLOR)
+        icon_control.color = ft.Colors.WHITE if is_active else ft.Colors.WHITE70
+        if count is not None:
+            count_text.value = str(count)
+        count_text.color = ft.Colors.WHITE if is_active else ft.Colors.WHITE70
+
+    def _create_search_bar(self, label, section):
+        return ft.TextField(label=label, prefix_icon=ft.Icons.SEARCH, border_radius=8, height=48, text_size=12, border_color=TEXT_FIELD_BORDER_COLOR, focused_border_color=ft.Colors.BLUE_500, bgcolor=TEXT_FIELD_BG_COLOR, color=ft.Colors.WHITE, on_change=lambda e: self.controller.handle_search(section, e.control.value), value=self.controller.search_query)
+
+    def _patch_section_controls(self, root, subtitle, cards, counts=None, active_filter=None):
+        """
+        Parte común de los _patch_*_section: subtítulo de la cabecera, tarjetas
+        de estadísticas ([(valor, subtítulo o None), ...] en el orden de
+        root.data["cards"]), botones de filtro y texto de la barra de búsqueda.
+        """
+        refs = root.data
+        patch_header(refs["header"], subtitle)
+        for card, (value, card_subtitle) in zip(refs["cards"], cards):
+            patch_stats_card(card, value, card_subtitle)
+        for button, count in zip(refs.get("filters", ()), counts or ()):
+            self._patch_filter_button(button, count, active_filter)
+        refs["search"].value = self.controller.search_query
 
     def build_cashier_section(self, cashiers, stats, active_filter):
-        header = create_header("Estado de Cajas", f"{stats.get('open', 0)} de {stats.get('total_cashiers', 0)} abiertas", self.controller.handle_back, self.page.width)
-        stats_row = ft.Row([
-            create_stats_card("Abiertas", stats.get('open', 0), "Activas", ft.Icons.CHECK_CIRCLE, ft.Colors.GREEN_500),
-            create_stats_card("Cerradas", stats.get('closed', 0), "Inactivas", ft.Icons.CANCEL, ft.Colors.GREY_500),
-            create_stats_card("Mantenim.", stats.get('maintenance', 0), "En Taller", ft.Icons.BUILD, ft.Colors.ORANGE_500),
-        ], spacing=10, alignment=ft.MainAxisAlignment.CENTER)
+        root = self._cached_section("cashiers", self._create_cashier_section)
+        self._patch_section_controls(root, f"{stats.get('open', 0)} de {stats.get('total_cashiers', 0)} abiertas",
+                                     [(stats.get('open', 0), None), (stats.get('closed', 0), None), (stats.get('maintenance', 0), None)],
+                                     [stats.get('total_cashiers', 0), stats.get('open', 0), stats.get('closed', 0), stats.get('maintenance', 0)], active_filter)
+        self.update_cashier_list(cashiers, send=False)
+        return root
+
+    def _create_cashier_section(self):
+        header = create_header("Estado de Cajas", "", self.controller.handle_back, self.page.width)
+        cards = [
+            create_stats_card("Abiertas", 0, "Activas", ft.Icons.CHECK_CIRCLE, ft.Colors.GREEN_500),
+            create_stats_card("Cerradas", 0, "Inactivas", ft.Icons.CANCEL, ft.Colors.GREY_500),
+            create_stats_card("Mantenim.", 0, "En Taller", ft.Icons.BUILD, ft.Colors.ORANGE_500),
+        ]
+        stats_row = ft.Row(cards, spacing=10, alignment=ft.MainAxisAlignment.CENTER)
         
-        filters_container = ft.Row([
-            self._create_icon_filter_button(ft.Icons.SELECT_ALL, stats.get('total_cashiers', 0), "all", "cashiers", active_filter),
-            self._create_icon_filter_button(ft.Icons.CHECK_CIRCLE_OUTLINE, stats.get('open', 0), "open", "cashiers", active_filter),
-            self._create_icon_filter_button(ft.Icons.CANCEL_OUTLINED, stats.get('closed', 0), "closed", "cashiers", active_filter),
-            self._create_icon_filter_button(ft.Icons.BUILD_OUTLINED, stats.get('maintenance', 0), "maintenance", "cashiers", active_filter),
-        ], spacing=10, alignment=ft.MainAxisAlignment.CENTER, scroll=ft.ScrollMode.AUTO)
-
-        search_bar = ft.TextField(label="Buscar por nombre o operador...", prefix_icon=ft.Icons.SEARCH, border_radius=8, height=48, text_size=12, border_color=TEXT_FIELD_BORDER_COLOR, focused_border_color=ft.Colors.BLUE_500, bgcolor=TEXT_FIELD_BG_COLOR, color=ft.Colors.WHITE, on_change=lambda e: self.controller.handle_search('cashiers', e.control.value), value=self.controller.search_query)
-        self.update_cashier_list(cashiers)
+        filters = [
+            self._create_icon_filter_button(ft.Icons.SELECT_ALL, 0, "all", "cashiers", "all"),
+            self._create_icon_filter_button(ft.Icons.CHECK_CIRCLE_OUTLINE, 0, "open", "cashiers", "all"),
+            self._create_icon_filter_button(ft.Icons.CANCEL_OUTLINED, 0, "closed", "cashiers", "all"),
+            self._create_icon_filter_button(ft.Icons.BUILD_OUTLINED, 0, "maintenance", "cashiers", "all"),
+        ]
+        filters_container = ft.Row(filters, spacing=10, alignment=ft.MainAxisAlignment.CENTER, scroll=ft.ScrollMode.AUTO)
+
+        search_bar = self._create_search_bar("Buscar por nombre o operador...", 'cashiers')
         
-        return ft.Stack([
-            self.background,
+        root = SectionRoot([
+            create_solid_background(),
             ft.Column([
                 header,
                 ft.Container(
@@ -449,119 +607,203 @@ class AppView:
                 )
             ], expand=True)
         ], expand=True)
+        root.data = {"header": header, "cards": cards, "filters": filters, "search": search_bar}
+        return root
 
-    def update_cashier_list(self, cashiers):
-        self.cashier_list_container.controls.clear()
-        if not cashiers:
-            self.cashier_list_container.controls.append(create_styled_container(content=ft.Text("No se encontraron cajas", text_align=ft.TextAlign.CENTER), padding=32))
-        else:
-            for c in cashiers:
-                s_def = {'open': {'c': ft.Colors.GREEN_500, 't': 'Abierta'}, 'closed': {'c': ft.Colors.GREY_500, 't': 'Cerrada'}, 'maintenance': {'c': ft.Colors.ORANGE_500, 't': 'Mantenim.'}}
-                s = s_def.get(c['status'], s_def['closed'])
-                self.cashier_list_container.controls.append(create_styled_container(
-                    content=ft.Row([
-                        ft.Icon(ft.Icons.CIRCLE, color=s['c'], size=10),
-                        ft.Column([ft.Text(c['name'], size=14, weight=ft.FontWeight.W_500), ft.Text(c['operator'] or "Sin operador", size=11, color=ft.Colors.WHITE70)], spacing=2, expand=True),
-                        ft.Column([ft.Container(ft.Text(s['t'], size=10, color=s['c']), padding=ft.padding.symmetric(horizontal=8, vertical=4), border_radius=6, 
-                                                bgcolor=ft.Colors.with_opacity(0.2, s['c'])), 
-                                  ft.Text(f"{c['sales']} ventas", size=11, color=ft.Colors.WHITE54) if c['status'] == 'open' else ft.Container()], 
-                                 spacing=4, horizontal_alignment=ft.CrossAxisAlignment.END),
-                    ], vertical_alignment=ft.CrossAxisAlignment.CENTER, spacing=12), padding=12,
-                ))
-        if self.page.controls: self.page.update()
+    def _build_cashier_card(self, c):
+        dot = ft.Icon(ft.Icons.CIRCLE, size=10)
+        name = ft.Text(size=14, weight=ft.FontWeight.W_500)
+        operator = ft.Text(size=11, color=ft.Colors.WHITE70)
+        status_text = ft.Text(size=10)
+        status_badge = ft.Container(status_text, padding=ft.padding.symmetric(horizontal=8, vertical=4), border_radius=6)
+        sales = ft.Text(size=11, color=ft.Colors.WHITE54)
+        card = create_styled_container(
+            content=ft.Row([
+                dot,
+                ft.Column([name, operator], spacing=2, expand=True),
+                ft.Column([status_badge, sales], spacing=4, horizontal_alignment=ft.CrossAxisAlignment.END),
+            ], vertical_alignment=ft.CrossAxisAlignment.CENTER, spacing=12), padding=12,
+        )
+        card.data = {"refs": (dot, name, operator, status_text, status_badge, sales)}
+        self._patch_cashier_card(card, c)
+        return card
+
+    def _patch_cashier_card(self, card, c):
+        dot, name, operator, status_text, status_badge, sales = card.data["refs"]
+        s_def = {'open': {'c': ft.Colors.GREEN_500, 't': 'Abierta'}, 'closed': {'c': ft.Colors.GREY_500, 't': 'Cerrada'}, 'maintenance': {'c': ft.Colors.ORANGE_500, 't': 'Mantenim.'}}
+        s = s_def.get(c.status, s_def['closed'])
+        dot.color = s['c']
+        name.value = c.name
+        operator.value = c.operator or "Sin operador"
+        status_text.value = s['t']
+        status_text.color = s['c']
+        status_badge.bgcolor = ft.Colors.with_opacity(0.2, s['c'])
+        sales.value = f"{c.sales} ventas"
+        sales.visible = c.status == 'open'
+
+    def update_cashier_list(self, cashiers, send=True):
+        self._reconcile_list('cashiers', self.cashier_list_container, cashiers, self._build_cashier_card, self._patch_cashier_card, "No se encontraron cajas", send)
+
+    def _create_export_button(self, section):
+        """Botón de exportar la lista (con sus filtros) a CSV; solo para admin."""
+        if self.controller.current_user_role != 'admin':
+            return None
+        return ft.IconButton(icon=ft.Icons.DOWNLOAD, icon_color=ft.Colors.WHITE70, tooltip="Exportar a CSV", icon_size=22,
+                             on_click=lambda e: self.controller.handle_export(section))
 
     def build_inventory_section(self, products, stats, active_filter):
-        header = create_header("Inventario", f"{stats.get('total_products', 0)} productos en sistema", self.controller.handle_back, self.page.width)
-        stats_row = ft.Row([
-                create_stats_card("Total Prod.", stats.get('total_products', 0), "Tipos", ft.Icons.INVENTORY_2, ft.Colors.BLUE_400),
-                create_stats_card("Stock Bajo", stats.get('low_stock_count', 0), "Reordenar", ft.Icons.WARNING, ft.Colors.ORANGE_400),
-                create_stats_card("Valor Total", f"${stats.get('total_value', 0):,.0f}", "Estimado", ft.Icons.ATTACH_MONEY, ft.Colors.GREEN_400),
-            ], spacing=10)
-        filters_container = ft.Row([
-            self._create_icon_filter_button(ft.Icons.INVENTORY_2_OUTLINED, stats.get('total_products', 0), "all", "inventory", active_filter),
-            self._create_icon_filter_button(ft.Icons.ARROW_DOWNWARD_OUTLINED, stats.get('low_stock_count', 0), "low", "inventory", active_filter),
-            self._create_icon_filter_button(ft.Icons.ARROW_UPWARD_OUTLINED, stats.get('high_stock_count', 0), "high", "inventory", active_filter),
-            ], spacing=10, alignment=ft.MainAxisAlignment.CENTER, scroll=ft.ScrollMode.AUTO)
-        search_bar = ft.TextField(label="Buscar por nombre, SKU...", prefix_icon=ft.Icons.SEARCH, border_radius=8, height=48, text_size=12, on_change=lambda e: self.controller.handle_search('inventory', e.control.value), value=self.controller.search_query, border_color=TEXT_FIELD_BORDER_COLOR, focused_border_color=ft.Colors.BLUE_500, bgcolor=TEXT_FIELD_BG_COLOR, color=ft.Colors.WHITE)
-        self.update_inventory_list(products)
-        return ft.Stack([
-            self.background,
+        root = self._cached_section("inventory", self._create_inventory_section)
+        self._patch_section_controls(root, f"{stats.get('total_products', 0)} productos en sistema",
+                                     [(stats.get('total_products', 0), None), (stats.get('low_stock_count', 0), None), (f"${stats.get('total_value', 0):,.0f}", None)],
+                                     [stats.get('total_products', 0), stats.get('low_stock_count', 0), stats.get('high_stock_count', 0)], active_filter)
+        self.update_inventory_list(products, send=False)
+        return root
+
+    def _create_inventory_section(self):
+        header = create_header("Inventario", "", self.controller.handle_back, self.page.width, self._create_export_button('inventory'))
+        cards = [
+                create_stats_card("Total Prod.", 0, "Tipos", ft.Icons.INVENTORY_2, ft.Colors.BLUE_400),
+                create_stats_card("Stock Bajo", 0, "Reordenar", ft.Icons.WARNING, ft.Colors.ORANGE_400),
+                create_stats_card("Valor Total", "$0", "Estimado", ft.Icons.ATTACH_MONEY, ft.Colors.GREEN_400),
+            ]
+        stats_row = ft.Row(cards, spacing=10)
+        filters = [
+            self._create_icon_filter_button(ft.Icons.INVENTORY_2_OUTLINED, 0, "all", "inventory", "all"),
+            self._create_icon_filter_button(ft.Icons.ARROW_DOWNWARD_OUTLINED, 0, "low", "inventory", "all"),
+            self._create_icon_filter_button(ft.Icons.ARROW_UPWARD_OUTLINED, 0, "high", "inventory", "all"),
+            ]
+        filters_container = ft.Row(filters, spacing=10, alignment=ft.MainAxisAlignment.CENTER, scroll=ft.ScrollMode.AUTO)
+        search_bar = self._create_search_bar("Buscar por nombre, SKU...", 'inventory')
+        root = SectionRoot([
+            create_solid_background(),
             ft.Column([header, ft.Container(content=ft.Column([stats_row, filters_container, search_bar, 
                 
-                ft.Container(self.inventory_list_container, expand=True)
+                self.inventory_list_container # <-- La lista tiene su propio scroll (virtualizado)
                 ], 
                 spacing=16, 
-                scroll=ft.ScrollMode.AUTO, # <-- ESTE ES EL SCROLL DE LA SECCIÓN
                 horizontal_alignment=ft.CrossAxisAlignment.STRETCH,
                 expand=True # <-- Y ESTE EXPAND ES CLAVE
                 ), padding=16, expand=True)], expand=True)
         ], expand=True)
+        root.data = {"header": header, "cards": cards, "filters": filters, "search": search_bar}
+        return root
 
-    def update_inventory_list(self, products):
-        self.inventory_list_container.controls.clear()
-        if not products:
-            self.inventory_list_container.controls.append(create_styled_container(content=ft.Text("No se encontraron productos", text_align=ft.TextAlign.CENTER), padding=32))
-        else:
-            for p in products:
-                is_low = p['stock'] <= p['min_stock']
-                color = ft.Colors.ORANGE_400 if is_low else ft.Colors.WHITE
-                card = create_styled_container(
-                    content=ft.Column([
-                        ft.Row([ft.Column([ft.Text(p['name'], size=14, weight=ft.FontWeight.W_500), ft.Text(f"SKU: {p['sku']}", size=11, color=ft.Colors.WHITE54)], spacing=2, expand=True), ft.Text(f"${p['price']}", size=15, weight=ft.FontWeight.BOLD, color=ft.Colors.GREEN_400)], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
-                        ft.Row([ft.Text("Stock:", size=12, color=ft.Colors.WHITE70), ft.Text(str(p['stock']), size=14, color=color, weight=ft.FontWeight.BOLD), ft.Icon(ft.Icons.WARNING_AMBER_ROUNDED, size=16, color=ft.Colors.ORANGE_400) if is_low else ft.Container()], spacing=6),
-                    ], spacing=8), padding=12,
-                )
-                self.inventory_list_container.controls.append(card)
-        if self.page.controls: self.page.update()
+    def _build_product_card(self, p):
+        name = ft.Text(size=14, weight=ft.FontWeight.W_500)
+        sku = ft.Text(size=11, color=ft.Colors.WHITE54)
+        price = ft.Text(size=15, weight=ft.FontWeight.BOLD, color=ft.Colors.GREEN_400)
+        stock = ft.Text(size=14, weight=ft.FontWeight.BOLD)
+        warning = ft.Icon(ft.Icons.WARNING_AMBER_ROUNDED, size=16, color=ft.Colors.ORANGE_400)
+        card = create_styled_container(
+            content=ft.Column([
+                ft.Row([ft.Column([name, sku], spacing=2, expand=True), price], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
+                ft.Row([ft.Text("Stock:", size=12, color=ft.Colors.WHITE70), stock, warning], spacing=6),
+            ], spacing=8), padding=12,
+        )
+        card.data = {"refs": (name, sku, price, stock, warning)}
+        self._patch_product_card(card, p)
+        return card
+
+    def _patch_product_card(self, card, p):
+        name, sku, price, stock, warning = card.data["refs"]
+        is_low = p.stock <= p.min_stock
+        name.value = p.name
+        sku.value = f"SKU: {p.sku}"
+        price.value = f"${p.price}"
+        stock.value = str(p.stock)
+        stock.color = ft.Colors.ORANGE_400 if is_low else ft.Colors.WHITE
+        warning.visible = is_low
+
+    def update_inventory_list(self, products, send=True):
+        """Reemplaza la lista con la primera página de productos."""
+        self._reconcile_list('inventory', self.inventory_list_container, products, self._build_product_card, self._patch_product_card, "No se encontraron productos", send)
+
+    def append_inventory_list(self, products):
+        """Añade la siguiente página de productos al final de la lista."""
+        self._append_to_list('inventory', self.inventory_list_container, products, self._build_product_card)
 
     def build_sales_section(self, sales, stats, active_filter):
-        header = create_header("Ventas", f"{stats.get('total_all', 0)} ventas registradas hoy", self.controller.handle_back, self.page.width)
+        root = self._cached_section("sales", self._create_sales_section)
+        self._patch_section_controls(root, f"{stats.get('total_all', 0)} ventas registradas hoy", [
+            (stats.get('total_all', 0), None),
+            (f"${stats.get('amount_completed', 0):,.0f}", f"{stats.get('total_completed', 0)} ventas"),
+            (f"${stats.get('amount_pending', 0):,.0f}", f"{stats.get('total_pending', 0)} ventas"),
+            (f"${stats.get('amount_refunded', 0):,.0f}", f"{stats.get('total_refunded', 0)} ventas"),
+        ], [stats.get('total_all', 0), stats.get('total_completed', 0), stats.get('total_pending', 0), stats.get('total_refunded', 0)], active_filter)
+        self.update_sales_list(sales, send=False)
+        return root
+
+    def _create_sales_section(self):
+        header = create_header("Ventas", "", self.controller.handle_back, self.page.width, self._create_export_button('sales'))
+        cards = [
+            create_stats_card("Ventas Totales", 0, "Transacciones", ft.Icons.SHOPPING_CART, ft.Colors.BLUE_400),
+            create_stats_card("Completadas", "$0", "0 ventas", ft.Icons.CHECK, ft.Colors.GREEN_400),
+            create_stats_card("Pendientes", "$0", "0 ventas", ft.Icons.SCHEDULE, ft.Colors.AMBER_400),
+            create_stats_card("Reembolsos", "$0", "0 ventas", ft.Icons.REMOVE_SHOPPING_CART, ft.Colors.RED_400),
+        ]
         stats_grid = ft.Column([
-            ft.Row([create_stats_card("Ventas Totales", stats.get('total_all', 0), "Transacciones", ft.Icons.SHOPPING_CART, ft.Colors.BLUE_400), create_stats_card("Completadas", f"${stats.get('amount_completed', 0):,.0f}", f"{stats.get('total_completed', 0)} ventas", ft.Icons.CHECK, ft.Colors.GREEN_400)], spacing=10),
-            ft.Row([create_stats_card("Pendientes", f"${stats.get('amount_pending', 0):,.0f}", f"{stats.get('total_pending', 0)} ventas", ft.Icons.SCHEDULE, ft.Colors.AMBER_400), create_stats_card("Reembolsos", f"${stats.get('amount_refunded', 0):,.0f}", f"{stats.get('total_refunded', 0)} ventas", ft.Icons.REMOVE_SHOPPING_CART, ft.Colors.RED_400)], spacing=10),
+            ft.Row(cards[:2], spacing=10),
+            ft.Row(cards[2:], spacing=10),
         ], spacing=10)
-        filters_container = ft.Row([
-            self._create_icon_filter_button(ft.Icons.ALL_INBOX, stats.get('total_all', 0), "all", "sales", active_filter),
-            self._create_icon_filter_button(ft.Icons.CHECK, stats.get('total_completed', 0), "completed", "sales", active_filter),
-            self._create_icon_filter_button(ft.Icons.SCHEDULE, stats.get('total_pending', 0), "pending", "sales", active_filter),
-            self._create_icon_filter_button(ft.Icons.REMOVE_SHOPPING_CART, stats.get('total_refunded', 0), "refunded", "sales", active_filter),
-        ], spacing=10, alignment=ft.MainAxisAlignment.CENTER, scroll=ft.ScrollMode.AUTO)
-        search_bar = ft.TextField(label="Buscar por ID, caja, cliente...", prefix_icon=ft.Icons.SEARCH, border_radius=8, height=48, text_size=12, on_change=lambda e: self.controller.handle_search('sales', e.control.value), value=self.controller.search_query, border_color=TEXT_FIELD_BORDER_COLOR, focused_border_color=ft.Colors.BLUE_500, bgcolor=TEXT_FIELD_BG_COLOR, color=ft.Colors.WHITE)
-        self.update_sales_list(sales)
-        return ft.Stack([
-            self.background,
+        filters = [
+            self._create_icon_filter_button(ft.Icons.ALL_INBOX, 0, "all", "sales", "all"),
+            self._create_icon_filter_button(ft.Icons.CHECK, 0, "completed", "sales", "all"),
+            self._create_icon_filter_button(ft.Icons.SCHEDULE, 0, "pending", "sales", "all"),
+            self._create_icon_filter_button(ft.Icons.REMOVE_SHOPPING_CART, 0, "refunded", "sales", "all"),
+        ]
+        filters_container = ft.Row(filters, spacing=10, alignment=ft.MainAxisAlignment.CENTER, scroll=ft.ScrollMode.AUTO)
+        search_bar = self._create_search_bar("Buscar por ID, caja, cliente...", 'sales')
+        root = SectionRoot([
+            create_solid_background(),
             ft.Column([header, ft.Container(content=ft.Column([stats_grid, filters_container, search_bar, 
                 
-                ft.Container(self.sales_list_container, expand=True) 
+                self.sales_list_container # <-- La lista tiene su propio scroll (virtualizado)
                 ], 
                 spacing=16, 
-                scroll=ft.ScrollMode.AUTO, # <-- ESTE ES EL SCROLL DE LA SECCIÓN
                 horizontal_alignment=ft.CrossAxisAlignment.STRETCH,
                 expand=True # <-- Y ESTE EXPAND ES CLAVE
                 ), padding=16, expand=True)], expand=True)
         ], expand=True)
-    
-    def update_sales_list(self, sales):
-        self.sales_list_container.controls.clear()
+        root.data = {"header": header, "cards": cards, "filters": filters, "search": search_bar}
+        return root
+
+    def _build_sale_card(self, s):
+        icon = ft.Icon(size=18)
+        title = ft.Text(size=14, weight=ft.FontWeight.W_500, expand=True)
+        amount = ft.Text(size=16, weight=ft.FontWeight.BOLD, color=ft.Colors.GREEN_400)
+        detail = ft.Text(size=11, color=ft.Colors.WHITE70)
+        card = create_styled_container(
+            content=ft.Column([
+                ft.Row([icon, title, amount], vertical_alignment=ft.CrossAxisAlignment.CENTER),
+                detail,
+            ], spacing=6), padding=12,
+        )
+        card.data = {"refs": (icon, title, amount, detail)}
+        self._patch_sale_card(card, s)
+        return card
+
+    def _patch_sale_card(self, card, s):
+        icon, title, amount, detail = card.data["refs"]
         status_map = {"completed": {"c": ft.Colors.GREEN_400, "i": ft.Icons.CHECK_CIRCLE}, "pending": {"c": ft.Colors.AMBER_400, "i": ft.Icons.SCHEDULE}, "refunded": {"c": ft.Colors.RED_400, "i": ft.Icons.CANCEL}}
-        if not sales:
-            self.sales_list_container.controls.append(create_styled_container(content=ft.Text("No se encontraron ventas", text_align=ft.TextAlign.CENTER), padding=32))
-        else:
-            for s in sales:
-                status = status_map.get(s['status'], {"c": ft.Colors.GREY_500, "i": ft.Icons.HELP})
-                card = create_styled_container(
-                    content=ft.Column([
-                        ft.Row([ft.Icon(status['i'], color=status['c'], size=18), ft.Text(f"Venta #{s['id']}", size=14, weight=ft.FontWeight.W_500, expand=True), ft.Text(f"${s['amount']:,.2f}", size=16, weight=ft.FontWeight.BOLD, color=ft.Colors.GREEN_400)], vertical_alignment=ft.CrossAxisAlignment.CENTER),
-                        ft.Text(f"Caja: {s['cashier']} | Cliente: {s['customer']}", size=11, color=ft.Colors.WHITE70),
-                    ], spacing=6), padding=12,
-                )
-                self.sales_list_container.controls.append(card)
-        if self.page.controls: self.page.update()
+        status = status_map.get(s.status, {"c": ft.Colors.GREY_500, "i": ft.Icons.HELP})
+        icon.name = status['i']
+        icon.color = status['c']
+        title.value = f"Venta #{s.id}"
+        amount.value = f"${s.amount:,.2f}"
+        detail.value = f"Caja: {s.cashier} | Cliente: {s.customer}"
+    
+    def update_sales_list(self, sales, send=True):
+        """Reemplaza la lista con la primera página de ventas."""
+        self._reconcile_list('sales', self.sales_list_container, sales, self._build_sale_card, self._patch_sale_card, "No se encontraron ventas", send)
+
+    def append_sales_list(self, sales):
+        """Añade la siguiente página de ventas al final de la lista."""
+        self._append_to_list('sales', self.sales_list_container, sales, self._build_sale_card)
 
     # --- ¡FUNCIÓN CORREGIDA! ---
-    def build_earnings_section(self, earnings_data, active_tab):
-        # Esta es la línea que faltaba
-        header = create_header("Ganancias", "Análisis de ingresos", self.controller.handle_back, self.page.width)
+    def build_earnings_section(self, earnings_data, active_tab, analytics=None):
+        root = self._cached_section("earnings", self._create_earnings_section)
+        refs = root.data
         
         # Manejar caso de datos vacíos
         week_data = earnings_data.get('week', [])
@@ -569,11 +811,13 @@ class AppView:
         
         week_total = sum(d['amount'] for d in week_data)
         month_total = month_data.get('total', 0)
-        
-        stats_container = ft.Row([create_stats_card("Semana", f"${week_total:,}", "Ventas", ft.Icons.CALENDAR_VIEW_WEEK, ft.Colors.BLUE_400), create_stats_card("Mes", f"${month_total:,}", "Ventas", ft.Icons.CALENDAR_MONTH, ft.Colors.GREEN_400)], spacing=10)
-        
-        content_container = ft.Column(spacing=12) 
-        
+        patch_stats_card(refs["cards"][0], f"${week_total:,}")
+        patch_stats_card(refs["cards"][1], f"${month_total:,}")
+        for button in refs["tabs"]:
+            self._patch_tab_button(button, active_tab)
+
+        # El contenido de la pestaña depende de los datos: se rehace entero
+        content_container = refs["content"]
         if active_tab == "week":
             max_amount = max((d['amount'] for d in week_data), default=1) or 1
             chart_items = [ft.Container(content=ft.Column([ft.Row([ft.Text(day['day'], size=12, weight=ft.FontWeight.W_500), ft.Text(f"${day['amount']:,}", size=13, color=ft.Colors.GREEN_400, weight=ft.FontWeight.BOLD)], alignment=ft.MainAxisAlignment.SPACE_BETWEEN), 
@@ -582,7 +826,9 @@ class AppView:
                                                           spacing=5), 
                                          padding=10, border_radius=8, bgcolor=TEXT_FIELD_BG_COLOR)
                            for day in week_data]
-            content_container.controls.append(create_styled_container(ft.Column([ft.Text("Desglose Diario", size=16, weight=ft.FontWeight.BOLD)] + chart_items, spacing=8), padding=16))
+            content_container.controls = [create_styled_container(ft.Column([ft.Text("Desglose Diario", size=16, weight=ft.FontWeight.BOLD)] + chart_items, spacing=8), padding=16)]
+        elif active_tab == "analysis":
+            content_container.controls = self._build_analytics_content(analytics or {})
         else:
             month_weeks_data = month_data.get('weeks', [])
             max_amount = max((w['amount'] for w in month_weeks_data), default=1) or 1
@@ -592,28 +838,35 @@ class AppView:
                                                           spacing=5), 
                                          padding=10, border_radius=8, bgcolor=TEXT_FIELD_BG_COLOR)
                            for week in month_weeks_data]
-            content_container.controls.append(create_styled_container(ft.Column([ft.Text("Desglose Semanal", size=16, weight=ft.FontWeight.BOLD)] + chart_items, spacing=8), padding=16))
+            content_container.controls = [create_styled_container(ft.Column([ft.Text("Desglose Semanal", size=16, weight=ft.FontWeight.BOLD)] + chart_items, spacing=8), padding=16)]
+        return root
+
+    def _create_earnings_section(self):
+        # Esta es la línea que faltaba
+        header = create_header("Ganancias", "Análisis de ingresos", self.controller.handle_back, self.page.width)
+        cards = [create_stats_card("Semana", "$0", "Ventas", ft.Icons.CALENDAR_VIEW_WEEK, ft.Colors.BLUE_400), create_stats_card("Mes", "$0", "Ventas", ft.Icons.CALENDAR_MONTH, ft.Colors.GREEN_400)]
+        stats_container = ft.Row(cards, spacing=10)
+        
+        content_container = ft.Column(spacing=12) 
         
         # --- ESTE CÓDIGO ESTABA FUERA DE LUGAR, AHORA ESTÁ DENTRO ---
         def create_tab_button(label, tab_type):
-            is_active = active_tab == tab_type
-            bgcolor = BUTTON_COLOR if is_active else CONTAINER_COLOR
-            border_color = BUTTON_BORDER_COLOR if is_active else BORDER_COLOR
-
-            return create_styled_container(
-                content=ft.Text(label, size=13, color=ft.Colors.WHITE if is_active else ft.Colors.WHITE70, weight=ft.FontWeight.W_500),
+            label_text = ft.Text(label, size=13, weight=ft.FontWeight.W_500)
+            button = create_styled_container(
+                content=label_text,
                 padding=ft.padding.symmetric(horizontal=24, vertical=10),
                 border_radius=8,
                 on_click=lambda e, t_type=tab_type: self.controller.handle_earnings_tab_change(t_type),
                 expand=True,
-                bgcolor=bgcolor,
-                border_color=border_color
             )
-        tabs_container = ft.Row([create_tab_button("Semana", "week"), create_tab_button("Mes", "month")], spacing=10)
+            button.data = {"refs": (label_text,), "tab": tab_type}
+            return button
+        tabs = [create_tab_button("Semana", "week"), create_tab_button("Mes", "month"), create_tab_button("Análisis", "analysis")]
+        tabs_container = ft.Row(tabs, spacing=10)
         # --- FIN DEL CÓDIGO MOVIDO ---
         
-        return ft.Stack([
-            self.background,
+        root = SectionRoot([
+            create_solid_background(),
             ft.Column([
                 header, # <-- Ahora la variable 'header' existe
                 ft.Container(
@@ -633,18 +886,91 @@ class AppView:
             expand=True)
         ], 
         expand=True)
+        root.data = {"cards": cards, "tabs": tabs, "content": content_container}
+        return root
+
+    def _patch_tab_button(self, button, active_tab):
+        """Estilo de activa/inactiva de una pestaña de ganancias."""
+        is_active = active_tab == button.data["tab"]
+        button.bgcolor = BUTTON_COLOR if is_active else CONTAINER_COLOR
+        button.border = ft.border.all(1.5, BUTTON_BORDER_COLOR if is_active else BORDER_COLOR)
+        button.data["refs"][0].color = ft.Colors.WHITE if is_active else ft.Colors.WHITE70
+
+    def _build_analytics_content(self, analytics):
+        """Bloques de la pestaña 'Análisis' de ganancias (datos de AppModel.get_sales_analytics)."""
+        if not analytics.get('transactions'):
+            return [create_styled_container(ft.Text("No hay datos para el análisis (requiere NumPy y ventas completadas en el periodo).", size=13, color=ft.Colors.WHITE70), padding=16)]
+
+        def section(title, controls):
+            return create_styled_container(ft.Column([ft.Text(title, size=16, weight=ft.FontWeight.BOLD)] + controls, spacing=8), padding=16)
+
+        def bar(fraction, color):
+            return ft.Container(ft.Container(width=f"{fraction * 100}%", height=5, border_radius=3, bgcolor=color), height=5, border_radius=3, bgcolor=ft.Colors.with_opacity(0.1, ft.Colors.WHITE), padding=0)
+
+        def short_day(iso_day):
+            d = date.fromisoformat(iso_day)
+            return f"{DAY_LABELS[d.weekday()]} {d:%d/%m}"
+
+        percentiles = analytics['ticket_percentiles']
+        blocks = [ft.Row([
+            create_stats_card("Ticket medio", f"${analytics['avg_ticket']:,.2f}", f"{analytics['avg_items']} artículos", ft.Icons.RECEIPT_LONG, ft.Colors.BLUE_400),
+            create_stats_card("Mediana", f"${percentiles.get(50, 0):,.2f}", f"P90 ${percentiles.get(90, 0):,.0f}", ft.Icons.STACKED_BAR_CHART, ft.Colors.PURPLE_400),
+        ], spacing=10)]
+
+        blocks.append(section(f"Ticket por percentil ({analytics['days']} días)", [ft.Row(
+            [ft.Column([ft.Text(f"P{p}", size=11, color=ft.Colors.WHITE70), ft.Text(f"${v:,.0f}", size=13, weight=ft.FontWeight.BOLD)], spacing=2, horizontal_alignment=ft.CrossAxisAlignment.CENTER) for p, v in percentiles.items()],
+            alignment=ft.MainAxisAlignment.SPACE_AROUND)]))
+
+        recent_days = analytics['daily'][-14:]
+        max_amount = max((d['amount'] for d in recent_days), default=1) or 1
+        blocks.append(section("Ventas diarias y media móvil (7 días)", [
+            ft.Column([ft.Row([ft.Text(short_day(d['day']), size=12), ft.Text(f"${d['amount']:,.0f}  ·  media ${d['moving_avg']:,.0f}", size=12, color=ft.Colors.GREEN_400)], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
+                       bar(d['amount'] / max_amount, ft.Colors.BLUE_400)], spacing=4)
+            for d in recent_days]))
+
+        heatmap = analytics['heatmap']
+        if heatmap['hours']:
+            peak = heatmap['max'] or 1
+            header = ft.Row([ft.Container(width=32)] + [ft.Container(ft.Text(str(h) if h % 3 == 0 else "", size=9, color=ft.Colors.WHITE54), expand=True) for h in heatmap['hours']], spacing=2)
+            rows = [ft.Row([ft.Container(ft.Text(DAY_LABELS[w], size=10, color=ft.Colors.WHITE70), width=32)]
+                           + [ft.Container(height=14, expand=True, border_radius=2, bgcolor=ft.Colors.with_opacity(0.08 + 0.92 * amount / peak, ft.Colors.ORANGE_400)) for amount in amounts], spacing=2)
+                    for w, amounts in enumerate(heatmap['amounts'])]
+            blocks.append(section("Mapa de calor (día x hora)", [header] + rows))
+
+        if analytics['forecast']:
+            max_forecast = max(f['amount'] for f in analytics['forecast']) or 1
+            blocks.append(section("Previsión próximos días", [
+                ft.Column([ft.Row([ft.Text(short_day(f['day']), size=12), ft.Text(f"~${f['amount']:,}  ·  {f['transactions']} ventas", size=12, color=ft.Colors.AMBER_400)], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
+                           bar(f['amount'] / max_forecast, ft.Colors.AMBER_400)], spacing=4)
+                for f in analytics['forecast']]))
+
+        blocks.append(section("Cajas y formas de pago", [
+            ft.Row([ft.Text(c['cashier'], size=12), ft.Text(f"${c['amount']:,.0f} ({c['share']:.0%})", size=12, color=ft.Colors.GREEN_400)], alignment=ft.MainAxisAlignment.SPACE_BETWEEN)
+            for c in analytics['cashiers']
+        ] + [ft.Divider(height=1, color=BORDER_COLOR)] + [
+            ft.Row([ft.Text(p['payment'], size=12), ft.Text(f"{p['share']:.0%}", size=12, color=ft.Colors.BLUE_300)], alignment=ft.MainAxisAlignment.SPACE_BETWEEN)
+            for p in analytics['payments']
+        ]))
+        return blocks
 
     def build_maintenance_section(self, tasks, stats):
-        header = create_header("Mantenimiento", f"{stats.get('total', 0)} tareas pendientes", self.controller.handle_back, self.page.width)
-        stats_row = ft.Row([
-            create_stats_card("Total Tareas", stats.get('total', 0), "Pendientes", ft.Icons.BUILD, ft.Colors.BLUE_400),
-            create_stats_card("Prioridad Alta", stats.get('high_priority', 0), "Urgentes", ft.Icons.ERROR, ft.Colors.RED_400),
-            create_stats_card("T. Promedio", f"{stats.get('avg_days', 0)} días", "Estimado", ft.Icons.TIMER, ft.Colors.AMBER_400),
-        ], spacing=10, alignment=ft.MainAxisAlignment.CENTER)
-        search_bar = ft.TextField(label="Buscar por caja o problema...", prefix_icon=ft.Icons.SEARCH, border_radius=8, height=48, text_size=12, on_change=lambda e: self.controller.handle_search('maintenance', e.control.value), value=self.controller.search_query, border_color=TEXT_FIELD_BORDER_COLOR, focused_border_color=ft.Colors.BLUE_500, bgcolor=TEXT_FIELD_BG_COLOR, color=ft.Colors.WHITE)
-        self.update_maintenance_list(tasks)
-        return ft.Stack([
-            self.background,
+        root = self._cached_section("maintenance", self._create_maintenance_section)
+        self._patch_section_controls(root, f"{stats.get('total', 0)} tareas pendientes",
+                                     [(stats.get('total', 0), None), (stats.get('high_priority', 0), None), (f"{stats.get('avg_days', 0)} días", None)])
+        self.update_maintenance_list(tasks, send=False)
+        return root
+
+    def _create_maintenance_section(self):
+        header = create_header("Mantenimiento", "", self.controller.handle_back, self.page.width)
+        cards = [
+            create_stats_card("Total Tareas", 0, "Pendientes", ft.Icons.BUILD, ft.Colors.BLUE_400),
+            create_stats_card("Prioridad Alta", 0, "Urgentes", ft.Icons.ERROR, ft.Colors.RED_400),
+            create_stats_card("T. Promedio", "0 días", "Estimado", ft.Icons.TIMER, ft.Colors.AMBER_400),
+        ]
+        stats_row = ft.Row(cards, spacing=10, alignment=ft.MainAxisAlignment.CENTER)
+        search_bar = self._create_search_bar("Buscar por caja o problema...", 'maintenance')
+        root = SectionRoot([
+            create_solid_background(),
             ft.Column([header, ft.Container(content=ft.Column([stats_row, search_bar, 
                 
                 ft.Container(self.maintenance_list_container, expand=True) 
@@ -655,20 +981,122 @@ class AppView:
                 expand=True # <-- Y ESTE EXPAND ES CLAVE
                 ), padding=16, expand=True)], expand=True)
         ], expand=True)
+        root.data = {"header": header, "cards": cards, "search": search_bar}
+        return root
 
-    def update_maintenance_list(self, tasks):
-        self.maintenance_list_container.controls.clear()
-        if not tasks:
-            self.maintenance_list_container.controls.append(create_styled_container(content=ft.Text("No hay tareas de mantenimiento", text_align=ft.TextAlign.CENTER), padding=32))
+    def _build_maintenance_card(self, task):
+        dot = ft.Icon(ft.Icons.CIRCLE, size=10)
+        name = ft.Text(size=14, weight=ft.FontWeight.W_500, expand=True)
+        days = ft.Text(size=11, color=ft.Colors.WHITE70)
+        issue = ft.Text(size=12, color=ft.Colors.WHITE)
+        details = ft.Text(size=11, color=ft.Colors.WHITE70, max_lines=2, overflow=ft.TextOverflow.ELLIPSIS)
+        card = create_styled_container(
+            content=ft.Column([
+                ft.Row([dot, name, days]),
+                issue,
+                details,
+            ], spacing=6), padding=12,
+        )
+        card.data = {"refs": (dot, name, days, issue, details)}
+        self._patch_maintenance_card(card, task)
+        return card
+
+    def _patch_maintenance_card(self, card, task):
+        dot, name, days, issue, details = card.data["refs"]
+        p_Colors = {'high': ft.Colors.RED_400, 'medium': ft.Colors.ORANGE_400, 'low': ft.Colors.BLUE_400}
+        dot.color = p_Colors.get(task.priority, ft.Colors.GREY_500)
+        name.value = task.name
+        days.value = f"~{task.estimated_days} días"
+        issue.value = task.issue
+        details.value = task.details
+
+    def update_maintenance_list(self, tasks, send=True):
+        self._reconcile_list('maintenance', self.maintenance_list_container, tasks, self._build_maintenance_card, self._patch_maintenance_card, "No hay tareas de mantenimiento", send)
+
+    def update_filtered_list(self, section, active_filter, rows):
+        """
+        Camino corto para un cambio de filtro: marca el botón activo en su sitio
+        (los contadores no cambian) y reconcilia la lista, y envía solo esos
+        controles en un único page.update(). Devuelve False si la sección aún no
+        está construida (entonces hace falta un render completo).
+        """
+        root = self._sections.get((section, self.controller.current_user_role))
+        if root is None:
+            return False
+        lists = {
+            'cashiers': (self.update_cashier_list, self.cashier_list_container),
+            'inventory': (self.update_inventory_list, self.inventory_list_container),
+            'sales': (self.update_sales_list, self.sales_list_container),
+            'maintenance': (self.update_maintenance_list, self.maintenance_list_container),
+        }
+        update_list, container = lists[section]
+        buttons = root.data.get("filters", ())
+        for button in buttons:
+            self._patch_filter_button(button, None, active_filter)
+        update_list(rows, send=False)
+        if self.page.controls and container.page:
+            self.page.update(*buttons, container)
+        return True
+
+    # --- Reconciliación de listas por clave ---
+    def _reconcile_list(self, section, container, rows, build_card, patch_card, empty_message, send=True):
+        """
+        Actualiza una lista reutilizando la tarjeta de cada fila según su 'id':
+        las filas iguales se dejan tal cual, las que cambiaron solo modifican los
+        campos distintos, y las filas nuevas reciclan las tarjetas de las que ya
+        no están (solo se crean o quitan tarjetas si cambia el número de filas).
+        Así Flet envía al cliente un parche pequeño en vez de la lista entera.
+        Con send=False no se envía nada (lo hará el page.update() del render).
+        """
+        previous = self._keyed_cards[section]
+        keys = {row.id for row in rows}
+        free = [card for key, card in reversed(previous.items()) if key not in keys]
+        current = {}
+        for row in rows:
+            key = row.id
+            snapshot = row  # los registros ya son tuplas inmutables
+            card = previous.get(key)
+            if card is None and free:
+                card = free.pop()  # se recicla la tarjeta de una fila que ya no está
+                patch_card(card, row)
+            elif card is None:
+                card = build_card(row)
+            elif card.data["snapshot"] != snapshot:
+                patch_card(card, row)
+            card.data["snapshot"] = snapshot
+            current[key] = card
+        self._keyed_cards[section] = current
+
+        if current:
+            container.controls = list(current.values())
         else:
-            p_Colors = {'high': ft.Colors.RED_400, 'medium': ft.Colors.ORANGE_400, 'low': ft.Colors.BLUE_400}
-            for task in tasks:
-                card = create_styled_container(
-                    content=ft.Column([
-                        ft.Row([ft.Icon(ft.Icons.CIRCLE, color=p_Colors.get(task['priority'], ft.Colors.GREY_500), size=10), ft.Text(task['name'], size=14, weight=ft.FontWeight.W_500, expand=True), ft.Text(f"~{task['estimated_days']} días", size=11, color=ft.Colors.WHITE70)]),
-                        ft.Text(task['issue'], size=12, color=ft.Colors.WHITE),
-                        ft.Text(task['details'], size=11, color=ft.Colors.WHITE70, max_lines=2, overflow=ft.TextOverflow.ELLIPSIS),
-                    ], spacing=6), padding=12,
-                )
-                self.maintenance_list_container.controls.append(card)
-        if self.page.controls: self.page.update()
\ No newline at end of file
+            container.controls = [self._empty_list_card(section, empty_message)]
+        if send:
+            self._update_list_container(container)
+
+    def _append_to_list(self, section, container, rows, build_card):
+        """Añade filas nuevas al final de una lista reconciliada (paginación)."""
+        cards = self._keyed_cards[section]
+        added = False
+        for row in rows:
+            if row.id in cards: continue
+            card = build_card(row)
+            card.data["snapshot"] = row
+            cards[row.id] = card
+            container.controls.append(card)
+            added = True
+        if added:
+            self._update_list_container(container)
+
+    def _empty_list_card(self, section, message):
+        """Tarjeta de 'lista vacía', también reutilizada entre actualizaciones."""
+        card = self._empty_cards.get(section)
+        if card is None:
+            card = create_styled_container(content=ft.Text(message, text_align=ft.TextAlign.CENTER), padding=32)
+            self._empty_cards[section] = card
+        return card
+
+    def _update_list_container(self, container):
+        """Envía solo el contenedor de la lista si ya está en pantalla."""
+        if self.page.controls and container.page:
+            container.update()